@@ -59,7 +59,9 @@ public class PythonApiService {
             log.info("Calling Python API: {}", url);
             
             ResponseEntity<String> response = restTemplate.postForEntity(url, requestEntity, String.class);
-            
+            // Thời gian theo stage phía Python (read, preflight, extract, detect, log, total)
+            log.info("Python API Server-Timing: {}", response.getHeaders().getFirst("Server-Timing"));
+
             if (response.getStatusCode() == HttpStatus.OK) {
                 return parseSensitiveInfoResponse(response.getBody());
             } else {
@@ -1,8 +1,10 @@
 """
 Database configuration và connection setup cho PostgreSQL
+Engine (và DBAPI driver) chỉ được tạo khi cần kết nối lần đầu (get_engine), import module không mở connection pool
 """
 
 import os
+import threading
 from sqlalchemy import create_engine, MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -26,6 +28,9 @@ class DatabaseSettings(BaseSettings):
     pool_timeout: int = 30
     pool_recycle: int = 3600
     
+    # Ghi DocumentRisk của một document bằng một bulk INSERT (false: db.add() từng object như trước)
+    bulk_insert: bool = True
+    
     # Environment
     environment: str = "development"
     
@@ -44,18 +49,35 @@ class DatabaseSettings(BaseSettings):
 # Khởi tạo settings
 db_settings = DatabaseSettings()
 
-# Tạo SQLAlchemy engine
-engine = create_engine(
-    db_settings.database_url,
-    pool_size=db_settings.pool_size,
-    max_overflow=db_settings.max_overflow,
-    pool_timeout=db_settings.pool_timeout,
-    pool_recycle=db_settings.pool_recycle,
-    echo=db_settings.environment == "development",  # Log SQL queries trong dev
-)
-
-# Tạo SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Engine tạo lazy ở lần kết nối đầu tiên
+_engine = None
+_engine_lock = threading.Lock()
+
+# Tạo SessionLocal class (bind vào engine khi engine được tạo)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+def get_engine():
+    """SQLAlchemy engine dùng chung trong process, tạo ở lần gọi đầu tiên"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    db_settings.database_url,
+                    pool_size=db_settings.pool_size,
+                    max_overflow=db_settings.max_overflow,
+                    pool_timeout=db_settings.pool_timeout,
+                    pool_recycle=db_settings.pool_recycle,
+                    echo=db_settings.environment == "development",  # Log SQL queries trong dev
+                )
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+def __getattr__(name: str):
+    # Giữ tương thích với `from app.config.database import engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Tạo Base class cho models
 Base = declarative_base()
@@ -68,6 +90,7 @@ def get_db():
     Dependency để lấy database session
     Sử dụng trong FastAPI dependency injection
     """
+    get_engine()
     db = SessionLocal()
     try:
         yield db
@@ -76,12 +99,12 @@ def get_db():
 
 def create_tables():
     """Tạo tất cả tables trong database"""
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 def drop_tables():
     """Xóa tất cả tables trong database (chỉ dùng trong development)"""
     if db_settings.environment == "development":
-        Base.metadata.drop_all(bind=engine)
+        Base.metadata.drop_all(bind=get_engine())
     else:
         raise Exception("Cannot drop tables in production environment")
 
@@ -91,7 +114,7 @@ def test_connection() -> bool:
     Returns True nếu kết nối thành công, False nếu thất bại
     """
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             connection.execute("SELECT 1")
         return True
     except Exception as e:
@@ -101,7 +124,7 @@ def test_connection() -> bool:
 def get_database_info() -> dict:
     """Lấy thông tin về database"""
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             result = connection.execute("SELECT version()")
             version = result.fetchone()[0]
             
@@ -127,6 +150,7 @@ class DatabaseSession:
         self.db = None
     
     def __enter__(self):
+        get_engine()
         self.db = SessionLocal()
         return self.db
     
@@ -147,7 +171,7 @@ def execute_raw_sql(sql: str, params: dict = None):
 def check_table_exists(table_name: str) -> bool:
     """Kiểm tra xem table có tồn tại không"""
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             result = connection.execute(
                 "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = %s)",
                 (table_name,)
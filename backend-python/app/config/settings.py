@@ -0,0 +1,84 @@
+"""
+Cấu hình cho pipeline phát hiện thông tin nhạy cảm
+"""
+
+from pydantic_settings import BaseSettings
+
+class DetectionSettings(BaseSettings):
+    """Cấu hình detection từ environment variables"""
+
+    # Giới hạn cho endpoint /detect/text
+    text_max_chars: int = 100_000
+    text_max_batch_size: int = 100
+
+    # Chế độ extract PDF mặc định: "full" (pdfplumber) hoặc "fast" (pdfminer + fallback)
+    pdf_mode: str = "full"
+
+    # Extractor backend mặc định cho từng format (xem GET /extractors và benchmarks/bench_extractors.py)
+    # extractor_pdf để trống -> theo pdf_mode (pdfplumber / pdfminer-fast)
+    extractor_pdf: str = ""
+    extractor_docx: str = "docx-stream"
+    extractor_xlsx: str = "xlsx"
+    extractor_csv: str = "csv"
+
+    # Số row xử lý mỗi lần khi scan XLSX/CSV theo cột
+    spreadsheet_chunk_rows: int = 5000
+
+    # Giới hạn RAM tăng thêm khi xử lý một tài liệu (MB), 0 = không giới hạn
+    max_document_memory_mb: int = 0
+
+    # Pre-flight: số page PDF lấy mẫu để kiểm tra text layer (0 = không kiểm tra)
+    # và số page tối đa của PDF (0 = không giới hạn)
+    preflight_sample_pages: int = 3
+    max_pdf_pages: int = 0
+
+    # NER của DocumentProcessor: model token classification (thư mục local hoặc model id), load lazy ở lần dùng đầu
+    ner_model_path: str = "dslim/bert-base-NER"
+    # Số token mỗi window (0 = model_max_length của tokenizer, tối đa 512) và số token overlap giữa 2 window
+    ner_window_tokens: int = 0
+    ner_window_overlap: int = 64
+    ner_batch_size: int = 8
+    # Số thread CPU cho torch (0 = mặc định của torch)
+    ner_threads: int = 0
+
+    # Audit log kết quả detection (ghi JSON ra stdout qua background thread)
+    # level: off | summary | matches | verbose (verbose thêm dòng/cột và đoạn text chứa match)
+    audit_log_level: str = "summary"
+    # Tỉ lệ document được ghi log (0..1)
+    audit_log_sample_rate: float = 1.0
+    audit_log_mask_values: bool = True
+    # Số record tối đa chờ ghi, queue đầy thì record mới bị bỏ
+    audit_log_queue_size: int = 10000
+
+    # Tỉ lệ request được profile theo rule/keyword và cộng dồn vào GET /rules/profile (0..1),
+    # request có ?explain=true luôn được profile
+    rule_profile_sample_rate: float = 0.0
+
+    # Trace cấp phát bộ nhớ theo stage bằng tracemalloc (?trace_alloc=true, GET /allocations/profile), tắt mặc định;
+    # tỉ lệ request /detect, /detect/gate được trace và cộng dồn (0..1) và số allocation site mỗi stage trong response
+    alloc_trace_enabled: bool = False
+    alloc_trace_sample_rate: float = 0.0
+    alloc_trace_top: int = 10
+
+    # Admin endpoint (/admin/...) cần header X-Admin-Token bằng giá trị này, để trống = không cho phép
+    admin_token: str = ""
+    # Profiling theo yêu cầu (POST /admin/profile), tắt mặc định; giới hạn số request / số giây của một phiên
+    profiling_enabled: bool = False
+    profiling_max_requests: int = 100
+    profiling_max_seconds: int = 600
+
+    # Metrics gộp giữa các worker: thư mục chung cho snapshot của từng worker (gunicorn.conf.py đặt sẵn),
+    # để trống = /metrics chỉ có số liệu của process trả lời; snapshot được ghi lại mỗi metrics_sync_seconds
+    metrics_multiproc_dir: str = ""
+    metrics_sync_seconds: float = 1.0
+
+    # Chạy self-test với file mẫu ở background sau warm-up (không ảnh hưởng /ready)
+    startup_self_test: bool = False
+
+    class Config:
+        env_file = ".env"
+        env_prefix = "DETECT_"
+        extra = "ignore"
+
+# Khởi tạo settings
+detection_settings = DetectionSettings()
@@ -0,0 +1,61 @@
+"""
+Controller cho admin endpoints (profiling theo yêu cầu trên worker đang chạy)
+"""
+
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException
+from fastapi.responses import Response, PlainTextResponse
+from ..config.settings import detection_settings
+from ..services.request_profiler import request_profiler
+
+PROFILE_FORMATS = ("json", "text", "pstats")
+
+def require_profiling_enabled():
+    """Dependency: endpoint profiling trả 404 khi DETECT_PROFILING_ENABLED tắt (mặc định)"""
+    if not detection_settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency: header X-Admin-Token phải khớp DETECT_ADMIN_TOKEN (token trống thì không ai được phép)"""
+    expected = detection_settings.admin_token
+    if not expected or not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+class AdminController:
+    """Controller cho admin endpoints"""
+
+    def start_profile(self, requests: int = None, seconds: float = None):
+        """Profile N request /detect, /detect/gate tiếp theo và/hoặc trong seconds giây, trong worker này"""
+        return request_profiler.start(requests, seconds)
+
+    def stop_profile(self):
+        """Kết thúc phiên profiling, giữ lại stats đã thu"""
+        return request_profiler.stop()
+
+    def get_profile(self, format: str = "json", top: int = 30, sort: str = "cumulative"):
+        """
+        Stats cộng dồn của phiên gần nhất
+        json: trạng thái phiên + top function; text: bảng pstats; pstats: file tải về cho python -m pstats / snakeviz
+        """
+        if format not in PROFILE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(PROFILE_FORMATS)}")
+
+        session = request_profiler.describe()
+        if format == "json":
+            return {"session": session, "sort": sort, "functions": request_profiler.top_functions(top, sort)}
+
+        filename = f"profile-{session['pid']}-{int(session['started_at'] or 0)}"
+        if format == "text":
+            return PlainTextResponse(
+                request_profiler.render_text(top, sort),
+                headers={"Content-Disposition": f'inline; filename="{filename}.txt"'}
+            )
+        return Response(
+            content=request_profiler.dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.pstats"'}
+        )
+
+# Khởi tạo controller instance
+admin_controller = AdminController()
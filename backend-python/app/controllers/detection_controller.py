@@ -3,9 +3,21 @@ Controller cho API endpoints phát hiện thông tin nhạy cảm
 """
 
 import os
-from fastapi import UploadFile, File, HTTPException
-from pathlib import Path
+import json
+import uuid
+from fastapi import UploadFile, File, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from ..config.settings import detection_settings
+from ..services.alloc_trace import alloc_tracer
 from ..services.detection_service import detection_service
+from ..services.extractor_registry import extractor_registry
+from ..services.metrics import detection_metrics, current_timings, STAGE_UPLOAD_READ, STAGE_PREFLIGHT, MIME_TEXT
+from ..services.page_selection import PageSelection
+from ..services.preflight import run_preflight, MIME_PDF, MIME_DOCX, MIME_XLSX, MIME_CSV, GENERIC_MIME_TYPES
+from ..services.request_profiler import request_profiler
+from ..services.rule_profile import rule_profiler
+from ..services.response_encoder import encode_response, negotiate_media_type, dumps_json
 
 class DetectionController:
     """Controller cho detection endpoints"""
@@ -13,112 +25,309 @@ class DetectionController:
     def __init__(self):
         self.detection_service = detection_service
     
-    async def detect_sensitive_info(self, file: UploadFile = File(...)):
+    async def detect_sensitive_info(self, file: UploadFile = File(...), accept: str = None, page_selection: PageSelection = None, pdf_mode: str = None, extractor: str = None, explain: bool = False, timings: bool = False, trace_alloc: bool = False):
         """
-        Detect sensitive information in PDF or DOCX files
+        Detect sensitive information in PDF, DOCX, XLSX or CSV files
+        Response được encode theo header Accept (JSON, columnar JSON, msgpack)
+        page_selection: chỉ scan page range / sample (response có coverage metadata)
+        pdf_mode: "full" hoặc "fast" (response có method extract của từng page)
+        extractor: tên extractor backend, ưu tiên hơn pdf_mode
+        explain: thêm block profile theo rule/keyword vào response
+        timings: thêm block timings (thời gian theo stage, số page, độ dài text) vào response
+        trace_alloc: thêm block allocations (peak và top allocation site theo stage) vào response
+        File được pre-flight trước khi parse (magic bytes, mã hoá, text layer), xem run_preflight
         """
+        self._check_file_type(file)
+        self._check_extractor(extractor)
+        alloc_tracer.check_request(trace_alloc)
+        # Kiểm tra Accept trước khi xử lý file để trả 406 sớm
+        negotiate_media_type(accept)
         file_path = None
-        
-        # Check file type
-        if file.content_type not in [
-            "application/pdf",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        ]:
-            raise HTTPException(
-                status_code=400,
-                detail="Only PDF and DOCX files are supported"
-            )
 
         try:
-            # Create temp directory if not exists
-            os.makedirs("temp", exist_ok=True)
-            
-            # Save uploaded file
-            file_path = f"temp/{file.filename}"
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            
-            # Analyze document
-            result = self.detection_service.analyze_document(
-                file_path=file_path,
-                filename=file.filename,
-                mime_type=file.content_type,
-                file_size=len(content)
-            )
-            
-            # Clean up temp file
-            os.remove(file_path)
-            file_path = None
-            
-            return result
+            with alloc_tracer.trace(trace_alloc) as allocations:
+                file_path, file_size = await self._save_upload(file)
+                
+                # Phần CPU-bound (pre-flight, extract, detect, encode) chạy ở threadpool để không block event loop
+                return await run_in_threadpool(
+                    self._analyze_upload, file, file_path, file_size, accept, page_selection, pdf_mode,
+                    extractor, explain, timings, allocations, trace_alloc
+                )
 
+        except HTTPException:
+            # Giữ nguyên status của lỗi đã xác định (vd: 413 khi vượt giới hạn bộ nhớ)
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            # Clean up temp file
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+    
+    async def detect_sensitive_info_stream(self, file: UploadFile = File(...), page_selection: PageSelection = None, pdf_mode: str = None, extractor: str = None, explain: bool = False, timings: bool = False):
+        """
+        Detect sensitive information và stream kết quả dạng NDJSON
+        (header, match records theo từng page, summary; explain/timings: summary có block profile/timings)
+        Header Server-Timing chỉ có read/preflight vì được gửi trước khi extract
+        """
+        self._check_file_type(file)
+        self._check_extractor(extractor)
+        
+        file_path = None
+        try:
+            file_path, file_size = await self._save_upload(file)
+            # Pre-flight trước khi bắt đầu stream để lỗi có status code cụ thể ; pre-flight chạy ở threadpool
+            preflight = await run_in_threadpool(self._preflight, file, file_path, file_size)
         except Exception as e:
-            # Clean up temp file in case of error
             if file_path and os.path.exists(file_path):
                 os.remove(file_path)
+            if isinstance(e, HTTPException):
+                raise
             raise HTTPException(status_code=500, detail=str(e))
+        
+        def generate_records():
+            try:
+                records = self.detection_service.stream_document(
+                    file_path=file_path,
+                    filename=file.filename,
+                    mime_type=preflight["mime_type"],
+                    file_size=file_size,
+                    page_selection=page_selection,
+                    pdf_mode=pdf_mode,
+                    preflight=preflight,
+                    extractor=extractor,
+                    explain=explain
+                )
+                for record in records:
+                    if timings and record["type"] == "summary":
+                        self._add_timings(record, len(record["extraction"]["pages"]), record["content_length"])
+                    yield dumps_json(record) + b"\n"
+            except Exception as e:
+                # Status 200 đã được gửi, báo lỗi bằng record cuối cùng
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                yield dumps_json({"type": "error", "success": False, "detail": detail}) + b"\n"
+            finally:
+                # Clean up temp file khi stream kết thúc (kể cả client ngắt kết nối)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+        
+        return StreamingResponse(generate_records(), media_type="application/x-ndjson")
     
-    async def test_detect_with_sample_file(self):
+    async def detect_gate(self, file: UploadFile = File(...), targets: str = None, accept: str = None, extractor: str = None, timings: bool = False, trace_alloc: bool = False):
         """
-        Test detection với file PDF mẫu
+        Gate mode cho upload flow: chỉ trả về verdict có/không chứa dữ liệu thuộc targets
+        targets: danh sách category/subtype phân tách bằng dấu phẩy (mặc định IDENTIFIABLE)
         """
+        self._check_file_type(file)
+        self._check_extractor(extractor)
+        alloc_tracer.check_request(trace_alloc)
+        negotiate_media_type(accept)
+        target_list = [target for target in (targets or "").split(",") if target.strip()]
+        # Validate targets trước khi lưu file
+        self.detection_service.resolve_gate_rules(target_list)
+        file_path = None
+        
         try:
-            # Đường dẫn tới file PDF mẫu
-            sample_file_path = Path(__file__).parent.parent.parent / "files" / "Dữ liệu giả 1.pdf"
-            
-            if not sample_file_path.exists():
-                print(f"⚠️ File mẫu không tồn tại: {sample_file_path}")
-                return
-            
-            print(f"🧪 Bắt đầu test với file: {sample_file_path}")
-            
-            # Extract text từ PDF
-            content_text = self.detection_service.extract_text_from_pdf(str(sample_file_path))
-            print(f"📄 Đã extract text từ file, độ dài: {len(content_text)} ký tự")
-            print(f"📄 Đã extract text từ file, {content_text}")
+            with alloc_tracer.trace(trace_alloc) as allocations:
+                file_path, file_size = await self._save_upload(file)
+                return await run_in_threadpool(
+                    self._gate_upload, file, file_path, file_size, target_list, accept, extractor,
+                    timings, allocations, trace_alloc
+                )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+    
+    def _analyze_upload(self, file: UploadFile, file_path: str, file_size: int, accept: str, page_selection: PageSelection, pdf_mode: str, extractor: str, explain: bool, timings: bool, allocations, trace_alloc: bool):
+        """
+        Phần CPU-bound của /detect (chạy ở threadpool, contextvars của request được copy sang thread)
+        Được profile khi có phiên POST /admin/profile (cProfile chỉ đo thread gọi nó)
+        """
+        with request_profiler.profile():
+            preflight = self._preflight(file, file_path, file_size)
             
-            # Detect sensitive information using new rules
-            matches = self.detection_service.detect_sensitive_by_rules(content_text)
+            # Analyze document
+            result = self.detection_service.analyze_document(
+                file_path=file_path,
+                filename=file.filename,
+                mime_type=preflight["mime_type"],
+                file_size=file_size,
+                page_selection=page_selection,
+                pdf_mode=pdf_mode,
+                preflight=preflight,
+                extractor=extractor,
+                explain=explain
+            )
             
-            # Print test results
-            print("=" * 60)
-            print("🧪 TEST SENSITIVE DATA DETECTION")
-            print("=" * 60)
-            print(f"📁 File: {sample_file_path.name}")
-            print(f"📝 Content Length: {len(content_text)} characters")
-            print(f"🎯 Total Matches: {len(matches)}")
-            print()
+            if timings:
+                self._add_timings(result, len(result["extraction"]["pages"]), result["content_length"])
+            self._add_allocations(result, allocations, trace_alloc)
+            return encode_response(result, accept)
+    
+    def _gate_upload(self, file: UploadFile, file_path: str, file_size: int, target_list: list, accept: str, extractor: str, timings: bool, allocations, trace_alloc: bool):
+        """Phần CPU-bound của /detect/gate (chạy ở threadpool như _analyze_upload)"""
+        with request_profiler.profile():
+            preflight = self._preflight(file, file_path, file_size)
+            result = self.detection_service.gate_document(
+                file_path=file_path,
+                filename=file.filename,
+                mime_type=preflight["mime_type"],
+                targets=target_list,
+                preflight=preflight,
+                extractor=extractor
+            )
+            if timings:
+                self._add_timings(result, result["pages_scanned"], None)
+            self._add_allocations(result, allocations, trace_alloc)
+            return encode_response(result, accept)
+    
+    def _check_file_type(self, file: UploadFile):
+        """
+        Check file type khai báo
+        Content type chung chung (octet-stream / không có) được chấp nhận, format thật do pre-flight xác định
+        """
+        if (file.content_type or "") not in (MIME_PDF, MIME_DOCX, MIME_XLSX, MIME_CSV) + GENERIC_MIME_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail="Only PDF, DOCX, XLSX and CSV files are supported"
+            )
+    
+    def _check_extractor(self, extractor: str = None):
+        """Kiểm tra tên extractor trước khi lưu file (MIME type được kiểm tra sau pre-flight)"""
+        if extractor is not None:
+            extractor_registry.get(extractor)
+    
+    def _add_timings(self, result: dict, pages: int, content_length: int):
+        """Thêm block timings của request hiện tại (xem RequestTimings.describe)"""
+        request_timings = current_timings()
+        if request_timings is not None:
+            result["timings"] = request_timings.describe(pages=pages, content_length=content_length)
+    
+    def _add_allocations(self, result: dict, allocations, trace_alloc: bool):
+        """Kết thúc trace cấp phát (stage response), thêm block allocations khi request có ?trace_alloc=true"""
+        report = allocations.finish()
+        if trace_alloc:
+            result["allocations"] = report
+    
+    def get_allocation_profile(self, top: int = 10):
+        """Cấp phát theo stage cộng dồn trong process"""
+        return alloc_tracer.describe(top)
+    
+    def reset_allocation_profile(self):
+        """Xoá số liệu cấp phát cộng dồn của worker trả lời request"""
+        alloc_tracer.reset()
+        return {"success": True, "pid": os.getpid()}
+    
+    def get_rule_profile(self, top: int = 20):
+        """Profile theo rule/keyword cộng dồn trong process"""
+        return rule_profiler.describe(top)
+    
+    def reset_rule_profile(self):
+        """Xoá profile cộng dồn của worker trả lời request"""
+        rule_profiler.reset()
+        return {"success": True, "pid": os.getpid()}
+    
+    def list_extractors(self):
+        """Danh sách extractor backend, capability và backend mặc định của deployment"""
+        return extractor_registry.describe()
+    
+    async def _save_upload(self, file: UploadFile):
+        """Lưu file upload vào thư mục temp, trả về (file_path, file_size)"""
+        # Create temp directory if not exists
+        os.makedirs("temp", exist_ok=True)
+        
+        # Save uploaded file: tên file temp riêng cho mỗi request (giữ extension), upload trùng tên
+        # chạy song song không ghi đè / xoá file của nhau
+        extension = os.path.splitext(os.path.basename(file.filename or ""))[1]
+        file_path = os.path.join("temp", f"{uuid.uuid4().hex}{extension}")
+        try:
+            with detection_metrics.stage(STAGE_UPLOAD_READ, file.content_type or ""), open(file_path, "wb") as buffer:
+                content = await file.read()
+                buffer.write(content)
+        except Exception:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+        return file_path, len(content)
+    
+    def _preflight(self, file: UploadFile, file_path: str, file_size: int):
+        """
+        Pre-flight file đã lưu (xem run_preflight)
+        Metrics: thời gian pre-flight theo content type khai báo, byte của document theo MIME type thật
+        """
+        with detection_metrics.stage(STAGE_PREFLIGHT, file.content_type or ""):
+            preflight = run_preflight(file_path, file.content_type)
+        detection_metrics.record_upload(preflight["mime_type"], file_size)
+        return preflight
+    
+    async def detect_sensitive_text(self, request: Request, explain: bool = False, timings: bool = False):
+        """
+        Detect sensitive information in plain text (không cần extract file)
+        Body: text/plain (UTF-8) hoặc JSON {"text": "..."} / {"texts": [...]} / [...]
+        explain: mỗi kết quả có block profile theo rule/keyword
+        timings: thêm block timings của cả request (batch: ở object ngoài cùng)
+        """
+        accept = request.headers.get("accept")
+        negotiate_media_type(accept)
+        
+        body = await request.body()
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        
+        if content_type == "application/json":
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid JSON body")
             
-            if matches:
-                print("🔎 DETECTED SENSITIVE DATA:")
-                categories = {}
-                for match in matches:
-                    category = match["category"]
-                    if category not in categories:
-                        categories[category] = []
-                    categories[category].append(match)
-                
-                for category, cat_matches in categories.items():
-                    print(f"\n📂 {category} ({len(cat_matches)} matches):")
-                    for i, match in enumerate(cat_matches, 1):
-                        # Tìm line number và column của match
-                        line_num, col_num, line_content = self.detection_service._find_line_and_column(content_text, match['start'])
-                        
-                        print(f"  {i}. {match['subtype']}: {match['value']} ({match['method']})")
-                        print(f"     Position: {match['start']}-{match['end']} (Line {line_num}, Col {col_num})")
-                        if 'keyword_found' in match:
-                            print(f"     Keyword Found: {match['keyword_found']}")
-                        print(f"     Line Content: {line_content.strip()}")
-                        print()
+            if isinstance(payload, dict) and isinstance(payload.get("text"), str):
+                texts, is_batch = [payload["text"]], False
+            elif isinstance(payload, dict) and isinstance(payload.get("texts"), list):
+                texts, is_batch = payload["texts"], True
+            elif isinstance(payload, list):
+                texts, is_batch = payload, True
             else:
-                print("✅ No sensitive data detected")
-            
-            print("=" * 60)
-            print("✅ Test hoàn thành thành công!")
+                raise HTTPException(
+                    status_code=400,
+                    detail='JSON body must be {"text": "..."}, {"texts": [...]} or a list of strings'
+                )
             
-        except Exception as e:
-            print(f"❌ Lỗi trong quá trình test: {str(e)}")
+            if not all(isinstance(text, str) for text in texts):
+                raise HTTPException(status_code=400, detail="All texts must be strings")
+        else:
+            try:
+                texts, is_batch = [body.decode("utf-8")], False
+            except UnicodeDecodeError:
+                raise HTTPException(status_code=400, detail="Body must be UTF-8 encoded text")
+        
+        # Giới hạn kích thước của request (bộ nhớ và thời gian xử lý một batch)
+        if len(texts) > detection_settings.text_max_batch_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch size exceeds limit of {detection_settings.text_max_batch_size} texts"
+            )
+        if any(len(text) > detection_settings.text_max_chars for text in texts):
+            raise HTTPException(
+                status_code=413,
+                detail=f"Text length exceeds limit of {detection_settings.text_max_chars} characters"
+            )
+        
+        detection_metrics.record_upload(MIME_TEXT, len(body))
+        # Detection + classifier là CPU-bound: chạy ở threadpool để batch lớn không block event loop
+        results = await run_in_threadpool(self._analyze_texts, texts, explain)
+        
+        response = {"success": True, "total": len(results), "results": results} if is_batch else results[0]
+        if timings:
+            self._add_timings(response, None, sum(len(text) for text in texts))
+        return encode_response(response, accept)
+
+    def _analyze_texts(self, texts: list, explain: bool) -> list:
+        """Kết quả analyze_text của từng text (chạy ngoài event loop)"""
+        return [self.detection_service.analyze_text(text, explain) for text in texts]
 
 # Khởi tạo controller instance
 detection_controller = DetectionController()
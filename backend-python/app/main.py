@@ -1,7 +1,16 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Request, Header, Query, Depends
+from fastapi.responses import JSONResponse, Response
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
+from .config.settings import detection_settings
 from .controllers.detection_controller import detection_controller
+from .controllers.admin_controller import admin_controller, require_admin, require_profiling_enabled
+from .services.audit_log import audit_logger
+from .services.metrics import detection_metrics, MetricsMiddleware, CONTENT_TYPE_LATEST
+from .services.self_test import run_background_self_test
+from .services.warmup import warm_up, warmup_state
+from .services.page_selection import PageSelection
 
 app = FastAPI(title="Document AI - Sensitive Info Detection")
 
@@ -14,24 +23,196 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Thời gian, status và số request đang xử lý theo endpoint (GET /metrics)
+app.add_middleware(MetricsMiddleware, metrics=detection_metrics)
+detection_metrics.add_callback(
+    "docai_audit_log_dropped_total", "Audit log records dropped because the queue was full", "counter",
+    lambda: audit_logger.dropped
+)
+
+def get_page_selection(
+    pages: Optional[str] = Query(None, description="Explicit page range, e.g. 1-10,15,20-"),
+    first_pages: Optional[int] = Query(None, description="Scan only the first N pages"),
+    every_k: Optional[int] = Query(None, description="Scan every k-th page"),
+    sample_size: Optional[int] = Query(None, description="Scan a random sample of N pages"),
+    seed: int = Query(0, description="Seed for sample_size")
+) -> PageSelection:
+    """Page range / sampling policy cho document lớn"""
+    return PageSelection(pages=pages, first_pages=first_pages, every_k=every_k, sample_size=sample_size, seed=seed)
+
+PDF_MODE_QUERY = Query(None, pattern="^(full|fast)$", description="PDF extraction mode, default DETECT_PDF_MODE")
+EXTRACTOR_QUERY = Query(None, description="Extractor backend (see GET /extractors), overrides pdf_mode")
+EXPLAIN_QUERY = Query(False, description="Add a per-rule/per-keyword profile block to the response")
+TIMINGS_QUERY = Query(False, description="Add a per-stage timings object to the response body")
+TRACE_ALLOC_QUERY = Query(False, description="Add per-stage allocation peaks and top allocation sites (needs DETECT_ALLOC_TRACE_ENABLED)")
+
+# Endpoint đọc/xoá số liệu cộng dồn của process: cần header X-Admin-Token
+ADMIN_DEPENDENCIES = [Depends(require_admin)]
+
 @app.post("/detect")
-async def detect_sensitive_info(file: UploadFile = File(...)):
+async def detect_sensitive_info(
+    file: UploadFile = File(...),
+    accept: Optional[str] = Header(None),
+    page_selection: PageSelection = Depends(get_page_selection),
+    pdf_mode: Optional[str] = PDF_MODE_QUERY,
+    extractor: Optional[str] = EXTRACTOR_QUERY,
+    explain: bool = EXPLAIN_QUERY,
+    timings: bool = TIMINGS_QUERY,
+    trace_alloc: bool = TRACE_ALLOC_QUERY
+):
+    """
+    Detect sensitive information in PDF, DOCX, XLSX or CSV files
+    """
+    return await detection_controller.detect_sensitive_info(file, accept, page_selection, pdf_mode, extractor, explain, timings, trace_alloc)
+
+@app.post("/detect/stream")
+async def detect_sensitive_info_stream(
+    file: UploadFile = File(...),
+    page_selection: PageSelection = Depends(get_page_selection),
+    pdf_mode: Optional[str] = PDF_MODE_QUERY,
+    extractor: Optional[str] = EXTRACTOR_QUERY,
+    explain: bool = EXPLAIN_QUERY,
+    timings: bool = TIMINGS_QUERY
+):
+    """
+    Detect sensitive information in PDF, DOCX, XLSX or CSV files, streamed as NDJSON
+    """
+    return await detection_controller.detect_sensitive_info_stream(file, page_selection, pdf_mode, extractor, explain, timings)
+
+@app.post("/detect/gate")
+async def detect_gate(
+    file: UploadFile = File(...),
+    targets: Optional[str] = Query(None, description="Comma-separated categories/subtypes, default IDENTIFIABLE"),
+    accept: Optional[str] = Header(None),
+    extractor: Optional[str] = EXTRACTOR_QUERY,
+    timings: bool = TIMINGS_QUERY,
+    trace_alloc: bool = TRACE_ALLOC_QUERY
+):
+    """
+    Early-exit gate: does the file contain any data of the target categories/subtypes?
     """
-    Detect sensitive information in PDF or DOCX files
+    return await detection_controller.detect_gate(file, targets, accept, extractor, timings, trace_alloc)
+
+@app.post("/detect/text")
+async def detect_sensitive_text(request: Request, explain: bool = EXPLAIN_QUERY, timings: bool = TIMINGS_QUERY):
+    """
+    Detect sensitive information in plain text or a JSON batch of texts
+    """
+    return await detection_controller.detect_sensitive_text(request, explain, timings)
+
+@app.get("/rules/profile", dependencies=ADMIN_DEPENDENCIES)
+def get_rule_profile(top: int = Query(20, ge=1, description="Number of unproductive keywords to list")):
+    """
+    Profile theo rule/keyword cộng dồn từ các request explain (và request được sample)
+    """
+    return detection_controller.get_rule_profile(top)
+
+@app.delete("/rules/profile", dependencies=ADMIN_DEPENDENCIES)
+def reset_rule_profile():
+    """
+    Xoá profile cộng dồn (vd. sau khi đổi rule set)
+    """
+    return detection_controller.reset_rule_profile()
+
+@app.get("/allocations/profile", dependencies=ADMIN_DEPENDENCIES)
+def get_allocation_profile(top: int = Query(10, ge=1, description="Number of allocation sites per stage")):
+    """
+    Peak và allocation site theo stage cộng dồn từ các request được trace (DETECT_ALLOC_TRACE_ENABLED)
     """
-    return await detection_controller.detect_sensitive_info(file)
+    return detection_controller.get_allocation_profile(top)
+
+@app.delete("/allocations/profile", dependencies=ADMIN_DEPENDENCIES)
+def reset_allocation_profile():
+    """
+    Xoá số liệu cấp phát cộng dồn
+    """
+    return detection_controller.reset_allocation_profile()
+
+# Profiling theo yêu cầu: tắt mặc định (404), cần header X-Admin-Token
+PROFILING_DEPENDENCIES = [Depends(require_profiling_enabled), *ADMIN_DEPENDENCIES]
+
+@app.post("/admin/profile", dependencies=PROFILING_DEPENDENCIES)
+def start_profile(
+    requests: Optional[int] = Query(None, ge=1, description="Profile the next N /detect and /detect/gate requests"),
+    seconds: Optional[float] = Query(None, gt=0, description="Profile requests for this many seconds")
+):
+    """
+    Bật cProfile trong worker nhận request (xem GET /admin/profile)
+    """
+    return admin_controller.start_profile(requests, seconds)
+
+@app.get("/admin/profile", dependencies=PROFILING_DEPENDENCIES)
+def get_profile(
+    format: str = Query("json", description="json, text or pstats (download)"),
+    top: int = Query(30, ge=1, description="Number of functions"),
+    sort: str = Query("cumulative", description="cumulative, tottime or ncalls")
+):
+    """
+    Stats cộng dồn của phiên profiling gần nhất trong worker này
+    """
+    return admin_controller.get_profile(format, top, sort)
+
+@app.delete("/admin/profile", dependencies=PROFILING_DEPENDENCIES)
+def stop_profile():
+    """
+    Kết thúc phiên profiling sớm
+    """
+    return admin_controller.stop_profile()
+
+@app.get("/extractors")
+def list_extractors():
+    """
+    Available extractor backends, their capabilities and the deployment defaults
+    """
+    return detection_controller.list_extractors()
 
 @app.on_event("startup")
 async def startup_event():
-    """Event được gọi khi ứng dụng khởi động"""
+    """
+    Event được gọi khi ứng dụng khởi động
+    Warm-up chạy ở background thread: app nhận request ngay, /ready trả 503 cho đến khi warm-up xong
+    """
     print("🚀 Ứng dụng Document AI đang khởi động...")
     
-    # Chạy test với file mẫu
-    await detection_controller.test_detect_with_sample_file()
+    # Audit log ghi qua background thread
+    audit_logger.start()
+    
+    # Nhiều worker: snapshot metrics ghi ra thư mục chung để /metrics trả về tổng của mọi worker
+    if detection_settings.metrics_multiproc_dir:
+        detection_metrics.start_multiprocess(detection_settings.metrics_multiproc_dir, detection_settings.metrics_sync_seconds)
     
-    print("✨ Ứng dụng đã sẵn sàng!")
+    app.state.warmup_task = asyncio.create_task(asyncio.to_thread(_warm_up))
+
+def _warm_up():
+    state = warm_up()
+    if not state.ready:
+        print(f"❌ Warm-up thất bại: {state.error}")
+        return
+    print(f"✨ Ứng dụng đã sẵn sàng! (warm-up {state.describe()['elapsed_ms']} ms)")
+    
+    # Self-test với file mẫu (tùy chọn, python -m app.services.self_test để chạy thủ công)
+    if detection_settings.startup_self_test:
+        run_background_self_test()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Ghi nốt audit log còn trong queue và snapshot metrics cuối cùng trước khi dừng"""
+    audit_logger.stop()
+    detection_metrics.stop_multiprocess()
 
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness endpoint: 503 cho đến khi warm-up xong"""
+    if not warmup_state.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "warmup": warmup_state.describe()})
+    return {"status": "ready", "warmup": warmup_state.describe()}
+
+@app.get("/metrics")
+def metrics():
+    """Metrics theo định dạng text của Prometheus"""
+    return Response(content=detection_metrics.render(), media_type=CONTENT_TYPE_LATEST)
@@ -12,6 +12,9 @@ import uuid
 
 from ..config.database import Base
 
+# BIGSERIAL trên PostgreSQL; SQLite (stand-in của benchmark) chỉ tự tăng với INTEGER PRIMARY KEY
+BigIntegerId = BigInteger().with_variant(Integer, "sqlite")
+
 class DocumentStatus(str, Enum):
     """Enum cho trạng thái document"""
     PENDING = "PENDING"
@@ -36,7 +39,7 @@ class User(Base):
     """Model cho users - để reference từ documents"""
     __tablename__ = "users"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerId, primary_key=True, index=True)
     username = Column(String(100), unique=True, nullable=False)
     email = Column(String(255), unique=True, nullable=False)
     full_name = Column(String(255), nullable=True)
@@ -56,7 +59,7 @@ class Document(Base):
     """
     __tablename__ = "documents"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerId, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
     mime_type = Column(String(255), nullable=False)  # application/pdf, application/vnd.openxmlformats-officedocument.wordprocessingml.document
     file_size = Column(BigInteger, nullable=False)  # bytes
@@ -85,7 +88,7 @@ class DocumentRisk(Base):
     """
     __tablename__ = "documents_risk"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerId, primary_key=True, index=True)
     document_id = Column(BigInteger, ForeignKey("documents.id"), nullable=False)
     
     # Risk information
@@ -96,6 +99,21 @@ class DocumentRisk(Base):
     # Relationships
     document = relationship("Document", back_populates="document_risks")
 
+# Detection type -> risk type (dựng một lần, save_document_analysis gọi cho mỗi risk row)
+RISK_TYPE_BY_DETECTION = {
+    "CMND/CCCD": RiskType.IDENTITY_DATA.value,
+    "MST": RiskType.FINANCIAL_DATA.value,
+    "Bank Account": RiskType.FINANCIAL_DATA.value,
+    "Credit Card": RiskType.FINANCIAL_DATA.value,
+    "Email": RiskType.PERSONAL_DATA.value,
+    "Phone": RiskType.PERSONAL_DATA.value,
+    "Social Insurance": RiskType.PERSONAL_DATA.value,
+    "API Key": RiskType.AUTHENTICATION_DATA.value,
+    "Secret Key": RiskType.AUTHENTICATION_DATA.value,
+    "Password": RiskType.AUTHENTICATION_DATA.value,
+    "Access Token": RiskType.AUTHENTICATION_DATA.value,
+}
+
 # Utility classes và functions
 class DocumentProcessor:
     """Utility class để xử lý document và tính toán risk"""
@@ -153,20 +171,7 @@ class DocumentProcessor:
     @staticmethod
     def map_detection_to_risk_type(detection_type: str) -> str:
         """Map từ detection type sang risk type"""
-        mapping = {
-            "CMND/CCCD": RiskType.IDENTITY_DATA.value,
-            "MST": RiskType.FINANCIAL_DATA.value,
-            "Bank Account": RiskType.FINANCIAL_DATA.value,
-            "Credit Card": RiskType.FINANCIAL_DATA.value,
-            "Email": RiskType.PERSONAL_DATA.value,
-            "Phone": RiskType.PERSONAL_DATA.value,
-            "Social Insurance": RiskType.PERSONAL_DATA.value,
-            "API Key": RiskType.AUTHENTICATION_DATA.value,
-            "Secret Key": RiskType.AUTHENTICATION_DATA.value,
-            "Password": RiskType.AUTHENTICATION_DATA.value,
-            "Access Token": RiskType.AUTHENTICATION_DATA.value,
-        }
-        return mapping.get(detection_type, RiskType.CONFIDENTIAL_DATA.value)
+        return RISK_TYPE_BY_DETECTION.get(detection_type, RiskType.CONFIDENTIAL_DATA.value)
     
     @staticmethod
     def create_sensitive_info_json(detection_result: dict) -> str:
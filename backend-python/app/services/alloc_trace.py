@@ -0,0 +1,265 @@
+"""
+Theo dõi cấp phát bộ nhớ theo stage của pipeline (tracemalloc, opt-in bằng DETECT_ALLOC_TRACE_ENABLED)
+
+- Request có ?trace_alloc=true (hoặc được chọn theo DETECT_ALLOC_TRACE_SAMPLE_RATE) được trace từ lúc đọc upload
+  đến khi build xong response. Mỗi khi một stage kết thúc (detection_metrics.observe_stage: upload_read, preflight,
+  extraction / columnar_scan, detection, audit_log) và sau khi build response, snapshot được so với snapshot trước
+- Mỗi stage có: bộ nhớ tăng thêm lúc peak so với đầu stage, bộ nhớ còn giữ lại cuối stage
+  và top allocation site (file:line) theo số byte tăng thêm
+- Kết quả của request nằm trong block allocations của response và được cộng dồn vào alloc_tracer
+  (GET /allocations/profile)
+- tracemalloc là global trong process: mỗi lúc chỉ trace một request, cấp phát của request khác chạy song song
+  trong thời gian đó cũng được tính; tracemalloc chỉ chạy trong thời gian trace
+"""
+
+import os
+import random
+import sys
+import threading
+import tracemalloc
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from ..config.settings import detection_settings
+
+STAGE_RESPONSE = "response"
+
+# Một frame mỗi allocation: site là dòng code trực tiếp cấp phát (đủ để phân biệt pdfminer / text join / match dict)
+TRACE_FRAMES = 1
+
+# Cấp phát của chính tracemalloc / module này và của import module (lazy import ở request đầu) không được tính
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>")
+)
+
+# Rút gọn path của site: bỏ prefix site-packages / stdlib / thư mục project
+_PATH_PREFIXES = sorted(
+    {os.path.join(path, "") for path in sys.path if path and os.path.isdir(path)}
+    | {os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "")},
+    key=len,
+    reverse=True
+)
+
+def _site_name(frame: tracemalloc.Frame) -> str:
+    filename = frame.filename
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    return f"{filename}:{frame.lineno}"
+
+def _kb(size: float) -> float:
+    return round(size / 1024, 1)
+
+class StageAllocations:
+    """Cấp phát của một stage trong một request"""
+    __slots__ = ("stage", "peak", "net", "sites")
+
+    def __init__(self, stage: str, peak: int, net: int, sites: List[Tuple[str, int, int]]):
+        self.stage = stage
+        self.peak = peak
+        self.net = net
+        # (site, byte tăng thêm, số block tăng thêm), giảm dần theo byte
+        self.sites = sites
+
+    def to_dict(self, top: int) -> Dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "peak_kb": _kb(self.peak),
+            "net_kb": _kb(self.net),
+            "top_sites": [
+                {"site": site, "size_kb": _kb(size), "count": count}
+                for site, size, count in self.sites[:top]
+            ]
+        }
+
+class AllocationTrace:
+    """Trace của một request: snapshot ở đầu và ở cuối mỗi stage"""
+
+    def __init__(self):
+        self.stages: List[StageAllocations] = []
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._current = 0
+
+    def begin(self):
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+        self._reset_peak()
+
+    def _reset_peak(self):
+        tracemalloc.reset_peak()
+        self._current = tracemalloc.get_traced_memory()[0]
+
+    def mark(self, stage: str):
+        """Kết thúc stage: peak/net so với đầu stage và site có số byte tăng thêm lớn nhất"""
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+        sites = [
+            (_site_name(stat.traceback[0]), stat.size_diff, stat.count_diff)
+            for stat in snapshot.compare_to(self._snapshot, "lineno")
+            if stat.size_diff > 0
+        ]
+        sites.sort(key=lambda site: -site[1])
+        self.stages.append(StageAllocations(stage, peak - self._current, current - self._current, sites))
+        self._snapshot = snapshot
+        self._reset_peak()
+
+    def to_dict(self, top: int) -> Dict[str, Any]:
+        return {
+            "traced": True,
+            "peak_kb": _kb(max((stage.peak for stage in self.stages), default=0)),
+            "stages": [stage.to_dict(top) for stage in self.stages]
+        }
+
+_current_trace: ContextVar[Optional[AllocationTrace]] = ContextVar("docai_allocation_trace", default=None)
+
+def mark_stage(stage: str):
+    """Gọi khi một stage kết thúc (từ detection_metrics.observe_stage), không làm gì khi request không được trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.mark(stage)
+
+class _StageTotals:
+    """Cộng dồn của một stage qua các request"""
+    __slots__ = ("requests", "peak_max", "peak_sum", "net_sum", "sites")
+
+    def __init__(self):
+        self.requests = 0
+        self.peak_max = 0
+        self.peak_sum = 0
+        self.net_sum = 0
+        # site -> [byte tăng thêm, số block tăng thêm]
+        self.sites: Dict[str, List[int]] = {}
+
+    def add(self, stage: StageAllocations):
+        self.requests += 1
+        self.peak_max = max(self.peak_max, stage.peak)
+        self.peak_sum += stage.peak
+        self.net_sum += stage.net
+        for site, size, count in stage.sites:
+            totals = self.sites.get(site)
+            if totals is None:
+                self.sites[site] = [size, count]
+            else:
+                totals[0] += size
+                totals[1] += count
+
+    def to_dict(self, stage: str, top: int) -> Dict[str, Any]:
+        sites = sorted(self.sites.items(), key=lambda item: -item[1][0])[:top]
+        return {
+            "stage": stage,
+            "requests": self.requests,
+            "peak_kb_max": _kb(self.peak_max),
+            "peak_kb_mean": _kb(self.peak_sum / self.requests),
+            "net_kb_mean": _kb(self.net_sum / self.requests),
+            "top_sites": [
+                {"site": site, "size_kb_mean": _kb(size / self.requests), "count": count}
+                for site, (size, count) in sites
+            ]
+        }
+
+class _TraceScope:
+    """with alloc_tracer.trace(requested) as allocations: ... (allocations.finish() sau khi build response)"""
+    __slots__ = ("tracer", "requested", "trace", "skipped", "started_tracing", "token")
+
+    def __init__(self, tracer: "AllocationTracer", requested: bool):
+        self.tracer = tracer
+        self.requested = requested
+        self.trace = None
+        self.skipped = False
+        self.started_tracing = False
+        self.token = None
+
+    def __enter__(self):
+        if not self.tracer.should_trace(self.requested):
+            return self
+        if not self.tracer._acquire():
+            self.skipped = True
+            return self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self.started_tracing = True
+        self.trace = AllocationTrace()
+        self.trace.begin()
+        self.token = _current_trace.set(self.trace)
+        return self
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """Kết thúc stage response, trả về block allocations của request (None khi không trace)"""
+        if self.trace is None:
+            return {"traced": False, "reason": "another request is being traced"} if self.skipped else None
+        self.trace.mark(STAGE_RESPONSE)
+        return self.trace.to_dict(detection_settings.alloc_trace_top)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.trace is None:
+            return False
+        _current_trace.reset(self.token)
+        if self.started_tracing:
+            tracemalloc.stop()
+        self.tracer._release(self.trace if exc_type is None else None)
+        return False
+
+class AllocationTracer:
+    """Chọn request được trace và cộng dồn kết quả theo stage trong process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._busy = False
+        self._requests = 0
+        self._stages: Dict[str, _StageTotals] = {}
+
+    def check_request(self, requested: bool):
+        """?trace_alloc=true chỉ được dùng khi DETECT_ALLOC_TRACE_ENABLED bật"""
+        if requested and not detection_settings.alloc_trace_enabled:
+            raise HTTPException(status_code=400, detail="Allocation tracing is disabled (DETECT_ALLOC_TRACE_ENABLED)")
+
+    def should_trace(self, requested: bool) -> bool:
+        if not detection_settings.alloc_trace_enabled:
+            return False
+        if requested:
+            return True
+        rate = detection_settings.alloc_trace_sample_rate
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def trace(self, requested: bool = False) -> _TraceScope:
+        return _TraceScope(self, requested)
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._busy:
+                return False
+            self._busy = True
+            return True
+
+    def _release(self, trace: Optional[AllocationTrace]):
+        with self._lock:
+            self._busy = False
+            if trace is None:
+                return
+            self._requests += 1
+            for stage in trace.stages:
+                totals = self._stages.get(stage.stage)
+                if totals is None:
+                    totals = self._stages[stage.stage] = _StageTotals()
+                totals.add(stage)
+
+    def describe(self, top: int = 10) -> Dict[str, Any]:
+        """Số liệu cộng dồn của worker này, "pid" cho biết worker nào trả lời (mỗi worker gunicorn có số liệu riêng)"""
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "requests": self._requests,
+                "stages": [totals.to_dict(stage, top) for stage, totals in self._stages.items()]
+            }
+
+    def reset(self):
+        with self._lock:
+            self._requests = 0
+            self._stages = {}
+
+# Trace cộng dồn trong process
+alloc_tracer = AllocationTracer()
@@ -0,0 +1,235 @@
+"""
+Audit log của kết quả detection
+
+- Request chỉ tạo một AuditEvent (giữ reference tới dữ liệu, không format) và đẩy vào queue;
+  QueueListener chạy ở background thread mới build record JSON và ghi ra stdout
+- Sampling theo document (DETECT_AUDIT_LOG_SAMPLE_RATE), mức chi tiết theo DETECT_AUDIT_LOG_LEVEL:
+  off | summary (số match theo category/subtype) | matches (thêm từng match) | verbose (thêm dòng/cột và đoạn text)
+- Value của match được mask (DETECT_AUDIT_LOG_MASK_VALUES), dòng/cột chỉ tính ở mức verbose
+"""
+
+import atexit
+import bisect
+import logging
+import queue
+import random
+import sys
+import threading
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+from ..config.settings import detection_settings
+from .response_encoder import dumps_json
+
+AUDIT_LOGGER_NAME = "docai.audit"
+
+AUDIT_LEVEL_OFF = "off"
+AUDIT_LEVEL_SUMMARY = "summary"
+AUDIT_LEVEL_MATCHES = "matches"
+AUDIT_LEVEL_VERBOSE = "verbose"
+AUDIT_LEVELS = (AUDIT_LEVEL_OFF, AUDIT_LEVEL_SUMMARY, AUDIT_LEVEL_MATCHES, AUDIT_LEVEL_VERBOSE)
+
+# Số ký tự của dòng chứa match được ghi ở mức verbose (quanh vị trí match)
+LINE_EXCERPT_CHARS = 120
+
+def mask_value(value: str) -> str:
+    """
+    Che ký tự chữ/số của value, chỉ giữ vài ký tự cuối và dấu phân cách (email giữ domain)
+    0912 345 678 -> **** *** 678
+    """
+    value = value or ""
+    if "@" in value:
+        local, _, domain = value.partition("@")
+        return "*" * len(local) + "@" + domain
+    alnum_positions = [index for index, char in enumerate(value) if char.isalnum()]
+    hidden = alnum_positions[:len(alnum_positions) - min(4, len(alnum_positions) // 3)]
+    chars = list(value)
+    for index in hidden:
+        chars[index] = "*"
+    return "".join(chars)
+
+class LineIndex:
+    """Tra dòng/cột của offset trong text bằng bisect trên vị trí các ký tự xuống dòng (tính một lần)"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.line_starts = [0]
+        position = text.find("\n")
+        while position != -1:
+            self.line_starts.append(position + 1)
+            position = text.find("\n", position + 1)
+
+    def locate(self, position: int):
+        """(line_number, column_number, line_content), đánh số từ 1"""
+        line = bisect.bisect_right(self.line_starts, position) - 1
+        line_start = self.line_starts[line]
+        line_end = self.line_starts[line + 1] - 1 if line + 1 < len(self.line_starts) else len(self.text)
+        return line + 1, position - line_start + 1, self.text[line_start:line_end]
+
+class AuditEvent:
+    """Kết quả detection của một document, record JSON chỉ được build ở background thread"""
+
+    def __init__(self, level: str, mask: bool, document: Dict[str, Any], matches: List[Dict[str, Any]], content_text: Optional[str]):
+        self.level = level
+        self.mask = mask
+        self.document = document
+        self.matches = matches
+        self.content_text = content_text
+
+    def to_record(self) -> Dict[str, Any]:
+        record = {
+            "event": "detection",
+            **self.document,
+            "total_matches": len(self.matches),
+            "categories": dict(Counter(match["category"] for match in self.matches)),
+            "subtypes": dict(Counter(match["subtype"] for match in self.matches))
+        }
+        if self.level in (AUDIT_LEVEL_MATCHES, AUDIT_LEVEL_VERBOSE):
+            line_index = None
+            if self.content_text is not None:
+                line_index = LineIndex(self._masked_text() if self.mask else self.content_text)
+            record["matches"] = [self._match_record(match, line_index) for match in self.matches]
+        return record
+
+    def _masked_text(self) -> str:
+        """
+        Text với value của mọi match đã được mask (phần sau keyword trong span, text gốc có thể khác value
+        đã chuẩn hóa), để line_content của một match không lộ value của match khác trên cùng dòng
+        mask_value giữ nguyên độ dài nên offset, dòng và cột không đổi
+        """
+        merged: List[List[int]] = []
+        for start, end in sorted((match["start"] + len(match.get("keyword_found") or ""), match["end"]) for match in self.matches):
+            if start >= end:
+                continue
+            if merged and start <= merged[-1][1]:
+                # Span chồng nhau được mask như một đoạn
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        pieces, position = [], 0
+        for start, end in merged:
+            pieces.append(self.content_text[position:start])
+            pieces.append(mask_value(self.content_text[start:end]))
+            position = end
+        pieces.append(self.content_text[position:])
+        return "".join(pieces)
+
+    def _match_record(self, match: Dict[str, Any], line_index: Optional[LineIndex]) -> Dict[str, Any]:
+        value = match["value"]
+        item = {
+            "category": match["category"],
+            "subtype": match["subtype"],
+            "value": mask_value(value) if self.mask else value,
+            "start": match["start"],
+            "end": match["end"],
+            "method": match["method"],
+            "keyword_found": match.get("keyword_found")
+        }
+        for field in ("sheet", "row", "column"):
+            if field in match:
+                item[field] = match[field]
+        if line_index is not None:
+            line_number, column_number, line_content = line_index.locate(match["start"])
+            excerpt_start = max(column_number - 1 - LINE_EXCERPT_CHARS // 2, 0)
+            excerpt = line_content[excerpt_start:excerpt_start + LINE_EXCERPT_CHARS].strip()
+            item.update({"line": line_number, "column_number": column_number, "line_content": excerpt})
+        return item
+
+class AuditJsonFormatter(logging.Formatter):
+    """Mỗi record một dòng JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = record.msg.to_record() if isinstance(record.msg, AuditEvent) else {"message": record.getMessage()}
+        data = {"timestamp": round(record.created, 3), "logger": record.name, **data}
+        return dumps_json(data).decode("utf-8")
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    Đưa record vào queue nguyên trạng (format ở listener thread, không phải trên request path)
+    Queue đầy thì bỏ record và đếm số record bị bỏ thay vì chặn request
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class AuditLogger:
+    """Logger audit dùng chung trong process, listener thread khởi động ở lần log đầu tiên (hoặc start())"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(AUDIT_LOGGER_NAME)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self._handler: Optional[_DroppingQueueHandler] = None
+        self._listener: Optional[QueueListener] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            log_queue = queue.Queue(maxsize=max(detection_settings.audit_log_queue_size, 1))
+            output = logging.StreamHandler(sys.stdout)
+            output.setFormatter(AuditJsonFormatter())
+            self._handler = _DroppingQueueHandler(log_queue)
+            self._listener = QueueListener(log_queue, output)
+            self.logger.addHandler(self._handler)
+            self._listener.start()
+
+    def stop(self):
+        """Ghi nốt các record còn trong queue rồi dừng listener thread"""
+        with self._lock:
+            if self._listener is None:
+                return
+            self._listener.stop()
+            self.logger.removeHandler(self._handler)
+            self._listener = None
+
+    @property
+    def dropped(self) -> int:
+        return self._handler.dropped if self._handler is not None else 0
+
+    def should_log(self) -> bool:
+        """Document có được ghi audit không (theo level và sample rate)"""
+        if detection_settings.audit_log_level not in AUDIT_LEVELS[1:]:
+            return False
+        sample_rate = detection_settings.audit_log_sample_rate
+        return sample_rate >= 1 or random.random() < sample_rate
+
+    def log_detection(self, filename: str, mime_type: str, file_size: int, content_length: int, matches: List[Dict[str, Any]], content_text: str = None, **fields: Any):
+        """
+        Ghi audit record của một document (không block request)
+        content_text chỉ được giữ lại ở mức verbose để tính dòng/cột ở background thread
+        """
+        if not self.should_log():
+            return
+        if self._listener is None:
+            self.start()
+        level = detection_settings.audit_log_level
+        event = AuditEvent(
+            level,
+            detection_settings.audit_log_mask_values,
+            {
+                "filename": filename,
+                "mime_type": mime_type,
+                "file_size": file_size,
+                "content_length": content_length,
+                **fields
+            },
+            matches,
+            content_text if level == AUDIT_LEVEL_VERBOSE else None
+        )
+        self.logger.info(event)
+
+# Logger dùng chung, record còn trong queue được ghi khi process thoát
+audit_logger = AuditLogger()
+atexit.register(audit_logger.stop)
@@ -10,7 +10,8 @@ from datetime import datetime
 import json
 import time
 
-from ..config.database import get_db, DatabaseSession
+from ..config.database import get_db, DatabaseSession, db_settings
+from .metrics import detection_metrics, STAGE_DB_PERSIST
 from ..models.sensitive_data import (
     User, Document, DocumentRisk, DocumentStatus, RiskType,
     DocumentProcessor, get_risk_level
@@ -20,7 +21,8 @@ class DatabaseService:
     """Service class để quản lý database operations với schema mới"""
     
     def __init__(self):
-        pass
+        # User id đã biết là tồn tại (sau một lần lưu thành công), bỏ qua query kiểm tra user
+        self._known_user_ids = set()
     
     def save_document_analysis(
         self,
@@ -34,6 +36,9 @@ class DatabaseService:
     ) -> Dict[str, Any]:
         """
         Lưu kết quả phân tích document vào database với schema mới
+
+        Với db_settings.bulk_insert (mặc định), toàn bộ DocumentRisk được ghi bằng một bulk INSERT
+        (multi-row VALUES theo lô trên PostgreSQL) thay vì db.add() từng object
         
         Args:
             filename: Tên file
@@ -51,17 +56,18 @@ class DatabaseService:
         
         try:
             with DatabaseSession() as db:
-                # 1. Đảm bảo user tồn tại (tạo default user nếu cần)
-                user = db.query(User).filter(User.id == owner_user_id).first()
-                if not user:
-                    user = User(
-                        id=owner_user_id,
-                        username=uploaded_by or "default_user",
-                        email=f"{uploaded_by or 'default'}@example.com",
-                        full_name=uploaded_by or "Default User"
-                    )
-                    db.add(user)
-                    db.flush()
+                # 1. Đảm bảo user tồn tại (tạo default user nếu cần), chỉ query khi user chưa có trong cache
+                if owner_user_id not in self._known_user_ids:
+                    user = db.query(User).filter(User.id == owner_user_id).first()
+                    if not user:
+                        user = User(
+                            id=owner_user_id,
+                            username=uploaded_by or "default_user",
+                            email=f"{uploaded_by or 'default'}@example.com",
+                            full_name=uploaded_by or "Default User"
+                        )
+                        db.add(user)
+                        db.flush()
                 
                 # 2. Tính toán risk score
                 regex_results = detection_result.get("regex_detection", [])
@@ -87,22 +93,20 @@ class DatabaseService:
                 
                 db.add(document)
                 db.flush()  # Để lấy document.id
+                # Giữ id trước commit: commit expire object, đọc lại document.id sẽ tốn thêm một SELECT
+                document_id = document.id
                 
-                # 5. Tạo DocumentRisk records cho từng sensitive item
+                # 5. Tạo DocumentRisk rows cho từng sensitive item
                 document_risks = []
                 
                 # Từ regex detection
                 for item in regex_results:
-                    risk_type = DocumentProcessor.map_detection_to_risk_type(item["type"])
-                    
-                    document_risk = DocumentRisk(
-                        document_id=document.id,
-                        risk_type=risk_type,
-                        risk_key=item["type"],
-                        content=item["value"]
-                    )
-                    document_risks.append(document_risk)
-                    db.add(document_risk)
+                    document_risks.append({
+                        "document_id": document_id,
+                        "risk_type": DocumentProcessor.map_detection_to_risk_type(item["type"]),
+                        "risk_key": item["type"],
+                        "content": item["value"]
+                    })
                 
                 # Từ AI classification
                 ai_result = detection_result.get("ai_classification", {})
@@ -110,22 +114,29 @@ class DatabaseService:
                 
                 for detail in ai_details:
                     # Tạo risk record cho mỗi AI detection
-                    document_risk = DocumentRisk(
-                        document_id=document.id,
-                        risk_type=RiskType.CONFIDENTIAL_DATA.value,  # Default cho AI detection
-                        risk_key=detail["type"],
-                        content=", ".join(detail["matches"])
-                    )
-                    document_risks.append(document_risk)
-                    db.add(document_risk)
+                    document_risks.append({
+                        "document_id": document_id,
+                        "risk_type": RiskType.CONFIDENTIAL_DATA.value,  # Default cho AI detection
+                        "risk_key": detail["type"],
+                        "content": ", ".join(detail["matches"])
+                    })
+                
+                if db_settings.bulk_insert:
+                    # Một Core executemany cho mọi risk row (không tạo ORM object, không lấy lại id)
+                    if document_risks:
+                        db.execute(DocumentRisk.__table__.insert(), document_risks)
+                else:
+                    for document_risk in document_risks:
+                        db.add(DocumentRisk(**document_risk))
                 
                 db.commit()
+                self._known_user_ids.add(owner_user_id)
                 
                 processing_time = int((time.time() - start_time) * 1000)
                 
                 return {
                     "success": True,
-                    "document_id": document.id,
+                    "document_id": document_id,
                     "filename": filename,
                     "risk_score": float(risk_score),
                     "risk_level": get_risk_level(risk_score),
@@ -137,6 +148,8 @@ class DatabaseService:
                 }
                 
         except SQLAlchemyError as e:
+            # User có thể đã bị xóa (foreign key lỗi): lần sau kiểm tra lại
+            self._known_user_ids.discard(owner_user_id)
             return {
                 "success": False,
                 "error": f"Database error: {str(e)}"
@@ -146,6 +159,8 @@ class DatabaseService:
                 "success": False,
                 "error": f"Unexpected error: {str(e)}"
             }
+        finally:
+            detection_metrics.observe_stage(STAGE_DB_PERSIST, mime_type, time.time() - start_time)
     
     def get_document_analysis(self, document_id: int) -> Optional[Dict[str, Any]]:
         """Lấy kết quả phân tích của document"""
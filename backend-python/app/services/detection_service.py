@@ -3,10 +3,18 @@ Service cho phát hiện thông tin nhạy cảm
 """
 
 import re
-from typing import List, Dict, Any
-import pdfplumber
-from docx import Document
+import time
+from collections import Counter, deque
+from typing import List, Dict, Any, Iterator, Tuple
 from fastapi import HTTPException
+from .audit_log import audit_logger
+from .data_classifier import classifier
+from .extractor_registry import extractor_registry, FORMAT_NAMES
+from .metrics import detection_metrics, STAGE_EXTRACTION, STAGE_DETECTION, STAGE_COLUMNAR_SCAN, STAGE_CLASSIFICATION, STAGE_AUDIT_LOG, MIME_TEXT
+from .page_selection import PageSelection
+from .rule_profile import RuleProfile, KeywordStats, rule_profiler
+from .preflight import PREFLIGHT_NO_TEXT_LAYER, MIME_PDF, MIME_DOCX
+from .spreadsheet_scanner import SpreadsheetScanner, SPREADSHEET_MIME_TYPES, METHOD_COLUMNAR
 
 class SensitiveCategory:
     NO_CATEGORY = "Không phân loại"
@@ -176,68 +184,113 @@ SUBTYPE_DETECT_RULES = [
      },
 ]
 
+# Bộ đếm dùng khi không profile (số liệu bị bỏ qua)
+NO_KEYWORD_STATS = KeywordStats()
+
+# Pattern lấy value sau keyword (tối đa 100 ký tự) và từ đầu tiên cho fallback
+VALUE_PATTERN = re.compile(r"[\w\d\s\-\.]{1,100}")
+FIRST_WORD_PATTERN = re.compile(r"\s*(\S+)")
+
+# Stream theo page: phần cuối page được scan lại cùng page sau, dài bằng keyword dài nhất cộng số ký tự
+# này (dấu phân cách + value tối đa 100 ký tự). Value dài hơn (fallback từ đầu tiên) có thể bị cắt
+VALUE_LOOKAHEAD_CHARS = 128
+
 class DetectionService:
     """Service cho phát hiện thông tin nhạy cảm"""
     
     def __init__(self):
         self.rules = SUBTYPE_DETECT_RULES
+        self.classifier = classifier
+        # Compile regex một lần thay vì mỗi lần match
+        self._compiled_regex = {
+            rule["subtype"]: re.compile(rule["regex"])
+            for rule in self.rules if rule["regex"] and rule["regex"].strip()
+        }
+        self.page_carry_chars = max(len(keyword) for rule in self.rules for keyword in rule["keywords"]) + VALUE_LOOKAHEAD_CHARS
+        self.spreadsheet_scanner = SpreadsheetScanner(self.rules, self._compiled_regex, self.iter_rule_matches)
     
     def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file using pdfplumber"""
-        text = ""
-        try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-            return text
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error extracting text from PDF: {str(e)}")
+        """Extract text from PDF file (backend PDF mặc định của deployment)"""
+        return "".join(text for _, text in self.iter_pdf_pages(file_path))
+    
+    def iter_pdf_pages(self, file_path: str, selection: PageSelection = None, pdf_mode: str = None, report: Dict[str, Any] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Extract text từng page của PDF, yield (page_number, text)
+        Nếu có selection thì chỉ extract các page được chọn
+        pdf_mode: "full" (pdfplumber) hoặc "fast" (pdfminer, fallback pdfplumber cho page lỗi)
+        report: nếu có, ghi lại method đã dùng cho từng page
+        """
+        yield from self.iter_pages(file_path, MIME_PDF, selection, pdf_mode, report)
 
     def extract_text_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file using python-docx"""
-        try:
-            doc = Document(file_path)
-            return "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error extracting text from DOCX: {str(e)}")
+        """
+        Extract text from DOCX file (mặc định stream XML trực tiếp từ zip,
+        bao gồm table, header, footer và text box)
+        """
+        return "".join(text for _, text in self.iter_pages(file_path, MIME_DOCX))
     
-    def detect_sensitive_by_rules(self, text: str) -> List[Dict[str, Any]]:
+    def detect_sensitive_by_rules(self, text: str, profile: RuleProfile = None) -> List[Dict[str, Any]]:
         """
         Detect sensitive information using SUBTYPE_DETECT_RULES
         Ưu tiên keyword, lấy giá trị ngay sau keyword làm value
+        profile: nếu có, ghi số liệu theo rule/keyword (explain mode)
+        """
+        return list(self.iter_rule_matches(text, profile=profile))
+    
+    def iter_rule_matches(self, text: str, rules: List[Dict[str, Any]] = None, confirmed_only: bool = False, profile: RuleProfile = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield từng match theo thứ tự rule -> keyword -> vị trí (giống detect_sensitive_by_rules)
+        Caller có thể dừng sớm mà không phải scan hết các rule còn lại
+        
+        Args:
+            rules: Tập rule cần scan (mặc định toàn bộ SUBTYPE_DETECT_RULES)
+            confirmed_only: Bỏ qua match chỉ có keyword mà không lấy được value
+            profile: Ghi hits/extractions/regex/match và thời gian của từng keyword
+                (thời gian gồm cả lúc caller xử lý match được yield, caller nên gom match vào list)
         """
-        matches = []
         text_lower = text.lower()
+        profiling = profile is not None
+        # Không profile: đếm vào object bỏ đi, chỉ phần đo thời gian cần kiểm tra profiling
+        stats = NO_KEYWORD_STATS
+        if profiling:
+            profile.add_scan(text)
         
-        for rule in self.rules:
+        for rule in (self.rules if rules is None else rules):
             subtype = rule["subtype"]
             category = rule["category"]
             keywords = rule["keywords"]
-            regex_pattern = rule["regex"]
+            regex_pattern = self._compiled_regex.get(subtype)
             
             # Detect by keywords - ưu tiên và lấy value sau keyword
-            keyword_matches = []
             for keyword in keywords:
+                if profiling:
+                    stats = profile.keyword(subtype, keyword)
+                    started = time.perf_counter()
                 keyword_lower = keyword.lower()
                 start_pos = 0
                 while True:
                     pos = text_lower.find(keyword_lower, start_pos)
                     if pos == -1:
                         break
+                    stats.hits += 1
                     
                     # Tìm giá trị ngay sau keyword
                     keyword_end = pos + len(keyword)
                     value_after_keyword = self._extract_value_after_keyword(text, keyword_end, subtype)
                     
                     if value_after_keyword:
+                        stats.extractions += 1
                         # Kiểm tra xem rule có regex không
-                        if regex_pattern and regex_pattern.strip():
+                        if regex_pattern is not None:
                             # Có regex: value phải match regex mới được chấp nhận
+                            stats.regex_attempts += 1
                             refined_value = self._apply_regex_to_value(value_after_keyword["value"], regex_pattern)
                             
                             if refined_value:
                                 # Chỉ thêm khi regex match thành công
-                                keyword_matches.append({
+                                stats.regex_successes += 1
+                                stats.matches += 1
+                                yield {
                                     "category": category,
                                     "subtype": subtype,
                                     "value": refined_value,
@@ -245,11 +298,12 @@ class DetectionService:
                                     "end": value_after_keyword["end"],
                                     "method": "keyword+regex",
                                     "keyword_found": keyword
-                                })
+                                }
                             # Nếu regex không match thì bỏ qua, không thêm vào kết quả
                         else:
                             # Không có regex: lấy value mặc định sau keyword
-                            keyword_matches.append({
+                            stats.matches += 1
+                            yield {
                                 "category": category,
                                 "subtype": subtype,
                                 "value": value_after_keyword["value"],
@@ -257,10 +311,11 @@ class DetectionService:
                                 "end": value_after_keyword["end"],
                                 "method": "keyword",
                                 "keyword_found": keyword
-                            })
-                    else:
+                            }
+                    elif not confirmed_only:
                         # Nếu không tìm thấy value sau keyword, lấy keyword làm value
-                        keyword_matches.append({
+                        stats.matches += 1
+                        yield {
                             "category": category,
                             "subtype": subtype,
                             "value": text[pos:pos+len(keyword)],
@@ -268,14 +323,11 @@ class DetectionService:
                             "end": pos + len(keyword),
                             "method": "keyword",
                             "keyword_found": keyword
-                        })
+                        }
                     
                     start_pos = pos + 1
-            
-            # Chỉ thêm keyword matches - bắt buộc phải match keyword trước
-            matches.extend(keyword_matches)
-        
-        return matches
+                if profiling:
+                    stats.seconds += time.perf_counter() - started
     
     def _extract_value_after_keyword(self, text: str, keyword_end: int, subtype: str) -> Dict[str, Any]:
         """
@@ -294,12 +346,8 @@ class DetectionService:
         
         # Lấy đoạn text dài hơn để có thể chứa số có dấu cách
         # Lấy tối đa 100 ký tự sau keyword để đảm bảo có đủ dữ liệu
-        max_length = min(100, len(text) - start_pos)
-        pattern = r"[\w\d\s\-\.]{1," + str(max_length) + "}"
-        
-        # Tìm value từ vị trí start_pos
-        remaining_text = text[start_pos:]
-        match = re.match(pattern, remaining_text)
+        # Match trực tiếp tại start_pos, không copy phần text còn lại
+        match = VALUE_PATTERN.match(text, start_pos)
         
         if match:
             value = match.group().strip()
@@ -314,9 +362,9 @@ class DetectionService:
                 }
         
         # Fallback: lấy từ tiếp theo
-        words = remaining_text.split()
-        if words:
-            first_word = words[0]
+        word_match = FIRST_WORD_PATTERN.match(text, start_pos)
+        if word_match:
+            first_word = word_match.group(1)
             # Loại bỏ dấu câu ở cuối
             first_word = re.sub(r'[^\w\d\-\.]', '', first_word)
             if first_word:
@@ -328,7 +376,7 @@ class DetectionService:
         
         return None
     
-    def _apply_regex_to_value(self, value: str, regex_pattern: str) -> str:
+    def _apply_regex_to_value(self, value: str, regex_pattern) -> str:
         """
         Áp dụng regex lên value để làm sạch và chuẩn hóa
         """
@@ -346,104 +394,421 @@ class DetectionService:
     
     def process_file(self, file_path: str, mime_type: str) -> str:
         """Process file và extract text dựa trên mime type"""
-        if mime_type == "application/pdf":
-            return self.extract_text_from_pdf(file_path)
-        elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            return self.extract_text_from_docx(file_path)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file type")
+        return "".join(text for _, text in self.iter_pages(file_path, mime_type))
     
-    def analyze_document(self, file_path: str, filename: str, mime_type: str, file_size: int) -> Dict[str, Any]:
-        """Phân tích document hoàn chỉnh"""
-        
-        # Extract text
-        content_text = self.process_file(file_path, mime_type)
+    def iter_pages(self, file_path: str, mime_type: str, selection: PageSelection = None, pdf_mode: str = None, report: Dict[str, Any] = None, extractor: str = None) -> Iterator[Tuple[int, str]]:
+        """
+        Extract text theo từng page bằng extractor backend trong registry
+        (DOCX được coi là 1 page và luôn scan toàn bộ, XLSX mỗi sheet 1 page)
+        extractor: tên backend theo request, mặc định theo cấu hình deployment
+        """
+        backend = extractor_registry.resolve(mime_type, extractor, pdf_mode)
+        try:
+            yield from backend.iter_pages(file_path, selection, report)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error extracting text from {FORMAT_NAMES[mime_type].upper()}: {str(e)}"
+            )
+    
+    def _iter_checked_pages(self, file_path: str, mime_type: str, selection: PageSelection = None, pdf_mode: str = None, report: Dict[str, Any] = None, preflight: Dict[str, Any] = None, extractor: str = None) -> Iterator[Tuple[int, str]]:
+        """
+        Như iter_pages, nhưng bỏ qua extract khi pre-flight xác định document không có text layer
+        (coverage vẫn ghi nhận tổng số page, không có page nào được scan)
+        """
+        if preflight is not None and preflight["status"] == PREFLIGHT_NO_TEXT_LAYER:
+            if selection is not None:
+                selection.total_pages = preflight["page_count"]
+            return
+        yield from self.iter_pages(file_path, mime_type, selection, pdf_mode, report, extractor)
+    
+    def _use_columnar_scan(self, mime_type: str, extractor: str = None) -> bool:
+        """XLSX/CSV được scan theo cột, trừ khi request chọn extractor text cụ thể"""
+        return mime_type in SPREADSHEET_MIME_TYPES and extractor is None
+    
+    def iter_spreadsheet_chunks(self, file_path: str, mime_type: str, selection: PageSelection = None, report: Dict[str, Any] = None, rules: List[Dict[str, Any]] = None, confirmed_only: bool = False, profile: RuleProfile = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Scan XLSX/CSV theo cột, yield (page_number, matches) theo từng chunk row"""
+        try:
+            yield from self.spreadsheet_scanner.iter_chunks(file_path, mime_type, selection, report, rules, confirmed_only, profile)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error extracting text from {FORMAT_NAMES[mime_type].upper()}: {str(e)}"
+            )
+    
+    def stream_document(self, file_path: str, filename: str, mime_type: str, file_size: int, page_selection: PageSelection = None, pdf_mode: str = None, preflight: Dict[str, Any] = None, extractor: str = None, explain: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Phân tích document theo từng page và yield record ngay khi có kết quả:
+        header -> match records của từng page -> page progress -> summary
+        Offset của match là offset trong text đã extract (giống analyze_document),
+        với XLSX/CSV là offset trong cell (match có sheet/row/column)
+        explain: summary có block profile theo rule/keyword
+        """
+        selection = page_selection or PageSelection()
+        profile = rule_profiler.new_profile(explain)
+        if self._use_columnar_scan(mime_type, extractor):
+            report = self._new_columnar_report()
+        else:
+            report = self._new_extraction_report(mime_type, pdf_mode, extractor)
+        yield {
+            "type": "header",
+            "filename": filename,
+            "mime_type": mime_type,
+            "file_size": file_size,
+            "preflight": preflight
+        }
         
-        # Detect sensitive information
-        matches = self.detect_sensitive_by_rules(content_text)
+        totals = {"content_length": 0, "total_matches": 0, "categories": set(), "subtypes": Counter(), "matches": []}
+        if self._use_columnar_scan(mime_type, extractor):
+            records = self._spreadsheet_records(file_path, mime_type, selection, report, totals, profile)
+        else:
+            records = self._page_records(file_path, mime_type, selection, pdf_mode, report, preflight, extractor, totals, profile)
+        yield from records
+        detection_metrics.record_results(mime_type, len(report["pages"]), totals["subtypes"])
+        rule_profiler.add(profile)
         
-        # Log results
-        self._log_detection_results(filename, mime_type, content_text, matches, file_size)
+        # Audit log như analyze_document, text không được giữ lại nên record không có dòng/cột
+        with detection_metrics.stage(STAGE_AUDIT_LOG, mime_type):
+            audit_logger.log_detection(
+                filename, mime_type, file_size, totals["content_length"], totals["matches"],
+                extractor=report["extractor"]
+            )
         
-        return {
+        summary = {
+            "type": "summary",
             "success": True,
-            "filename": filename,
-            "mime_type": mime_type,
-            "file_size": file_size,
-            "content_length": len(content_text),
-            "total_matches": len(matches),
-            "matches": matches,
-            "categories_found": list(set([match["category"] for match in matches])),
-            "subtypes_found": list(set([match["subtype"] for match in matches]))
+            "content_length": totals["content_length"],
+            "total_matches": totals["total_matches"],
+            "categories_found": list(totals["categories"]),
+            "subtypes_found": list(totals["subtypes"]),
+            "coverage": selection.coverage(),
+            "extraction": self._finish_extraction_report(report)
         }
+        if explain:
+            summary["profile"] = profile.to_dict()
+        yield summary
     
-    def _log_detection_results(self, filename: str, mime_type: str, content_text: str, matches: List[Dict], file_size: int):
-        """Log kết quả detection"""
+    def _page_records(self, file_path: str, mime_type: str, selection: PageSelection, pdf_mode: str, report: Dict[str, Any], preflight: Dict[str, Any], extractor: str, totals: Dict[str, Any], profile: RuleProfile = None) -> Iterator[Dict[str, Any]]:
+        """
+        Match/page records của document dạng text
+        Phần cuối mỗi page (page_carry_chars ký tự) được giữ lại và scan cùng page sau, để keyword ở cuối
+        page có value ở đầu page sau vẫn được phát hiện như analyze_document. Match bắt đầu trong phần
+        giữ lại chỉ được gửi ở lần scan sau, nên page record được gửi khi mọi match của page đã gửi xong
+        """
+        pages = detection_metrics.timed_iter(
+            self._iter_checked_pages(file_path, mime_type, selection, pdf_mode, report, preflight, extractor),
+            STAGE_EXTRACTION, mime_type
+        )
+        detection_seconds = 0.0
+        carry = ""
+        base = 0
+        deferred = []
+        pending_pages = deque()
         
-        result_data = {
-            "filename": filename,
-            "mime_type": mime_type,
-            "content_text": content_text[:500] + "..." if len(content_text) > 500 else content_text,
-            "matches": matches,
-            "file_size": file_size,
-            "uploaded_by": "api_user"
-        }
+        def emit(matches, base):
+            for match in matches:
+                match["start"] += base
+                match["end"] += base
+                page = next(page for page in pending_pages if match["start"] < page["end"])
+                page["total_matches"] += 1
+                totals["categories"].add(match["category"])
+                totals["subtypes"][match["subtype"]] += 1
+                totals["matches"].append(match)
+                yield {"type": "match", "page": page["page"], **match}
+            totals["total_matches"] += len(matches)
         
-        print("=" * 80)
-        print("🔍 SENSITIVE DATA DETECTION RESULT")
-        print("=" * 80)
-        print(f"📁 Filename: {result_data['filename']}")
-        print(f"📄 MIME Type: {result_data['mime_type']}")
-        print(f"📊 File Size: {result_data['file_size']} bytes")
-        print(f"👤 Uploaded By: {result_data['uploaded_by']}")
-        print(f"📝 Content Length: {len(content_text)} characters")
-        print(f"🎯 Total Matches: {len(matches)}")
-        print()
+        def finished_pages(emitted_upto):
+            while pending_pages and pending_pages[0]["end"] <= emitted_upto:
+                page = pending_pages.popleft()
+                yield {
+                    "type": "page",
+                    "page": page["page"],
+                    "content_length": page["end"] - page["start"],
+                    "total_matches": page["total_matches"],
+                    "method": page["method"]
+                }
         
-        if matches:
-            print("🔎 DETECTED SENSITIVE DATA:")
-            
-            # Tách text thành các dòng để tìm line number
-            lines = content_text.split('\n')
-            
-            for i, match in enumerate(matches, 1):
-                # Tìm line number và column của match
-                line_num, col_num, line_content = self._find_line_and_column(content_text, match['start'])
+        try:
+            for page_number, page_text in pages:
+                base = totals["content_length"] - len(carry)
+                pending_pages.append({
+                    "page": page_number,
+                    "start": totals["content_length"],
+                    "end": totals["content_length"] + len(page_text),
+                    "total_matches": 0,
+                    "method": report["pages"][-1]["method"]
+                })
+                totals["content_length"] += len(page_text)
+                text = carry + page_text
                 
-                print(f"  {i}. Category: {match['category']}")
-                print(f"     SubType: {match['subtype']}")
-                print(f"     Value: {match['value']}")
-                print(f"     Position: {match['start']}-{match['end']} (Line {line_num}, Col {col_num})")
-                print(f"     Method: {match['method']}")
-                if 'keyword_found' in match:
-                    print(f"     Keyword Found: {match['keyword_found']}")
-                print(f"     Line Content: {line_content.strip()}")
-                print()
+                start = time.perf_counter()
+                page_matches = self.detect_sensitive_by_rules(text, profile)
+                detection_seconds += time.perf_counter() - start
+                
+                # Match bắt đầu trong phần cuối sẽ được scan lại cùng page sau (value có thể nằm ở page sau)
+                limit = max(len(text) - self.page_carry_chars, 0)
+                deferred = [match for match in page_matches if match["start"] >= limit]
+                yield from emit([match for match in page_matches if match["start"] < limit], base)
+                yield from finished_pages(base + limit)
+                carry = text[limit:]
+            
+            # Hết document: phần giữ lại không còn page sau
+            yield from emit(deferred, base)
+            yield from finished_pages(totals["content_length"])
+        finally:
+            pages.close()
+            detection_metrics.observe_stage(STAGE_DETECTION, mime_type, detection_seconds)
+    
+    def _spreadsheet_records(self, file_path: str, mime_type: str, selection: PageSelection, report: Dict[str, Any], totals: Dict[str, Any], profile: RuleProfile = None) -> Iterator[Dict[str, Any]]:
+        """Match/page records của XLSX/CSV, page record được gửi khi scan xong mỗi sheet"""
+        page_matches = {}
+        reported = 0
+        
+        def finished_pages():
+            nonlocal reported
+            while reported < len(report["pages"]):
+                page = report["pages"][reported]
+                reported += 1
+                totals["content_length"] += page["content_length"]
+                yield {
+                    "type": "page",
+                    "page": page["page"],
+                    "sheet": page["sheet"],
+                    "content_length": page["content_length"],
+                    "total_matches": page_matches.get(page["page"], 0),
+                    "method": page["method"]
+                }
+        
+        chunks = detection_metrics.timed_iter(
+            self.iter_spreadsheet_chunks(file_path, mime_type, selection, report, profile=profile), STAGE_COLUMNAR_SCAN, mime_type
+        )
+        for page_number, matches in chunks:
+            yield from finished_pages()
+            for match in matches:
+                totals["categories"].add(match["category"])
+                totals["subtypes"][match["subtype"]] += 1
+                totals["matches"].append(match)
+                yield {"type": "match", "page": page_number, **match}
+            page_matches[page_number] = page_matches.get(page_number, 0) + len(matches)
+            totals["total_matches"] += len(matches)
+        yield from finished_pages()
+    
+    def resolve_gate_rules(self, targets: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        Lấy danh sách rule ứng với targets cho gate mode
+        Target có thể là category/subtype (giá trị hoặc tên hằng, vd. IDENTIFIABLE, PHONE)
+        Mặc định: toàn bộ rule thuộc category IDENTIFIABLE
+        """
+        if not targets:
+            targets = [SensitiveCategory.IDENTIFIABLE]
+        
+        resolved = set()
+        for target in targets:
+            target = target.strip()
+            for constants in (SensitiveCategory, SubType):
+                if target.upper() in vars(constants):
+                    target = getattr(constants, target.upper())
+            resolved.add(target)
+        
+        rules = [rule for rule in self.rules if rule["category"] in resolved or rule["subtype"] in resolved]
+        if not rules:
+            raise HTTPException(status_code=400, detail=f"Unknown gate targets: {', '.join(targets)}")
+        return rules
+    
+    def gate_document(self, file_path: str, filename: str, mime_type: str, targets: List[str] = None, preflight: Dict[str, Any] = None, extractor: str = None) -> Dict[str, Any]:
+        """
+        Gate mode: chỉ trả lời document có chứa dữ liệu thuộc targets hay không
+        Dừng ngay ở match xác nhận đầu tiên (có value, qua regex nếu rule có regex),
+        không extract thêm page nào sau page có match; hit.page là page chứa keyword
+        """
+        rules = self.resolve_gate_rules(targets)
+        pages_scanned = 0
+        hit = None
+        
+        if self._use_columnar_scan(mime_type, extractor):
+            # XLSX/CSV: dừng ở chunk row đầu tiên có match, match đã có sheet/row/column
+            chunks = detection_metrics.timed_iter(
+                self.iter_spreadsheet_chunks(file_path, mime_type, rules=rules, confirmed_only=True),
+                STAGE_COLUMNAR_SCAN, mime_type
+            )
+            scanned = set()
+            try:
+                for page_number, matches in chunks:
+                    scanned.add(page_number)
+                    if matches:
+                        match = matches[0]
+                        hit = {
+                            "category": match["category"],
+                            "subtype": match["subtype"],
+                            "keyword_found": match["keyword_found"],
+                            "page": page_number,
+                            "sheet": match["sheet"],
+                            "row": match["row"],
+                            "column": match["column"]
+                        }
+                        break
+            finally:
+                chunks.close()
+            pages_scanned = len(scanned)
         else:
-            print("✅ No sensitive data detected")
+            pages = detection_metrics.timed_iter(
+                self._iter_checked_pages(file_path, mime_type, preflight=preflight, extractor=extractor),
+                STAGE_EXTRACTION, mime_type
+            )
+            # Phần cuối page trước được scan cùng page sau (như _page_records): keyword ở cuối page
+            # có value ở đầu page sau vẫn chặn được. carry_pages: (offset trong carry, page_number)
+            carry, carry_pages = "", []
+            try:
+                for page_number, page_text in pages:
+                    pages_scanned += 1
+                    text = carry + page_text
+                    bounds = carry_pages + [(len(carry), page_number)]
+                    match = next(self.iter_rule_matches(text, rules, confirmed_only=True), None)
+                    if match:
+                        hit = {
+                            "category": match["category"],
+                            "subtype": match["subtype"],
+                            "keyword_found": match["keyword_found"],
+                            "page": next(number for offset, number in reversed(bounds) if offset <= match["start"])
+                        }
+                        break
+                    cut = max(len(text) - self.page_carry_chars, 0)
+                    carry = text[cut:]
+                    carry_pages = [
+                        (max(offset - cut, 0), number)
+                        for index, (offset, number) in enumerate(bounds)
+                        if index + 1 == len(bounds) or bounds[index + 1][0] > cut
+                    ]
+            finally:
+                # Đóng generator để giải phóng file PDF ngay, không đọc các page còn lại
+                pages.close()
+        detection_metrics.record_results(mime_type, pages_scanned, {})
         
-        print("=" * 80)
+        return {
+            "success": True,
+            "mode": "gate",
+            "filename": filename,
+            "blocked": hit is not None,
+            "hit": hit,
+            "pages_scanned": pages_scanned,
+            "preflight": preflight
+        }
+    
+    def _new_extraction_report(self, mime_type: str, pdf_mode: str = None, extractor: str = None) -> Dict[str, Any]:
+        """Report backend được chọn và method extract của từng page"""
+        backend = extractor_registry.resolve(mime_type, extractor, pdf_mode)
+        return {
+            "extractor": backend.name,
+            "pdf_mode": backend.pdf_mode,
+            "pages": []
+        }
     
-    def _find_line_and_column(self, text: str, position: int) -> tuple:
+    def _new_columnar_report(self) -> Dict[str, Any]:
+        """Report của scan XLSX/CSV theo cột (mỗi sheet 1 page)"""
+        return {"extractor": METHOD_COLUMNAR, "pdf_mode": None, "pages": []}
+    
+    def _finish_extraction_report(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        report["fallback_pages"] = sum(1 for page in report["pages"] if "fallback_reason" in page)
+        return report
+    
+    def analyze_document(self, file_path: str, filename: str, mime_type: str, file_size: int, page_selection: PageSelection = None, pdf_mode: str = None, preflight: Dict[str, Any] = None, extractor: str = None, explain: bool = False) -> Dict[str, Any]:
         """
-        Tìm line number và column number của position trong text
-        Returns: (line_number, column_number, line_content)
+        Phân tích document hoàn chỉnh
+        page_selection: chỉ extract/scan các page được chọn (mặc định toàn bộ)
+        pdf_mode: "full" hoặc "fast" (mặc định theo DETECT_PDF_MODE)
+        preflight: kết quả pre-flight, document không có text layer được trả về ngay không cần parse
+        extractor: tên extractor backend (GET /extractors), mặc định theo cấu hình deployment
+        explain: thêm block profile theo rule/keyword (RuleProfile) vào kết quả
         """
-        lines = text.split('\n')
-        current_pos = 0
+        selection = page_selection or PageSelection()
+        profile = rule_profiler.new_profile(explain)
         
-        for line_num, line in enumerate(lines, 1):
-            line_length = len(line) + 1  # +1 cho ký tự newline
+        if self._use_columnar_scan(mime_type, extractor):
+            # XLSX/CSV: scan theo cột, match có sheet/row/column thay cho offset trong text
+            report = self._new_columnar_report()
+            with detection_metrics.stage(STAGE_COLUMNAR_SCAN, mime_type):
+                matches = [
+                    match
+                    for _, chunk in self.iter_spreadsheet_chunks(file_path, mime_type, selection, report, profile=profile)
+                    for match in chunk
+                ]
+            content_length = sum(page["content_length"] for page in report["pages"])
+            content_text = None
+        else:
+            report = self._new_extraction_report(mime_type, pdf_mode, extractor)
             
-            if current_pos + line_length > position:
-                # Position nằm trong dòng này
-                column = position - current_pos + 1
-                return line_num, column, line
+            # Extract text (chỉ các page được chọn)
+            with detection_metrics.stage(STAGE_EXTRACTION, mime_type):
+                content_text = "".join(text for _, text in self._iter_checked_pages(file_path, mime_type, selection, pdf_mode, report, preflight, extractor))
+            content_length = len(content_text)
             
-            current_pos += line_length
+            # Detect sensitive information
+            with detection_metrics.stage(STAGE_DETECTION, mime_type):
+                matches = self.detect_sensitive_by_rules(content_text, profile)
+        
+        rule_profiler.add(profile)
+        detection_metrics.record_results(mime_type, len(report["pages"]), Counter(match["subtype"] for match in matches))
+        
+        # Audit log (ghi ở background thread)
+        with detection_metrics.stage(STAGE_AUDIT_LOG, mime_type):
+            audit_logger.log_detection(
+                filename, mime_type, file_size, content_length, matches,
+                content_text=content_text,
+                extractor=report["extractor"]
+            )
+        
+        result = {
+            "success": True,
+            "filename": filename,
+            "mime_type": mime_type,
+            "file_size": file_size,
+            "content_length": content_length,
+            "total_matches": len(matches),
+            "matches": matches,
+            "categories_found": list(set([match["category"] for match in matches])),
+            "subtypes_found": list(set([match["subtype"] for match in matches])),
+            "coverage": selection.coverage(),
+            "extraction": self._finish_extraction_report(report),
+            "preflight": preflight
+        }
+        if explain:
+            result["profile"] = profile.to_dict()
+        return result
+    
+    def analyze_text(self, text: str, explain: bool = False) -> Dict[str, Any]:
+        """
+        Phân tích text thuần (không qua bước extract file)
+        Dùng cho các caller đã có sẵn nội dung text, không ghi log chi tiết
+        explain: thêm block profile theo rule/keyword vào kết quả
+        """
+        profile = rule_profiler.new_profile(explain)
+        with detection_metrics.stage(STAGE_DETECTION, MIME_TEXT):
+            matches = self.detect_sensitive_by_rules(text, profile)
+        rule_profiler.add(profile)
+        with detection_metrics.stage(STAGE_CLASSIFICATION, MIME_TEXT):
+            classification = self.classifier.classify_sensitive_data(text)
+        detection_metrics.record_results(MIME_TEXT, 0, Counter(match["subtype"] for match in matches))
         
-        # Nếu không tìm thấy (trường hợp edge case)
-        return len(lines), 1, lines[-1] if lines else ""
+        result = {
+            "success": True,
+            "content_length": len(text),
+            "total_matches": len(matches),
+            "matches": matches,
+            "categories_found": list(set([match["category"] for match in matches])),
+            "subtypes_found": list(set([match["subtype"] for match in matches])),
+            "classification": {
+                "categories": list(classification["categories"]),
+                "detected_types": classification["detected_types"],
+                "details": classification["details"]
+            }
+        }
+        if explain:
+            result["profile"] = profile.to_dict()
+        return result
 
 # Khởi tạo service instance
 detection_service = DetectionService()
@@ -1,53 +1,36 @@
-from PyPDF2 import PdfReader
-from openpyxl import load_workbook
-from docx import Document as DocxDocument
-import pandas as pd
-from transformers import pipeline
 import os
+from .extractor_registry import extractor_registry
+from .ner import NerRunner, ner_runner
+from .preflight import sniff_mime_type, MIME_PDF, MIME_DOCX, MIME_XLSX
+
+# Đuôi file -> MIME type khi không sniff được format từ nội dung
+EXTENSION_MIME_TYPES = {'.pdf': MIME_PDF, '.docx': MIME_DOCX, '.xlsx': MIME_XLSX}
 
 class DocumentProcessor:
-    def __init__(self):
-        # Initialize the NER pipeline for sensitive information detection
-        self.ner_pipeline = pipeline("ner", model="dslim/bert-base-NER")
+    def __init__(self, ner: NerRunner = None):
+        # NER dùng chung trong process, model chỉ load ở lần detect đầu tiên
+        self.ner = ner or ner_runner
 
-    def extract_text(self, file_path: str) -> str:
-        """Extract text content from various document formats"""
+    def extract_text(self, file_path: str, extractor: str = None) -> str:
+        """
+        Extract text content from various document formats
+        Dùng chung extractor registry với DetectionService (backend mặc định theo cấu hình deployment)
+        """
         file_ext = os.path.splitext(file_path)[1].lower()
-        
-        if file_ext == '.pdf':
-            return self._extract_from_pdf(file_path)
-        elif file_ext == '.xlsx':
-            return self._extract_from_excel(file_path)
-        elif file_ext == '.docx':
-            return self._extract_from_docx(file_path)
-        else:
+        mime_type = sniff_mime_type(file_path) or EXTENSION_MIME_TYPES.get(file_ext)
+        if mime_type is None:
             raise ValueError(f"Unsupported file format: {file_ext}")
 
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-
-    def _extract_from_excel(self, file_path: str) -> str:
-        """Extract text from Excel file"""
-        df = pd.read_excel(file_path)
-        return df.to_string()
-
-    def _extract_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file"""
-        doc = DocxDocument(file_path)
-        return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+        backend = extractor_registry.resolve(mime_type, extractor)
+        return "\n".join(text for _, text in backend.iter_pages(file_path))
 
     def detect_sensitive_info(self, text: str) -> dict:
         """
         Detect sensitive information in the text using NER and pattern matching
         Returns a dictionary of detected sensitive information
         """
-        # Use NER to detect named entities
-        ner_results = self.ner_pipeline(text)
+        # Use NER to detect named entities (text dài được chạy theo window, offset là offset trong text)
+        ner_results = self.ner(text)
         
         # Group entities by type
         entities = {}
@@ -57,7 +40,9 @@ class DocumentProcessor:
                 entities[entity_type] = []
             entities[entity_type].append({
                 'text': result['word'],
-                'score': result['score']
+                'score': result['score'],
+                'start': result['start'],
+                'end': result['end']
             })
         
         # Add additional sensitive information detection here
@@ -0,0 +1,144 @@
+"""
+Extract text từ DOCX bằng cách đọc trực tiếp XML trong file zip (không dựng object model python-docx)
+
+- Đọc incremental bằng iterparse, giải phóng từng block (paragraph/table) ngay sau khi xử lý
+- Giữ thứ tự đọc: header -> body -> footer
+- Bao gồm table (mỗi row 1 dòng, các cell cách nhau bằng tab) và text box
+"""
+
+import re
+import zipfile
+from typing import Iterator, List
+from xml.etree.ElementTree import iterparse
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_NS = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+P = W_NS + "p"
+T = W_NS + "t"
+TAB = W_NS + "tab"
+BR = W_NS + "br"
+CR = W_NS + "cr"
+TR = W_NS + "tr"
+TC = W_NS + "tc"
+PPR = W_NS + "pPr"
+BODY = W_NS + "body"
+HDR = W_NS + "hdr"
+FTR = W_NS + "ftr"
+TXBX_CONTENT = W_NS + "txbxContent"
+# AlternateContent chứa cùng nội dung ở Choice và Fallback -> bỏ qua Fallback để không lặp text
+MC_FALLBACK = MC_NS + "Fallback"
+
+METHOD_DOCX = "docx-stream"
+
+DOCUMENT_PART = "word/document.xml"
+HEADER_PART = re.compile(r"^word/header(\d*)\.xml$")
+FOOTER_PART = re.compile(r"^word/footer(\d*)\.xml$")
+
+def _sorted_parts(names: List[str], pattern) -> List[str]:
+    """Lấy các part khớp pattern, sắp xếp theo số thứ tự (header1, header2, ...)"""
+    parts = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            parts.append((int(match.group(1) or 0), name))
+    return [name for _, name in sorted(parts)]
+
+def iter_part_lines(stream) -> Iterator[str]:
+    """
+    Parse một XML part (document/header/footer) và yield từng dòng text theo thứ tự đọc
+    - Paragraph -> 1 dòng
+    - Table row -> 1 dòng, các cell nối bằng tab (paragraph trong cell nối bằng dấu cách)
+    - Text box -> các dòng riêng, trước paragraph chứa nó
+    """
+    paragraphs: List[List[str]] = []   # stack fragment của paragraph đang mở (paragraph lồng trong text box)
+    containers: List[List[str]] = [[]]  # stack dòng text: top-level, cell, text box
+    rows: List[List[str]] = []          # stack cell của row đang mở (table lồng nhau)
+    depth = 0
+    skip_depth = 0                      # > 0 khi đang trong mc:Fallback
+    in_ppr = 0
+    block_parent = None
+    block_depth = -1
+
+    for event, elem in iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+
+        if event == "start":
+            depth += 1
+            if skip_depth or tag == MC_FALLBACK:
+                skip_depth += 1
+                continue
+            if tag == P:
+                paragraphs.append([])
+            elif tag == TC or tag == TXBX_CONTENT:
+                containers.append([])
+            elif tag == TR:
+                rows.append([])
+            elif tag == PPR:
+                in_ppr += 1
+            elif tag == BODY or (depth == 1 and tag in (HDR, FTR)):
+                block_parent = elem
+                block_depth = depth
+            continue
+
+        # event == "end"
+        depth -= 1
+        if skip_depth:
+            skip_depth -= 1
+            continue
+
+        if tag == T:
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag == TAB:
+            if paragraphs and not in_ppr:
+                paragraphs[-1].append("\t")
+        elif tag == BR or tag == CR:
+            if paragraphs:
+                paragraphs[-1].append("\n")
+        elif tag == PPR:
+            in_ppr -= 1
+        elif tag == P:
+            containers[-1].append("".join(paragraphs.pop()))
+            elem.clear()
+        elif tag == TC:
+            cell_lines = containers.pop()
+            if rows:
+                rows[-1].append(" ".join(line for line in cell_lines if line))
+        elif tag == TR:
+            cells = rows.pop()
+            # Bỏ qua row rỗng (table mẫu chưa điền)
+            if any(cells):
+                containers[-1].append("\t".join(cells))
+            # Table lớn là 1 block top-level -> giải phóng từng row thay vì chờ hết table
+            elem.clear()
+        elif tag == TXBX_CONTENT:
+            textbox_lines = containers.pop()
+            containers[-1].extend(textbox_lines)
+
+        # Dòng ở top-level (không nằm trong cell/text box) được yield ngay
+        if len(containers) == 1 and containers[0]:
+            yield from containers[0]
+            containers[0] = []
+
+        # Block top-level đã xong: giải phóng element khỏi tree
+        if depth == block_depth and block_parent is not None:
+            block_parent.clear()
+
+    yield from containers[0]
+
+def iter_docx_lines(file_path: str) -> Iterator[str]:
+    """Yield các dòng text của DOCX theo thứ tự: header -> body -> footer"""
+    with zipfile.ZipFile(file_path) as archive:
+        names = archive.namelist()
+        if DOCUMENT_PART not in names:
+            raise ValueError("Not a DOCX file: word/document.xml is missing")
+
+        parts = _sorted_parts(names, HEADER_PART) + [DOCUMENT_PART] + _sorted_parts(names, FOOTER_PART)
+        for part in parts:
+            with archive.open(part) as stream:
+                yield from iter_part_lines(stream)
+
+def extract_docx_text(file_path: str) -> str:
+    """Extract toàn bộ text của DOCX (các dòng nối bằng newline)"""
+    return "\n".join(iter_docx_lines(file_path))
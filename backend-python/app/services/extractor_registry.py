@@ -0,0 +1,308 @@
+"""
+Registry các extractor backend (PDF, DOCX, XLSX, CSV) với interface stream chung
+
+Mỗi backend yield (page_number, text) theo từng page và khai báo capability:
+- streaming: đọc incremental, RAM không tăng theo kích thước document
+- offsets: có ranh giới page, offset của match ánh xạ được về page/sheet
+Không có capability page_parallel: mọi backend extract tuần tự trong thread của request. Không chỗ nào
+(chọn extractor, bench_suite) dùng capability này, và trên các page nhỏ, chia page cho nhiều thread/process
+tốn hơn phần tiết kiệm được (GIL, pickle text giữa các process). Song song hoá nằm ở mức process
+(worker gunicorn, xem gunicorn.conf.py).
+Backend mặc định cho mỗi format cấu hình qua DETECT_EXTRACTOR_PDF / _DOCX / _XLSX / _CSV,
+từng request có thể chọn backend khác bằng tên
+Thư viện của backend (requires) chỉ được import khi backend được dùng lần đầu (hoặc khi warm-up),
+backend thiếu thư viện (vd. PyPDF2, không có trong requirements.txt) được báo available=false
+"""
+
+import warnings
+from abc import ABC, abstractmethod
+from importlib.metadata import PackageNotFoundError, version
+from importlib.util import find_spec
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from fastapi import HTTPException
+from ..config.settings import detection_settings
+from .docx_extractor import iter_docx_lines, METHOD_DOCX
+from .memory import MemoryBudget
+from .page_selection import PageSelection
+from .pdf_extractor import (
+    FastPdfTextExtractor, fallback_reason,
+    PDF_MODE_FULL, PDF_MODE_FAST, METHOD_FAST, METHOD_FULL
+)
+from .preflight import MIME_PDF, MIME_DOCX, MIME_XLSX, MIME_CSV
+from .spreadsheet_scanner import iter_spreadsheet_lines
+
+FORMAT_NAMES = {MIME_PDF: "pdf", MIME_DOCX: "docx", MIME_XLSX: "xlsx", MIME_CSV: "csv"}
+
+def _select_pages(selection: Optional[PageSelection], total_pages: int) -> List[int]:
+    if selection is None:
+        return list(range(1, total_pages + 1))
+    return selection.select(total_pages)
+
+def _report_page(report: Optional[Dict[str, Any]], page_report: Dict[str, Any]):
+    if report is not None:
+        report["pages"].append(page_report)
+
+# Phiên bản pdfminer.six đã kiểm tra với _release_page (benchmarks/bench_pdf_memory.py, tests/test_pdf_memory.py)
+PDFMINER_TESTED_VERSION = "20221105"
+_pdfminer_cache_warned = False
+
+def _pdfminer_version() -> str:
+    try:
+        return version("pdfminer.six")
+    except PackageNotFoundError:
+        return "unknown"
+
+def _release_page(pdf, page):
+    """
+    Giải phóng các object đã cache của một page sau khi extract xong
+    pdfplumber giữ chars/layout/textmap trên Page, pdfminer giữ object đã parse
+    (kể cả content stream đã giải nén) trong document cho đến khi đóng file
+    PDFDocument._cached_objs là attribute private của pdfminer (pin pdfminer.six trong requirements.txt);
+    nếu phiên bản khác không còn attribute này, RAM lại tăng theo số page nên cảnh báo một lần
+    """
+    global _pdfminer_cache_warned
+    page.flush_cache()
+    page.get_textmap.cache_clear()
+    page.__dict__.pop("_layout", None)
+    page.page_obj.contents = []
+    cached_objs = getattr(pdf.doc, "_cached_objs", None)
+    if isinstance(cached_objs, dict):
+        cached_objs.clear()
+    elif not _pdfminer_cache_warned:
+        _pdfminer_cache_warned = True
+        warnings.warn(
+            f"pdfminer.six {_pdfminer_version()} has no PDFDocument._cached_objs dict: parsed PDF objects are not "
+            f"released per page and memory grows with page count (tested with {PDFMINER_TESTED_VERSION})",
+            RuntimeWarning
+        )
+
+class ExtractorBackend(ABC):
+    """Base class cho extractor backend"""
+
+    name = ""
+    mime_types: Tuple[str, ...] = ()
+    streaming = False
+    offsets = False
+    # PDF extraction mode tương ứng (giữ tương thích với tham số pdf_mode)
+    pdf_mode: Optional[str] = None
+    # Module cần có để dùng backend (optional dependency)
+    requires: Tuple[str, ...] = ()
+
+    def is_available(self) -> bool:
+        return all(find_spec(module) is not None for module in self.requires)
+
+    @abstractmethod
+    def iter_pages(self, file_path: str, selection: PageSelection = None, report: Dict[str, Any] = None) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) cho các page được chọn, ghi method của từng page vào report"""
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "formats": [FORMAT_NAMES.get(mime_type, mime_type) for mime_type in self.mime_types],
+            "mime_types": list(self.mime_types),
+            "available": self.is_available(),
+            "capabilities": {
+                "streaming": self.streaming,
+                "offsets": self.offsets
+            }
+        }
+
+class PdfplumberBackend(ExtractorBackend):
+    """PDF qua pdfplumber, giải phóng cache từng page và kiểm tra giới hạn bộ nhớ"""
+
+    name = METHOD_FULL
+    mime_types = (MIME_PDF,)
+    streaming = True
+    offsets = True
+    pdf_mode = PDF_MODE_FULL
+    requires = ("pdfplumber",)
+
+    def iter_pages(self, file_path: str, selection: PageSelection = None, report: Dict[str, Any] = None) -> Iterator[Tuple[int, str]]:
+        import pdfplumber
+
+        budget = MemoryBudget(detection_settings.max_document_memory_mb)
+        with pdfplumber.open(file_path) as pdf:
+            page_numbers = _select_pages(selection, len(pdf.pages))
+            fast_extractor = FastPdfTextExtractor(pdf) if self.pdf_mode == PDF_MODE_FAST else None
+
+            for page_number in page_numbers:
+                page = pdf.pages[page_number - 1]
+                page_report = {"page": page_number, "method": METHOD_FULL}
+
+                if fast_extractor is not None:
+                    text = fast_extractor.extract_page(page)
+                    reason = fallback_reason(text)
+                    if reason is None:
+                        page_report["method"] = METHOD_FAST
+                    else:
+                        page_report["fallback_reason"] = reason
+                        text = page.extract_text() or ""
+                else:
+                    text = page.extract_text() or ""
+
+                _release_page(pdf, page)
+                budget.check(page_number)
+                _report_page(report, page_report)
+                yield page_number, text
+
+class PdfminerFastBackend(PdfplumberBackend):
+    """PDF qua layout analysis rẻ của pdfminer, fallback pdfplumber cho page có kết quả lỗi"""
+
+    name = METHOD_FAST
+    pdf_mode = PDF_MODE_FAST
+
+class PyPDF2Backend(ExtractorBackend):
+    """PDF qua PyPDF2 (không phân tích layout, thứ tự đọc theo content stream)"""
+
+    name = "pypdf2"
+    mime_types = (MIME_PDF,)
+    streaming = True
+    offsets = True
+    requires = ("PyPDF2",)
+
+    def iter_pages(self, file_path: str, selection: PageSelection = None, report: Dict[str, Any] = None) -> Iterator[Tuple[int, str]]:
+        from PyPDF2 import PdfReader
+
+        budget = MemoryBudget(detection_settings.max_document_memory_mb)
+        with open(file_path, "rb") as stream:
+            reader = PdfReader(stream)
+            for page_number in _select_pages(selection, len(reader.pages)):
+                text = reader.pages[page_number - 1].extract_text() or ""
+                budget.check(page_number)
+                _report_page(report, {"page": page_number, "method": self.name})
+                yield page_number, text
+
+class DocxStreamBackend(ExtractorBackend):
+    """DOCX qua stream XML (header, body, table, text box, footer); DOCX được coi là 1 page"""
+
+    name = METHOD_DOCX
+    mime_types = (MIME_DOCX,)
+    streaming = True
+
+    def iter_pages(self, file_path: str, selection: PageSelection = None, report: Dict[str, Any] = None) -> Iterator[Tuple[int, str]]:
+        if selection is not None:
+            selection.select_unpaged()
+        text = "\n".join(iter_docx_lines(file_path))
+        _report_page(report, {"page": 1, "method": self.name})
+        yield 1, text
+
+class PythonDocxBackend(ExtractorBackend):
+    """DOCX qua object model của python-docx (chỉ paragraph của body)"""
+
+    name = "python-docx"
+    mime_types = (MIME_DOCX,)
+    requires = ("docx",)
+
+    def iter_pages(self, file_path: str, selection: PageSelection = None, report: Dict[str, Any] = None) -> Iterator[Tuple[int, str]]:
+        from docx import Document
+
+        if selection is not None:
+            selection.select_unpaged()
+        text = "\n".join(paragraph.text for paragraph in Document(file_path).paragraphs)
+        _report_page(report, {"page": 1, "method": self.name})
+        yield 1, text
+
+class XlsxBackend(ExtractorBackend):
+    """
+    XLSX dạng text qua openpyxl read-only: mỗi sheet là 1 page, mỗi row 1 dòng (các cell cách nhau bằng tab)
+    /detect mặc định scan spreadsheet theo cột (spreadsheet_scanner), backend này dùng khi cần text phẳng
+    """
+
+    name = "xlsx"
+    mime_types = (MIME_XLSX,)
+    streaming = True
+    offsets = True
+    requires = ("openpyxl",)
+
+    def iter_pages(self, file_path: str, selection: PageSelection = None, report: Dict[str, Any] = None) -> Iterator[Tuple[int, str]]:
+        for page_number, sheet_name, lines in iter_spreadsheet_lines(file_path, self.mime_types[0], selection):
+            text = "\n".join(lines)
+            _report_page(report, {"page": page_number, "method": self.name, "sheet": sheet_name})
+            yield page_number, text
+
+class CsvBackend(XlsxBackend):
+    """CSV dạng text (tự nhận dạng dấu phân cách), 1 page"""
+
+    name = "csv"
+    mime_types = (MIME_CSV,)
+    requires = ()
+
+class ExtractorRegistry:
+    """Registry backend theo tên, chọn backend theo MIME type (đã sniff) và cấu hình"""
+
+    def __init__(self):
+        self._backends: Dict[str, ExtractorBackend] = {}
+
+    def register(self, backend: ExtractorBackend):
+        self._backends[backend.name] = backend
+
+    def get(self, name: str) -> ExtractorBackend:
+        backend = self._backends.get(name)
+        if backend is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown extractor: {name} (available: {', '.join(self._backends)})"
+            )
+        return backend
+
+    def backends(self) -> List[ExtractorBackend]:
+        return list(self._backends.values())
+
+    def default_name(self, mime_type: str) -> str:
+        """
+        Backend mặc định của deployment cho MIME type
+        PDF: DETECT_EXTRACTOR_PDF, nếu không cấu hình thì theo DETECT_PDF_MODE
+        """
+        format_name = FORMAT_NAMES.get(mime_type)
+        if format_name is None:
+            raise HTTPException(status_code=400, detail="Unsupported file type")
+        configured = getattr(detection_settings, f"extractor_{format_name}")
+        if configured:
+            return configured
+        return METHOD_FAST if detection_settings.pdf_mode == PDF_MODE_FAST else METHOD_FULL
+
+    def resolve(self, mime_type: str, name: str = None, pdf_mode: str = None) -> ExtractorBackend:
+        """
+        Chọn backend cho một request: name (theo request) > pdf_mode (PDF) > cấu hình deployment
+        Backend theo request không hỗ trợ MIME type hoặc chưa cài dependency -> 400,
+        cấu hình deployment sai -> 500
+        """
+        requested = name is not None
+        if name is None and pdf_mode is not None and mime_type == MIME_PDF:
+            name = METHOD_FAST if pdf_mode == PDF_MODE_FAST else METHOD_FULL
+            requested = True
+        if name is None:
+            name = self.default_name(mime_type)
+
+        status_code = 400 if requested else 500
+        backend = self._backends.get(name)
+        if backend is None:
+            raise HTTPException(status_code=status_code, detail=f"Unknown extractor: {name}")
+        if mime_type not in backend.mime_types:
+            raise HTTPException(
+                status_code=status_code,
+                detail=f"Extractor {name} does not support {FORMAT_NAMES.get(mime_type, mime_type)} files"
+            )
+        if not backend.is_available():
+            raise HTTPException(
+                status_code=status_code,
+                detail=f"Extractor {name} is not installed ({', '.join(backend.requires)})"
+            )
+        return backend
+
+    def describe(self) -> Dict[str, Any]:
+        """Danh sách backend, capability và backend mặc định của từng format"""
+        return {
+            "extractors": [backend.describe() for backend in self.backends()],
+            "defaults": {
+                format_name: self.default_name(mime_type) for mime_type, format_name in FORMAT_NAMES.items()
+            }
+        }
+
+# Khởi tạo registry với các backend có sẵn
+extractor_registry = ExtractorRegistry()
+for _backend in (
+    PdfplumberBackend(), PdfminerFastBackend(), PyPDF2Backend(),
+    DocxStreamBackend(), PythonDocxBackend(), XlsxBackend(), CsvBackend()
+):
+    extractor_registry.register(_backend)
@@ -0,0 +1,48 @@
+"""
+Theo dõi bộ nhớ của process khi xử lý tài liệu lớn
+"""
+
+import os
+import resource
+from fastapi import HTTPException
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def current_rss_bytes() -> int:
+    """
+    RSS hiện tại của process (bytes)
+    Đọc /proc/self/statm trên Linux, fallback về peak RSS của getrusage trên hệ điều hành khác
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss là KB trên Linux, bytes trên macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if peak > 1 << 32 else peak * 1024
+
+class MemoryBudget:
+    """
+    Giới hạn bộ nhớ tăng thêm khi xử lý một tài liệu
+    Baseline là RSS lúc bắt đầu; limit_mb <= 0 nghĩa là không giới hạn
+    """
+
+    def __init__(self, limit_mb: int):
+        self.limit_bytes = limit_mb * 1024 * 1024 if limit_mb and limit_mb > 0 else 0
+        self.baseline = current_rss_bytes() if self.limit_bytes else 0
+        self.peak_growth = 0
+
+    def check(self, page_number: int):
+        """Raise 413 nếu RSS tăng quá limit sau khi xử lý page_number"""
+        if not self.limit_bytes:
+            return
+        growth = current_rss_bytes() - self.baseline
+        self.peak_growth = max(self.peak_growth, growth)
+        if growth > self.limit_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    f"Document exceeds memory limit at page {page_number}: "
+                    f"{growth / 1024 / 1024:.0f} MB used, limit {self.limit_bytes / 1024 / 1024:.0f} MB"
+                )
+            )
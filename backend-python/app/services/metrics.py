@@ -0,0 +1,390 @@
+"""
+Metrics của service theo định dạng text của Prometheus (GET /metrics)
+
+- Histogram thời gian theo stage (đọc upload, pre-flight, extract theo MIME type, detection,
+  classification, lưu DB) và theo endpoint; counter byte/page/match theo subtype/request bị từ chối;
+  gauge số request đang xử lý
+- Trên request path mỗi lần ghi chỉ là bisect + cộng số dưới một lock riêng của metric,
+  render text chỉ chạy khi /metrics được gọi
+- Metrics được ghi trong từng process; khi có DETECT_METRICS_MULTIPROC_DIR (gunicorn.conf.py đặt sẵn),
+  /metrics trả về tổng của mọi worker (xem metrics_multiprocess.py)
+- Thời gian stage của request hiện tại (contextvar) được trả về trong header Server-Timing
+  và block timings của response (?timings=true); kết thúc stage cũng là mốc snapshot của alloc_trace
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .alloc_trace import mark_stage
+from .metrics_multiprocess import MultiprocessCollector, Samples
+
+# Starlette tự thêm "; charset=utf-8" cho media type text/*
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4"
+
+# Bucket (giây) cho thời gian xử lý, từ request text nhỏ đến document lớn
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_UPLOAD_READ = "upload_read"
+STAGE_PREFLIGHT = "preflight"
+STAGE_EXTRACTION = "extraction"
+STAGE_DETECTION = "detection"
+# XLSX/CSV scan theo cột: đọc cell và chạy rule xen kẽ nhau nên được đo chung
+STAGE_COLUMNAR_SCAN = "columnar_scan"
+STAGE_CLASSIFICATION = "classification"
+STAGE_AUDIT_LOG = "audit_log"
+STAGE_DB_PERSIST = "db_persist"
+
+# Tên metric trong header Server-Timing theo stage
+SERVER_TIMING_NAMES = {
+    STAGE_UPLOAD_READ: "read",
+    STAGE_PREFLIGHT: "preflight",
+    STAGE_EXTRACTION: "extract",
+    STAGE_COLUMNAR_SCAN: "scan",
+    STAGE_DETECTION: "detect",
+    STAGE_CLASSIFICATION: "classify",
+    STAGE_AUDIT_LOG: "log",
+    STAGE_DB_PERSIST: "persist"
+}
+
+MIME_TEXT = "text/plain"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[Any, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Dict[Tuple[Any, ...], Any]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self, values: Dict[Tuple[Any, ...], Any] = None) -> List[str]:
+        """values: số liệu đã gộp của nhiều worker (mặc định số liệu của process này)"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples(self.snapshot() if values is None else values))
+        return lines
+
+    def _render_samples(self, values: Dict[Tuple[Any, ...], Any]) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+class Counter(_Metric):
+    """Counter chỉ tăng, label truyền theo thứ tự labelnames"""
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(_Metric):
+    """Giá trị tăng/giảm được (vd. số request đang xử lý)"""
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    """Histogram với bucket cố định, mỗi bộ label giữ [số đếm theo bucket (không cộng dồn), tổng]"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def snapshot(self) -> Dict[Tuple[Any, ...], Any]:
+        with self._lock:
+            return {labels: [list(counts), total] for labels, (counts, total) in self._values.items()}
+
+    def _render_samples(self, values: Dict[Tuple[Any, ...], Any]) -> List[str]:
+        lines = []
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+class CallbackMetric(_Metric):
+    """Metric không label, giá trị lấy từ function lúc render (vd. số audit record bị bỏ)"""
+
+    def __init__(self, name: str, documentation: str, kind: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.function = function
+
+    def snapshot(self) -> Dict[Tuple[Any, ...], Any]:
+        return {(): self.function()}
+
+    def _render_samples(self, values) -> List[str]:
+        return [f"{self.name} {_format_value(value)}" for value in values.values()]
+
+class MetricsRegistry:
+    """Danh sách metric theo thứ tự đăng ký, render ra text format của Prometheus"""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> Tuple[Dict[str, str], Samples]:
+        """(kind, số liệu) theo tên metric, để ghi ra file cho chế độ nhiều worker"""
+        return {metric.name: metric.kind for metric in self.metrics}, {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def render(self, samples: Samples = None) -> str:
+        """samples: số liệu đã gộp của nhiều worker (metric không có trong samples được render rỗng)"""
+        if samples is None:
+            return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+        return "\n".join(line for metric in self.metrics for line in metric.render(samples.get(metric.name, {}))) + "\n"
+
+class RequestTimings:
+    """Thời gian theo stage của một request (cộng dồn nếu stage chạy nhiều lần, vd. batch /detect/text)"""
+    __slots__ = ("started", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        """Giá trị header Server-Timing, vd. read;dur=1.20, extract;dur=35.41, detect;dur=2.03, total;dur=40.12"""
+        parts = [
+            f"{SERVER_TIMING_NAMES.get(stage, stage)};dur={seconds * 1000:.2f}"
+            for stage, seconds in self.stages.items()
+        ]
+        parts.append(f"total;dur={self.elapsed_ms():.2f}")
+        return ", ".join(parts)
+
+    def describe(self, **info) -> Dict[str, Any]:
+        """Block timings của response body (total tính đến lúc gọi, chưa gồm encode response)"""
+        return {
+            "total_ms": round(self.elapsed_ms(), 3),
+            "stages_ms": {
+                SERVER_TIMING_NAMES.get(stage, stage): round(seconds * 1000, 3)
+                for stage, seconds in self.stages.items()
+            },
+            **info
+        }
+
+# Timings của request đang xử lý, được MetricsMiddleware đặt cho mỗi HTTP request
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("docai_request_timings", default=None)
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings của request hiện tại (None khi chạy ngoài HTTP request, vd. benchmark / self-test)"""
+    return _request_timings.get()
+
+class _StageTimer:
+    """Context manager đo thời gian một stage"""
+    __slots__ = ("metrics", "stage", "mime_type", "start")
+
+    def __init__(self, metrics: "DetectionMetrics", stage: str, mime_type: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.mime_type = mime_type
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe_stage(self.stage, self.mime_type, time.perf_counter() - self.start)
+        return False
+
+class DetectionMetrics:
+    """Metrics của pipeline detection"""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.multiprocess: Optional[MultiprocessCollector] = None
+        self.stage_seconds = self.registry.register(Histogram(
+            "docai_stage_duration_seconds", "Time spent per processing stage", ("stage", "mime_type")
+        ))
+        self.request_seconds = self.registry.register(Histogram(
+            "docai_request_duration_seconds", "HTTP request duration including the response body", ("endpoint",)
+        ))
+        self.requests = self.registry.register(Counter(
+            "docai_requests_total", "HTTP requests by endpoint and status code", ("endpoint", "status")
+        ))
+        self.rejections = self.registry.register(Counter(
+            "docai_rejections_total", "Requests rejected with a 4xx status", ("endpoint", "status")
+        ))
+        self.in_flight = self.registry.register(Gauge(
+            "docai_requests_in_flight", "Requests currently being processed", ("endpoint",)
+        ))
+        self.documents = self.registry.register(Counter(
+            "docai_documents_total", "Documents (or text requests) processed", ("mime_type",)
+        ))
+        self.bytes_processed = self.registry.register(Counter(
+            "docai_bytes_processed_total", "Bytes of uploaded documents and text bodies processed", ("mime_type",)
+        ))
+        self.pages = self.registry.register(Counter(
+            "docai_pages_processed_total", "Pages (sheets for XLSX/CSV) extracted or scanned", ("mime_type",)
+        ))
+        self.matches = self.registry.register(Counter(
+            "docai_matches_total", "Sensitive matches found per subtype", ("subtype",)
+        ))
+
+    def add_callback(self, name: str, documentation: str, kind: str, function: Callable[[], float]):
+        self.registry.register(CallbackMetric(name, documentation, kind, function))
+
+    def start_multiprocess(self, directory: str, sync_seconds: float, pid: int = None):
+        """Chế độ nhiều worker: ghi snapshot ra directory, /metrics trả về tổng của mọi worker"""
+        self.multiprocess = MultiprocessCollector(self.registry, directory, sync_seconds, pid)
+        self.multiprocess.start()
+
+    def stop_multiprocess(self):
+        if self.multiprocess is not None:
+            self.multiprocess.stop()
+            self.multiprocess = None
+
+    def observe_stage(self, stage: str, mime_type: str, seconds: float):
+        self.stage_seconds.observe(seconds, stage, mime_type)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add(stage, seconds)
+        mark_stage(stage)
+
+    def stage(self, stage: str, mime_type: str) -> _StageTimer:
+        """with detection_metrics.stage(STAGE_DETECTION, mime_type): ..."""
+        return _StageTimer(self, stage, mime_type)
+
+    def timed_iter(self, iterable: Iterable, stage: str, mime_type: str) -> Iterator:
+        """
+        Bọc iterator (vd. page generator của extractor): chỉ cộng thời gian trong next() của iterator,
+        không tính thời gian caller xử lý từng item; ghi một lần khi hết hoặc bị close (gate dừng sớm)
+        """
+        iterator = iter(iterable)
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            self.observe_stage(stage, mime_type, elapsed)
+
+    def record_upload(self, mime_type: str, size_bytes: int):
+        """Một document (hoặc body của /detect/text) được nhận, MIME type là format thật sau pre-flight"""
+        self.documents.inc(mime_type)
+        self.bytes_processed.inc(mime_type, amount=size_bytes)
+
+    def record_results(self, mime_type: str, pages: int, subtype_counts: Dict[str, int]):
+        """Số page đã extract/scan và số match theo subtype của một document"""
+        if pages:
+            self.pages.inc(mime_type, amount=pages)
+        for subtype, count in subtype_counts.items():
+            self.matches.inc(subtype, amount=count)
+
+    def render(self) -> str:
+        if self.multiprocess is not None:
+            return self.registry.render(self.multiprocess.collect())
+        return self.registry.render()
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: thời gian, status và số request đang xử lý theo endpoint
+    Endpoint là path của route đã khai báo (path khác gộp vào "other" để giới hạn số label),
+    thời gian tính cả lúc gửi response body (NDJSON stream)
+    Thêm header Server-Timing với các stage đã chạy trước khi gửi header (stream: chỉ read/preflight)
+    """
+
+    def __init__(self, app, metrics: DetectionMetrics = None):
+        self.app = app
+        self.metrics = metrics or detection_metrics
+        self._paths = None
+
+    def _endpoint(self, scope) -> str:
+        if self._paths is None:
+            routes = getattr(scope.get("app"), "routes", [])
+            self._paths = frozenset(getattr(route, "path", None) for route in routes)
+        path = scope.get("path", "")
+        return path if path in self._paths else "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        status = 500
+        timings = RequestTimings()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timings.server_timing().encode("latin-1")),
+                    # Cho phép trang khác origin đọc Server-Timing (CORS của app cho phép mọi origin)
+                    (b"timing-allow-origin", b"*")
+                ]
+            await send(message)
+
+        self.metrics.in_flight.inc(endpoint)
+        start = time.perf_counter()
+        token = _request_timings.set(timings)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+            self.metrics.in_flight.dec(endpoint)
+            self.metrics.request_seconds.observe(time.perf_counter() - start, endpoint)
+            self.metrics.requests.inc(endpoint, str(status))
+            if 400 <= status < 500:
+                self.metrics.rejections.inc(endpoint, str(status))
+
+# Metrics dùng chung trong process
+detection_metrics = DetectionMetrics()
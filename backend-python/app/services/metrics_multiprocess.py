@@ -0,0 +1,142 @@
+"""
+Gộp metrics của các worker gunicorn qua file trong thư mục chung (DETECT_METRICS_MULTIPROC_DIR)
+
+- Mỗi worker ghi snapshot metrics của mình ra worker-<pid>.json: định kỳ (DETECT_METRICS_SYNC_SECONDS),
+  mỗi lần được scrape và khi dừng; file được thay bằng os.replace nên không ai đọc phải file ghi dở
+- GET /metrics ở bất kỳ worker nào: ghi snapshot của chính worker đó rồi cộng snapshot của mọi worker
+  (counter, histogram và gauge đều được cộng). Mọi giá trị đều lấy từ file, nên counter không giảm khi
+  2 lần scrape liên tiếp rơi vào 2 worker khác nhau
+- Worker đã thoát: process cha gunicorn (hook child_exit) gộp counter/histogram của worker vào archive.json
+  rồi xoá file của worker; gauge của worker (vd. số request đang xử lý) bị bỏ
+- Snapshot: {"kinds": {metric: kind}, "samples": {metric: [[labels, value], ...]}}, value của histogram
+  là [số đếm theo bucket, tổng]
+"""
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+WORKER_FILE_PREFIX = "worker-"
+ARCHIVE_FILE = "archive.json"
+LOCK_FILE = ".lock"
+
+# {metric: {labels: value}}
+Samples = Dict[str, Dict[Tuple[Any, ...], Any]]
+
+@contextmanager
+def _locked(directory: str) -> Iterator[None]:
+    """Lock giữa các process: scrape đọc thư mục và child_exit gộp archive không chạy xen nhau"""
+    with open(os.path.join(directory, LOCK_FILE), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _read(path: str) -> Tuple[Dict[str, str], Samples]:
+    try:
+        with open(path, encoding="utf-8") as stream:
+            data = json.load(stream)
+    except (FileNotFoundError, ValueError):
+        return {}, {}
+    samples = {
+        name: {tuple(labels): value for labels, value in values}
+        for name, values in data["samples"].items()
+    }
+    return data["kinds"], samples
+
+def _write(path: str, kinds: Dict[str, str], samples: Samples):
+    data = {
+        "kinds": kinds,
+        "samples": {name: [[list(labels), value] for labels, value in values.items()] for name, values in samples.items()}
+    }
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as stream:
+        json.dump(data, stream)
+    os.replace(temp_path, path)
+
+def _merge(target: Samples, samples: Samples):
+    for name, values in samples.items():
+        merged = target.setdefault(name, {})
+        for labels, value in values.items():
+            current = merged.get(labels)
+            if current is None:
+                merged[labels] = [list(value[0]), value[1]] if isinstance(value, list) else value
+            elif isinstance(value, list):
+                merged[labels] = [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1]]
+            else:
+                merged[labels] = current + value
+
+def worker_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"{WORKER_FILE_PREFIX}{pid}.json")
+
+def reset_directory(directory: str):
+    """Tạo thư mục và xoá snapshot của lần chạy trước (gọi ở process cha trước khi fork worker)"""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith((".json", ".tmp")):
+            os.remove(os.path.join(directory, name))
+
+def archive_worker(directory: str, pid: int):
+    """Gộp counter/histogram của worker đã thoát vào archive.json, bỏ gauge, xoá file của worker"""
+    path = worker_path(directory, pid)
+    with _locked(directory):
+        kinds, samples = _read(path)
+        if not samples:
+            return
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        archive_kinds, archive = _read(archive_path)
+        _merge(archive, {name: values for name, values in samples.items() if kinds.get(name) != "gauge"})
+        archive_kinds.update(kinds)
+        _write(archive_path, archive_kinds, archive)
+        os.remove(path)
+
+class MultiprocessCollector:
+    """Ghi snapshot của registry trong worker này và cộng snapshot của mọi worker khi scrape"""
+
+    def __init__(self, registry, directory: str, sync_seconds: float, pid: int = None):
+        self.registry = registry
+        self.directory = directory
+        self.sync_seconds = sync_seconds
+        self.path = worker_path(directory, pid or os.getpid())
+        self._stop = threading.Event()
+        self._thread = None
+        # Snapshot và ghi trong cùng lock: file không bị snapshot cũ hơn ghi đè (counter không giảm)
+        self._write_lock = threading.Lock()
+
+    def write(self):
+        with self._write_lock:
+            kinds, samples = self.registry.snapshot()
+            _write(self.path, kinds, samples)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.write()
+        self._thread = threading.Thread(target=self._sync, name="metrics-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Dừng ghi định kỳ, ghi snapshot cuối cùng (process cha gộp vào archive khi worker thoát)"""
+        self._stop.set()
+        self.write()
+
+    def _sync(self):
+        while not self._stop.wait(self.sync_seconds):
+            try:
+                self.write()
+            except OSError:
+                # Lần ghi sau thử lại, scrape vẫn có snapshot trước đó
+                pass
+
+    def collect(self) -> Samples:
+        """Snapshot cộng của mọi worker (kể cả archive của worker đã thoát)"""
+        self.write()
+        merged: Samples = {}
+        with _locked(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                if name == ARCHIVE_FILE or (name.startswith(WORKER_FILE_PREFIX) and name.endswith(".json")):
+                    _merge(merged, _read(os.path.join(self.directory, name))[1])
+        return merged
@@ -0,0 +1,124 @@
+"""
+NER (transformers token classification) cho DocumentProcessor
+
+- Model load lazy ở lần dùng đầu tiên, mỗi process giữ 1 instance (DETECT_NER_MODEL_PATH)
+- Text dài được chia thành các window theo số token của tokenizer, có overlap để entity ở ranh giới
+  window không bị cắt; các window chạy theo batch (DETECT_NER_BATCH_SIZE)
+- Offset của entity được đổi về offset trong toàn bộ text, entity trùng trong vùng overlap được gộp
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+from ..config.settings import detection_settings
+
+# Số token dành cho special token ([CLS], [SEP]) của mỗi window
+SPECIAL_TOKEN_RESERVE = 2
+# Giới hạn window khi tokenizer không khai báo model_max_length hợp lệ
+DEFAULT_MAX_TOKENS = 512
+
+def load_ner_pipeline(model_path: str):
+    """Pipeline factory mặc định: transformers pipeline "ner" chạy trên CPU"""
+    import torch
+    from transformers import pipeline
+
+    if detection_settings.ner_threads > 0:
+        torch.set_num_threads(detection_settings.ner_threads)
+    return pipeline("ner", model=model_path, tokenizer=model_path, device=-1)
+
+class NerRunner:
+    """
+    Chạy NER trên text dài theo window token
+    pipeline_factory: hàm (model_path) -> pipeline, thay được bằng model nhỏ khi kiểm tra
+    """
+
+    def __init__(self, model_path: str = None, pipeline_factory: Callable[[str], Any] = None):
+        self.model_path = model_path
+        self.pipeline_factory = pipeline_factory or load_ner_pipeline
+        self._pipeline = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._pipeline is not None
+
+    @property
+    def pipeline(self):
+        """Load model ở lần gọi đầu tiên (chỉ một thread load)"""
+        if self._pipeline is None:
+            with self._lock:
+                if self._pipeline is None:
+                    self._pipeline = self.pipeline_factory(self.model_path or detection_settings.ner_model_path)
+        return self._pipeline
+
+    def window_tokens(self) -> int:
+        """Số token của text trong mỗi window (không tính special token)"""
+        size = detection_settings.ner_window_tokens
+        if size <= 0:
+            model_max_length = getattr(self.pipeline.tokenizer, "model_max_length", 0) or 0
+            size = model_max_length if 0 < model_max_length <= DEFAULT_MAX_TOKENS else DEFAULT_MAX_TOKENS
+        return max(size - SPECIAL_TOKEN_RESERVE, 1)
+
+    def windows(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Chia text thành các khoảng (start, end) theo số token, window liền nhau overlap DETECT_NER_WINDOW_OVERLAP token
+        Ranh giới window được lùi về đầu/cuối từ để text của window tokenize ra đúng các token đó
+        """
+        offsets = self.pipeline.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        total = len(offsets)
+        size = self.window_tokens()
+        overlap = min(max(detection_settings.ner_window_overlap, 0), size // 2)
+
+        def continues_word(index: int) -> bool:
+            # Token index nối liền token trước đó (subword hoặc dấu câu dính vào từ)
+            return offsets[index][0] == offsets[index - 1][1]
+
+        spans, first = [], 0
+        while first < total:
+            end = min(first + size, total) - 1
+            last = end
+            while last > first and last + 1 < total and continues_word(last + 1):
+                last -= 1
+            if last == first:
+                # Một từ dài hơn cả window: cắt giữa từ
+                last = end
+            spans.append((offsets[first][0], offsets[last][1]))
+            if last == total - 1:
+                break
+            next_first = max(last + 1 - overlap, first + 1)
+            while next_first > first + 1 and continues_word(next_first):
+                next_first -= 1
+            # Không lùi được về đầu từ (từ đó bắt đầu ở first): window sau bắt đầu ở từ kế tiếp
+            while next_first <= last and continues_word(next_first):
+                next_first += 1
+            first = next_first
+        return spans
+
+    def __call__(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Entity của toàn bộ text, sắp xếp theo vị trí
+        Mỗi entity giữ các field của pipeline (entity, score, word, start, end), start/end là offset trong text;
+        "index" (vị trí token trong window) bị bỏ vì không còn ý nghĩa với text nhiều window
+        """
+        spans = self.windows(text)
+        if not spans:
+            return []
+        results = self.pipeline(
+            [text[start:end] for start, end in spans],
+            batch_size=max(detection_settings.ner_batch_size, 1)
+        )
+
+        # Entity trong vùng overlap xuất hiện ở 2 window: giữ kết quả có score cao hơn
+        merged: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for (window_start, _), entities in zip(spans, results):
+            for entity in entities:
+                entity = {key: value for key, value in entity.items() if key != "index"}
+                entity["score"] = float(entity["score"])
+                entity["start"] += window_start
+                entity["end"] += window_start
+                key = (entity["start"], entity["end"])
+                if key not in merged or entity["score"] > merged[key]["score"]:
+                    merged[key] = entity
+        return sorted(merged.values(), key=lambda entity: entity["start"])
+
+# Instance dùng chung trong process, model chỉ load khi có request NER đầu tiên
+ner_runner = NerRunner()
@@ -0,0 +1,131 @@
+"""
+Chọn page cần scan cho document lớn: page range hoặc sampling policy
+"""
+
+import random
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+
+class PageSelection:
+    """
+    Chính sách chọn page (chỉ dùng một trong các policy):
+    - pages: range tường minh, vd. "1-10,15,20-" (1-based, "20-" = từ page 20 tới hết)
+    - first_pages: N page đầu tiên
+    - every_k: mỗi page thứ k (1, 1+k, 1+2k, ...)
+    - sample_size: lấy ngẫu nhiên n page với seed cố định
+    Không có policy nào -> scan toàn bộ
+    """
+
+    def __init__(
+        self,
+        pages: Optional[str] = None,
+        first_pages: Optional[int] = None,
+        every_k: Optional[int] = None,
+        sample_size: Optional[int] = None,
+        seed: int = 0
+    ):
+        policies = [
+            name for name, value in (
+                ("pages", pages), ("first_pages", first_pages),
+                ("every_k", every_k), ("sample_size", sample_size)
+            ) if value is not None
+        ]
+        if len(policies) > 1:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Only one page selection policy is allowed, got: {', '.join(policies)}"
+            )
+        for name, value in (("first_pages", first_pages), ("every_k", every_k), ("sample_size", sample_size)):
+            if value is not None and value < 1:
+                raise HTTPException(status_code=400, detail=f"{name} must be >= 1")
+
+        self.policy = policies[0] if policies else "all"
+        self.ranges = self._parse_ranges(pages) if pages is not None else None
+        self.pages = pages
+        self.first_pages = first_pages
+        self.every_k = every_k
+        self.sample_size = sample_size
+        self.seed = seed
+
+        # Được điền khi select() / select_unpaged() được gọi
+        self.total_pages: Optional[int] = None
+        self.page_numbers: List[int] = []
+        self.paged = True
+
+    @staticmethod
+    def _parse_ranges(pages: str) -> List[tuple]:
+        """Parse "1-10,15,20-" thành [(1, 10), (15, 15), (20, None)]"""
+        ranges = []
+        try:
+            for part in pages.split(","):
+                part = part.strip()
+                if not part:
+                    continue
+                if "-" in part:
+                    start, end = part.split("-", 1)
+                    start = int(start)
+                    end = int(end) if end.strip() else None
+                else:
+                    start = end = int(part)
+                if start < 1 or (end is not None and end < start):
+                    raise ValueError(part)
+                ranges.append((start, end))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid page range: {pages}")
+        if not ranges:
+            raise HTTPException(status_code=400, detail=f"Invalid page range: {pages}")
+        return ranges
+
+    def select(self, total_pages: int) -> List[int]:
+        """Trả về danh sách page number (1-based, tăng dần) cần scan"""
+        if self.policy == "pages":
+            selected = set()
+            for start, end in self.ranges:
+                end = total_pages if end is None else min(end, total_pages)
+                selected.update(range(start, end + 1))
+            page_numbers = sorted(selected)
+        elif self.policy == "first_pages":
+            page_numbers = list(range(1, min(self.first_pages, total_pages) + 1))
+        elif self.policy == "every_k":
+            page_numbers = list(range(1, total_pages + 1, self.every_k))
+        elif self.policy == "sample_size":
+            rng = random.Random(self.seed)
+            page_numbers = sorted(rng.sample(range(1, total_pages + 1), min(self.sample_size, total_pages)))
+        else:
+            page_numbers = list(range(1, total_pages + 1))
+
+        self.total_pages = total_pages
+        self.page_numbers = page_numbers
+        return page_numbers
+
+    def select_unpaged(self) -> List[int]:
+        """Document không có khái niệm page (DOCX): luôn scan toàn bộ như 1 page"""
+        self.paged = False
+        self.total_pages = 1
+        self.page_numbers = [1]
+        return self.page_numbers
+
+    def coverage(self) -> Dict[str, Any]:
+        """Metadata về phạm vi đã scan để UI hiển thị kết quả là partial"""
+        total_pages = self.total_pages or 0
+        scanned_pages = len(self.page_numbers)
+        policy: Dict[str, Any] = {"type": self.policy}
+        if self.policy == "pages":
+            policy["pages"] = self.pages
+        elif self.policy == "first_pages":
+            policy["first_pages"] = self.first_pages
+        elif self.policy == "every_k":
+            policy["every_k"] = self.every_k
+        elif self.policy == "sample_size":
+            policy["sample_size"] = self.sample_size
+            policy["seed"] = self.seed
+
+        return {
+            "policy": policy,
+            "total_pages": total_pages,
+            "scanned_pages": scanned_pages,
+            "page_numbers": self.page_numbers,
+            "ratio": round(scanned_pages / total_pages, 4) if total_pages else 0.0,
+            "partial": scanned_pages < total_pages,
+            "paged": self.paged
+        }
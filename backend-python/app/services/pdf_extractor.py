@@ -0,0 +1,93 @@
+"""
+Extract text PDF ở chế độ nhanh: dùng trực tiếp layout analysis của pdfminer với tham số rẻ
+(không qua bước dựng chars/textmap của pdfplumber), fallback về pdfplumber cho page có kết quả lỗi
+Module pdfminer chỉ được import khi extract PDF lần đầu
+"""
+
+from typing import Any, Dict, Optional
+
+PDF_MODE_FULL = "full"
+PDF_MODE_FAST = "fast"
+PDF_MODES = (PDF_MODE_FULL, PDF_MODE_FAST)
+
+METHOD_FAST = "pdfminer-fast"
+METHOD_FULL = "pdfplumber"
+
+# boxes_flow=None: sắp xếp text box theo toạ độ thay vì gom nhóm phân cấp (O(n^2))
+FAST_LAPARAMS: Dict[str, Any] = dict(
+    line_margin=0.5,
+    char_margin=2.0,
+    word_margin=0.1,
+    boxes_flow=None,
+    detect_vertical=False,
+    all_texts=False,
+)
+
+class FastPdfTextExtractor:
+    """Extract text từng page bằng pdfminer, dùng lại document đã được pdfplumber parse"""
+
+    def __init__(self, pdf):
+        from pdfminer.converter import PDFPageAggregator
+        from pdfminer.layout import LAParams, LTTextContainer
+        from pdfminer.pdfinterp import PDFPageInterpreter
+
+        self.text_container = LTTextContainer
+        self.device = PDFPageAggregator(pdf.rsrcmgr, laparams=LAParams(**FAST_LAPARAMS))
+        self.interpreter = PDFPageInterpreter(pdf.rsrcmgr, self.device)
+
+    def extract_page(self, page) -> str:
+        """
+        Extract text của một pdfplumber page
+        Các text line của pdfminer có cùng baseline được ghép lại thành một dòng (trái -> phải),
+        để label và value của form nằm cạnh nhau như kết quả của pdfplumber
+        """
+        self.interpreter.process_page(page.page_obj)
+        layout = self.device.get_result()
+
+        lines = []
+        for element in layout:
+            if isinstance(element, self.text_container):
+                for line in element:
+                    text = line.get_text().strip()
+                    if text:
+                        lines.append((line.y0, line.y1, line.x0, text))
+
+        # Sắp xếp từ trên xuống, gom các line chồng lấn theo chiều dọc vào cùng một dòng
+        lines.sort(key=lambda line: (-line[1], line[2]))
+        rows = []
+        for y0, y1, x0, text in lines:
+            if rows:
+                row = rows[-1]
+                center = (y0 + y1) / 2
+                if row["y0"] <= center <= row["y1"]:
+                    row["items"].append((x0, text))
+                    continue
+            rows.append({"y0": y0, "y1": y1, "items": [(x0, text)]})
+
+        return "\n".join(
+            " ".join(text for _, text in sorted(row["items"])) for row in rows
+        )
+
+def fallback_reason(text: str) -> Optional[str]:
+    """
+    Kiểm tra kết quả fast mode có dấu hiệu lỗi không, trả về lý do nếu cần fallback
+    - empty: không có text
+    - fragmented_lines: phần lớn dòng chỉ có 1-2 ký tự (thứ tự đọc bị vỡ theo cột/ký tự)
+    - spaced_characters: phần lớn token chỉ có 1 ký tự (chữ bị tách rời)
+    """
+    if not text.strip():
+        return "empty"
+
+    lines = [line for line in text.split("\n") if line.strip()]
+    if len(lines) >= 8:
+        short_lines = sum(1 for line in lines if len(line.strip()) <= 2)
+        if short_lines / len(lines) > 0.5:
+            return "fragmented_lines"
+
+    tokens = text.split()
+    if len(tokens) >= 20:
+        single_chars = sum(1 for token in tokens if len(token) == 1)
+        if single_chars / len(tokens) > 0.6:
+            return "spaced_characters"
+
+    return None
@@ -0,0 +1,201 @@
+"""
+Kiểm tra nhanh file upload trước khi parse (pre-flight):
+magic bytes, mã hoá, số page và text layer của PDF
+File không thể xử lý được trả lỗi ngay với status cụ thể thay vì tốn thời gian parse toàn bộ
+"""
+
+import codecs
+import re
+import time
+import zipfile
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from ..config.settings import detection_settings
+
+MIME_PDF = "application/pdf"
+MIME_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MIME_CSV = "text/csv"
+
+# Content type chung chung (vd: Java client gửi multipart không có content type) -> dùng format sniff được
+GENERIC_MIME_TYPES = ("application/octet-stream", "")
+
+PREFLIGHT_OK = "ok"
+PREFLIGHT_NO_TEXT_LAYER = "no_text_layer"
+
+# PDF spec cho phép header nằm trong 1024 byte đầu
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+# DOCX/XLSX có mật khẩu được lưu trong OLE container với stream "EncryptedPackage"
+OLE_ENCRYPTED_PACKAGE = "EncryptedPackage".encode("utf-16-le")
+
+# Toán tử vẽ text trong content stream: Tj, TJ, ' và "
+TEXT_OPERATOR_PATTERN = re.compile(rb"\bT[jJ]\b|[)>\]]\s*['\"]")
+FORM_XOBJECT = "Form"
+MAX_FORM_DEPTH = 2
+
+def sniff_mime_type(file_path: str) -> Optional[str]:
+    """
+    Xác định format thật của file từ magic bytes (None nếu không phải PDF/DOCX/XLSX/CSV)
+    CSV không có magic bytes: file có phần đầu là text UTF-8 (không chứa byte NUL) được coi là CSV
+    """
+    with open(file_path, "rb") as stream:
+        head = stream.read(1024)
+
+    if not head:
+        raise HTTPException(status_code=422, detail="File is empty")
+
+    if PDF_MAGIC in head:
+        return MIME_PDF
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                names = archive.namelist()
+                if "word/document.xml" in names:
+                    return MIME_DOCX
+                if "xl/workbook.xml" in names:
+                    return MIME_XLSX
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=422, detail="Invalid or corrupted Office file")
+    if head.startswith(OLE_MAGIC) and _is_encrypted_ooxml(file_path):
+        raise HTTPException(status_code=422, detail="Office file is password protected")
+    if b"\x00" not in head and not head.startswith(OLE_MAGIC) and _is_utf8_text(head):
+        return MIME_CSV
+    return None
+
+def _is_utf8_text(head: bytes) -> bool:
+    # final=False: ký tự nhiều byte bị cắt ở cuối 1 KB đầu không bị tính là lỗi
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+def _is_encrypted_ooxml(file_path: str) -> bool:
+    with open(file_path, "rb") as stream:
+        return OLE_ENCRYPTED_PACKAGE in stream.read()
+
+def _resolve_mime_type(declared: Optional[str], sniffed: Optional[str]) -> str:
+    """So sánh content type client gửi với format thật, raise 415 nếu không khớp"""
+    declared = (declared or "").split(";")[0].strip().lower()
+    if sniffed is None:
+        raise HTTPException(status_code=415, detail="File content is not a PDF, DOCX, XLSX or CSV document")
+    if declared not in GENERIC_MIME_TYPES and declared != sniffed:
+        raise HTTPException(
+            status_code=415,
+            detail=f"File content does not match declared type {declared} (detected {sniffed})"
+        )
+    return sniffed
+
+def _sample_indexes(page_count: int, sample_size: int) -> List[int]:
+    """Chọn các page rải đều (đầu, giữa, cuối) để kiểm tra text layer"""
+    sample_size = min(sample_size, page_count)
+    if sample_size <= 1:
+        return [0] if sample_size == 1 else []
+    step = (page_count - 1) / (sample_size - 1)
+    return sorted({round(i * step) for i in range(sample_size)})
+
+def _has_text_operators(streams: List[Any], resources: Any, depth: int = 0) -> bool:
+    """
+    Kiểm tra content stream (và Form XObject được tham chiếu) có toán tử vẽ text không
+    Stream không giải mã được thì coi như có text để parse đầy đủ quyết định
+    """
+    from pdfminer.pdftypes import PDFStream, resolve1
+
+    for stream in streams:
+        stream = resolve1(stream)
+        if not isinstance(stream, PDFStream):
+            continue
+        try:
+            data = stream.get_data()
+        except Exception:
+            return True
+        if TEXT_OPERATOR_PATTERN.search(data):
+            return True
+
+    if depth >= MAX_FORM_DEPTH:
+        return False
+    xobjects = resolve1((resolve1(resources) or {}).get("XObject")) or {}
+    for xobject in xobjects.values():
+        xobject = resolve1(xobject)
+        if isinstance(xobject, PDFStream) and getattr(xobject.get("Subtype"), "name", None) == FORM_XOBJECT:
+            if _has_text_operators([xobject], xobject.get("Resources"), depth + 1):
+                return True
+    return False
+
+def _preflight_pdf(file_path: str, report: Dict[str, Any]):
+    from pdfminer.pdfdocument import PDFDocument, PDFEncryptionError, PDFPasswordIncorrect
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    with open(file_path, "rb") as stream:
+        try:
+            document = PDFDocument(PDFParser(stream))
+        except PDFPasswordIncorrect:
+            raise HTTPException(status_code=422, detail="PDF file is password protected")
+        except PDFEncryptionError as e:
+            raise HTTPException(status_code=422, detail=f"PDF encryption is not supported: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"Invalid or corrupted PDF file: {str(e)}")
+        report["encrypted"] = document.encryption is not None
+
+        try:
+            page_count = resolve1(resolve1(document.catalog.get("Pages")).get("Count"))
+        except Exception:
+            page_count = None
+        if not isinstance(page_count, int):
+            page_count = sum(1 for _ in PDFPage.create_pages(document))
+        report["page_count"] = page_count
+
+        if page_count == 0:
+            report["status"] = PREFLIGHT_NO_TEXT_LAYER
+            report["text_layer"] = False
+            return
+        if detection_settings.max_pdf_pages and page_count > detection_settings.max_pdf_pages:
+            raise HTTPException(
+                status_code=413,
+                detail=f"PDF has {page_count} pages, limit is {detection_settings.max_pdf_pages}"
+            )
+
+        sample = _sample_indexes(page_count, detection_settings.preflight_sample_pages)
+        if not sample:
+            return
+        text_pages = []
+        for index, page in enumerate(PDFPage.create_pages(document)):
+            if index > sample[-1]:
+                break
+            if index in sample and _has_text_operators(page.contents, page.resources):
+                text_pages.append(index + 1)
+        report["sampled_pages"] = [index + 1 for index in sample]
+        report["text_pages"] = text_pages
+        report["text_layer"] = bool(text_pages)
+        if not text_pages:
+            report["status"] = PREFLIGHT_NO_TEXT_LAYER
+
+def run_preflight(file_path: str, declared_mime_type: Optional[str]) -> Dict[str, Any]:
+    """
+    Pre-flight cho file đã lưu:
+    - 415: nội dung không phải PDF/DOCX/XLSX/CSV hoặc không khớp content type (octet-stream dùng format sniff được)
+    - 422: file có mật khẩu hoặc hỏng
+    - 413: PDF vượt DETECT_MAX_PDF_PAGES
+    Trả về report với mime_type thật; status "no_text_layer" nếu các page lấy mẫu không có text
+    (scan/ảnh) để caller trả kết quả rỗng mà không cần parse
+    """
+    start = time.perf_counter()
+    mime_type = _resolve_mime_type(declared_mime_type, sniff_mime_type(file_path))
+    report = {
+        "status": PREFLIGHT_OK,
+        "mime_type": mime_type,
+        "declared_mime_type": declared_mime_type,
+        "encrypted": False,
+        "page_count": None,
+        "text_layer": True
+    }
+
+    if mime_type == MIME_PDF:
+        _preflight_pdf(file_path, report)
+
+    report["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return report
@@ -0,0 +1,175 @@
+"""
+Profiling theo yêu cầu cho worker đang chạy (POST /admin/profile)
+
+- Bật cProfile cho N request /detect tiếp theo hoặc trong một khoảng thời gian, chỉ trong worker nhận lệnh
+- Ngoài phiên profiling, request path chỉ kiểm tra một attribute; trong phiên, mỗi lúc chỉ một request
+  được profile (request chạy song song không được profile và không tính vào N)
+- Stats của các request được cộng dồn (pstats), trả về dạng text, JSON (top function theo cumulative time)
+  hoặc file .pstats (python -m pstats / snakeviz)
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from ..config.settings import detection_settings
+
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+class _ProfileScope:
+    """Context manager profile một request (không làm gì khi không có phiên hoặc đang profile request khác)"""
+    __slots__ = ("profiler", "profile")
+
+    def __init__(self, profiler: "RequestProfiler"):
+        self.profiler = profiler
+        self.profile = None
+
+    def __enter__(self):
+        self.profile = self.profiler._acquire()
+        if self.profile is not None:
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None:
+            self.profile.disable()
+            self.profiler._release(self.profile)
+        return False
+
+class RequestProfiler:
+    """Phiên profiling của process, stats cộng dồn của phiên gần nhất"""
+
+    def __init__(self):
+        self.active = False
+        self._lock = threading.Lock()
+        self._busy = False
+        self._remaining: Optional[int] = None
+        self._deadline: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._profiled = 0
+        self._skipped = 0
+        self._stats: Optional[pstats.Stats] = None
+
+    def start(self, requests: int = None, seconds: float = None) -> Dict[str, Any]:
+        """Bắt đầu phiên mới (xoá stats cũ): N request tiếp theo và/hoặc trong seconds giây"""
+        if not requests and not seconds:
+            raise HTTPException(status_code=400, detail="Specify requests and/or seconds")
+        if (requests or 0) > detection_settings.profiling_max_requests or (seconds or 0) > detection_settings.profiling_max_seconds:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Profiling is limited to {detection_settings.profiling_max_requests} requests "
+                       f"and {detection_settings.profiling_max_seconds} seconds"
+            )
+        with self._lock:
+            self._remaining = requests or None
+            self._deadline = time.monotonic() + seconds if seconds else None
+            self._started_at = time.time()
+            self._finished_at = None
+            self._profiled = 0
+            self._skipped = 0
+            self._stats = None
+            self.active = True
+        return self.describe()
+
+    def stop(self) -> Dict[str, Any]:
+        """Kết thúc phiên sớm, giữ lại stats đã thu"""
+        with self._lock:
+            self._finish()
+        return self.describe()
+
+    def profile(self) -> _ProfileScope:
+        """with request_profiler.profile(): ... (phần CPU-bound của request, không có await bên trong)"""
+        return _ProfileScope(self)
+
+    def _finish(self):
+        if self.active:
+            self.active = False
+            self._finished_at = time.time()
+
+    def _acquire(self) -> Optional[cProfile.Profile]:
+        if not self.active:
+            return None
+        with self._lock:
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                self._finish()
+            if not self.active:
+                return None
+            if self._busy:
+                self._skipped += 1
+                return None
+            self._busy = True
+        return cProfile.Profile()
+
+    def _release(self, profile: cProfile.Profile):
+        with self._lock:
+            self._busy = False
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self._profiled += 1
+            if self._remaining is not None:
+                self._remaining -= 1
+                if self._remaining <= 0:
+                    self._finish()
+
+    def describe(self) -> Dict[str, Any]:
+        deadline = self._deadline
+        return {
+            "pid": os.getpid(),
+            "active": self.active,
+            "remaining_requests": self._remaining if self.active else None,
+            "ends_in_s": round(max(deadline - time.monotonic(), 0), 1) if self.active and deadline is not None else None,
+            "profiled_requests": self._profiled,
+            "skipped_requests": self._skipped,
+            "started_at": self._started_at,
+            "finished_at": self._finished_at
+        }
+
+    def _collected_stats(self, sort: str) -> pstats.Stats:
+        if sort not in SORT_KEYS:
+            raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_KEYS)}")
+        if self._stats is None:
+            raise HTTPException(status_code=404, detail=f"No profile collected in worker {os.getpid()}")
+        return self._stats
+
+    def top_functions(self, top: int = 30, sort: str = "cumulative") -> List[Dict[str, Any]]:
+        """Top function theo sort key, thời gian tính bằng ms"""
+        stats = self._collected_stats(sort)
+        index = {"ncalls": 1, "tottime": 2, "cumulative": 3}[sort]
+        with self._lock:
+            rows = sorted(stats.stats.items(), key=lambda item: -item[1][index])[:top]
+        return [
+            {
+                "function": pstats.func_std_string(function),
+                "primitive_calls": primitive_calls,
+                "calls": calls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3)
+            }
+            for function, (primitive_calls, calls, tottime, cumtime, _) in rows
+        ]
+
+    def render_text(self, top: int = 30, sort: str = "cumulative") -> str:
+        """Bảng pstats dạng text (print_stats)"""
+        stats = self._collected_stats(sort)
+        stream = io.StringIO()
+        with self._lock:
+            stats.stream = stream
+            stats.sort_stats(sort).print_stats(top)
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """Nội dung file .pstats (giống pstats.Stats.dump_stats)"""
+        stats = self._collected_stats("cumulative")
+        with self._lock:
+            return marshal.dumps(stats.stats)
+
+# Profiler dùng chung trong process (mỗi worker gunicorn có phiên riêng)
+request_profiler = RequestProfiler()
@@ -0,0 +1,144 @@
+"""
+Encode kết quả detection theo định dạng client yêu cầu qua header Accept
+
+- application/json: JSON thường (dùng orjson nếu có cài đặt)
+- application/vnd.docai.columnar+json: layout dạng cột, string được đưa vào
+  bảng tra cứu và match chỉ lưu index
+- application/x-msgpack: layout dạng cột encode nhị phân bằng msgpack
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson là optional, fallback về json chuẩn
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack là optional, không hỗ trợ binary encoding
+    msgpack = None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.docai.columnar+json"
+MSGPACK = "application/x-msgpack"
+
+# Các field string lặp lại nhiều lần -> đưa vào string table
+INDEXED_FIELDS = ["category", "subtype", "method", "keyword_found"]
+VALUE_FIELDS = ["value", "start", "end"]
+# Vị trí trong spreadsheet, chỉ có ở match của XLSX/CSV
+LOCATION_INDEXED_FIELDS = ["sheet", "column", "column_header"]
+LOCATION_VALUE_FIELDS = ["row"]
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize JSON nhanh (orjson nếu có), giữ nguyên ký tự tiếng Việt"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def supported_media_types() -> List[str]:
+    """Danh sách media type hỗ trợ, theo thứ tự ưu tiên khi q bằng nhau"""
+    media_types = [JSON, COLUMNAR_JSON]
+    if msgpack is not None:
+        media_types.append(MSGPACK)
+    return media_types
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Chọn media type từ header Accept (có hỗ trợ q-value)
+    Không có header hoặc */* -> application/json
+    """
+    if not accept:
+        return JSON
+
+    supported = supported_media_types()
+    best_type, best_q = None, 0.0
+
+    for item in accept.split(","):
+        parts = [part.strip() for part in item.split(";")]
+        media_type = parts[0].lower()
+        q = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+
+        if media_type in ("*/*", "application/*"):
+            candidate = JSON
+        elif media_type in ("application/msgpack", "application/vnd.msgpack"):
+            candidate = MSGPACK if MSGPACK in supported else None
+        elif media_type in supported:
+            candidate = media_type
+        else:
+            candidate = None
+
+        if candidate and q > best_q:
+            best_type, best_q = candidate, q
+
+    if best_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Not acceptable. Supported media types: {', '.join(supported)}"
+        )
+    return best_type
+
+def to_columnar(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Chuyển list match dạng dict sang layout dạng cột:
+    - strings: bảng tra cứu cho category/subtype/method/keyword_found
+      (và sheet/column/column_header với match của XLSX/CSV)
+    - matches: mỗi field là một mảng, field dạng string bảng lưu index (-1 nếu không có)
+    """
+    matches = result.get("matches", [])
+    indexed_fields, value_fields = INDEXED_FIELDS, VALUE_FIELDS
+    if matches and "sheet" in matches[0]:
+        indexed_fields = INDEXED_FIELDS + LOCATION_INDEXED_FIELDS
+        value_fields = VALUE_FIELDS + LOCATION_VALUE_FIELDS
+    tables = {field: [] for field in indexed_fields}
+    lookups = {field: {} for field in indexed_fields}
+    columns = {field: [] for field in indexed_fields + value_fields}
+
+    for match in matches:
+        for field in indexed_fields:
+            value = match.get(field)
+            if value is None:
+                columns[field].append(-1)
+                continue
+            index = lookups[field].get(value)
+            if index is None:
+                index = len(tables[field])
+                lookups[field][value] = index
+                tables[field].append(value)
+            columns[field].append(index)
+        for field in value_fields:
+            columns[field].append(match.get(field))
+
+    columnar = {key: value for key, value in result.items() if key != "matches"}
+    columnar["layout"] = "columnar"
+    columnar["strings"] = tables
+    columnar["matches"] = columns
+    return columnar
+
+def _to_columnar_payload(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Áp dụng layout dạng cột cho kết quả đơn hoặc batch ({"results": [...]})"""
+    if "results" in result:
+        return {**result, "results": [to_columnar(item) for item in result["results"]]}
+    return to_columnar(result)
+
+def encode_response(result: Dict[str, Any], accept: Optional[str]) -> Response:
+    """Encode kết quả detection theo header Accept"""
+    media_type = negotiate_media_type(accept)
+
+    if media_type == COLUMNAR_JSON:
+        content = dumps_json(_to_columnar_payload(result))
+    elif media_type == MSGPACK:
+        content = msgpack.packb(_to_columnar_payload(result), use_bin_type=True)
+    else:
+        content = dumps_json(result)
+
+    return Response(content=content, media_type=media_type, headers={"Vary": "Accept"})
@@ -0,0 +1,131 @@
+"""
+Profile theo rule / keyword của SUBTYPE_DETECT_RULES (explain mode)
+
+Với mỗi keyword: số lần keyword xuất hiện (hits), số lần lấy được value sau keyword (extractions),
+số lần thử regex của rule trên value / số lần regex khớp, số match trả về và tổng thời gian scan keyword.
+Profile của từng request được trả về trong response (?explain=true) và cộng dồn vào rule_profiler
+(GET /rules/profile) để tìm keyword tốn thời gian mà không tạo ra match nào.
+"""
+
+import os
+import random
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from ..config.settings import detection_settings
+
+STAT_FIELDS = ("hits", "extractions", "regex_attempts", "regex_successes", "matches")
+
+class KeywordStats:
+    """Số liệu của một keyword"""
+    __slots__ = STAT_FIELDS + ("seconds",)
+
+    def __init__(self):
+        self.hits = 0
+        self.extractions = 0
+        self.regex_attempts = 0
+        self.regex_successes = 0
+        self.matches = 0
+        self.seconds = 0.0
+
+    def add(self, other: "KeywordStats"):
+        for field in STAT_FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        self.seconds += other.seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in STAT_FIELDS}
+        data["time_ms"] = round(self.seconds * 1000, 3)
+        return data
+
+class RuleProfile:
+    """Profile của một hoặc nhiều lần scan, key là (subtype, keyword)"""
+
+    def __init__(self):
+        self.keywords: Dict[Tuple[str, str], KeywordStats] = {}
+        self.scans = 0
+        self.chars = 0
+
+    def keyword(self, subtype: str, keyword: str) -> KeywordStats:
+        stats = self.keywords.get((subtype, keyword))
+        if stats is None:
+            stats = self.keywords[(subtype, keyword)] = KeywordStats()
+        return stats
+
+    def add_scan(self, text: str):
+        self.scans += 1
+        self.chars += len(text)
+
+    def merge(self, other: "RuleProfile"):
+        self.scans += other.scans
+        self.chars += other.chars
+        for (subtype, keyword), stats in other.keywords.items():
+            self.keyword(subtype, keyword).add(stats)
+
+    def to_dict(self, top: int = 20) -> Dict[str, Any]:
+        """
+        Số liệu theo rule (sắp xếp theo thời gian giảm dần, kèm từng keyword)
+        và top keyword tốn thời gian nhưng không tạo ra match nào (ứng viên để bỏ)
+        """
+        rules: Dict[str, Dict[str, Any]] = {}
+        for (subtype, keyword), stats in self.keywords.items():
+            rule = rules.setdefault(subtype, {"subtype": subtype, "totals": KeywordStats(), "keywords": []})
+            rule["totals"].add(stats)
+            rule["keywords"].append({"keyword": keyword, **stats.to_dict()})
+
+        rule_list: List[Dict[str, Any]] = []
+        for rule in sorted(rules.values(), key=lambda rule: -rule["totals"].seconds):
+            rule["keywords"].sort(key=lambda keyword: -keyword["time_ms"])
+            rule_list.append({"subtype": rule["subtype"], **rule["totals"].to_dict(), "keywords": rule["keywords"]})
+
+        unproductive = sorted(
+            (
+                {"subtype": subtype, "keyword": keyword, **stats.to_dict()}
+                for (subtype, keyword), stats in self.keywords.items() if stats.matches == 0
+            ),
+            key=lambda keyword: -keyword["time_ms"]
+        )[:top]
+
+        return {
+            "scans": self.scans,
+            "chars": self.chars,
+            "time_ms": round(sum(stats.seconds for stats in self.keywords.values()) * 1000, 3),
+            "rules": rule_list,
+            "unproductive_keywords": unproductive
+        }
+
+class RuleProfiler:
+    """Cộng dồn profile của các request (explain hoặc được chọn theo DETECT_RULE_PROFILE_SAMPLE_RATE)"""
+
+    def __init__(self):
+        self._profile = RuleProfile()
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def new_profile(self, explain: bool = False) -> Optional[RuleProfile]:
+        """Profile cho một request: luôn có khi explain, ngược lại theo sample rate (None = không profile)"""
+        if explain:
+            return RuleProfile()
+        rate = detection_settings.rule_profile_sample_rate
+        if rate > 0 and (rate >= 1 or random.random() < rate):
+            return RuleProfile()
+        return None
+
+    def add(self, profile: Optional[RuleProfile]):
+        if profile is None:
+            return
+        with self._lock:
+            self._profile.merge(profile)
+            self._requests += 1
+
+    def describe(self, top: int = 20) -> Dict[str, Any]:
+        """Profile cộng dồn của worker này, "pid" cho biết worker nào trả lời (mỗi worker gunicorn có profile riêng)"""
+        with self._lock:
+            return {"pid": os.getpid(), "requests": self._requests, **self._profile.to_dict(top)}
+
+    def reset(self):
+        with self._lock:
+            self._profile = RuleProfile()
+            self._requests = 0
+
+# Profile cộng dồn trong process
+rule_profiler = RuleProfiler()
@@ -0,0 +1,94 @@
+"""
+Self-test detection với file mẫu (trước đây chạy đồng bộ trong startup event)
+
+- CLI: python -m app.services.self_test [file ...] (mặc định files/Dữ liệu giả 1.pdf), in chi tiết từng match
+- Background: DETECT_STARTUP_SELF_TEST=true chạy sau warm-up, chỉ in một dòng tóm tắt, không ảnh hưởng /ready
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict
+from .audit_log import LineIndex
+from .detection_service import detection_service
+from .preflight import sniff_mime_type
+
+SAMPLE_FILE = Path(__file__).resolve().parent.parent.parent / "files" / "Dữ liệu giả 1.pdf"
+
+def run_self_test(file_path: Path = SAMPLE_FILE) -> Dict[str, Any]:
+    """Extract + detect trên một file, trả về text và các match"""
+    start = time.perf_counter()
+    mime_type = sniff_mime_type(str(file_path))
+    content_text = detection_service.process_file(str(file_path), mime_type)
+    matches = detection_service.detect_sensitive_by_rules(content_text)
+    return {
+        "file": file_path,
+        "mime_type": mime_type,
+        "content_text": content_text,
+        "matches": matches,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+
+def run_background_self_test():
+    """Self-test chạy nền khi khởi động, lỗi chỉ được in ra"""
+    try:
+        if not SAMPLE_FILE.exists():
+            print(f"⚠️ File mẫu không tồn tại: {SAMPLE_FILE}")
+            return
+        result = run_self_test()
+        print(
+            f"🧪 Self-test {result['file'].name}: {len(result['content_text'])} ký tự, "
+            f"{len(result['matches'])} matches, {result['elapsed_ms']} ms"
+        )
+    except Exception as e:
+        print(f"❌ Lỗi trong quá trình self-test: {str(e)}")
+
+def print_report(result: Dict[str, Any]):
+    content_text, matches = result["content_text"], result["matches"]
+    print("=" * 60)
+    print("🧪 TEST SENSITIVE DATA DETECTION")
+    print("=" * 60)
+    print(f"📁 File: {result['file'].name}")
+    print(f"📝 Content Length: {len(content_text)} characters")
+    print(f"🎯 Total Matches: {len(matches)}")
+    print(f"⏱️ Elapsed: {result['elapsed_ms']} ms")
+    print()
+
+    if matches:
+        print("🔎 DETECTED SENSITIVE DATA:")
+        line_index = LineIndex(content_text)
+        categories = {}
+        for match in matches:
+            categories.setdefault(match["category"], []).append(match)
+
+        for category, cat_matches in categories.items():
+            print(f"\n📂 {category} ({len(cat_matches)} matches):")
+            for i, match in enumerate(cat_matches, 1):
+                line_num, col_num, line_content = line_index.locate(match["start"])
+                print(f"  {i}. {match['subtype']}: {match['value']} ({match['method']})")
+                print(f"     Position: {match['start']}-{match['end']} (Line {line_num}, Col {col_num})")
+                if "keyword_found" in match:
+                    print(f"     Keyword Found: {match['keyword_found']}")
+                print(f"     Line Content: {line_content.strip()}")
+                print()
+    else:
+        print("✅ No sensitive data detected")
+    print("=" * 60)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run sensitive data detection on sample files")
+    parser.add_argument("files", nargs="*", type=Path, help=f"Documents (default: {SAMPLE_FILE.name})")
+    args = parser.parse_args()
+
+    failed = False
+    for file_path in args.files or [SAMPLE_FILE]:
+        try:
+            print_report(run_self_test(file_path))
+        except Exception as e:
+            print(f"❌ {file_path}: {str(e)}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Scan XLSX/CSV theo cột thay vì chuyển cả sheet thành text
+
+- Đọc row theo stream (openpyxl read-only / csv reader), xử lý từng chunk row bằng pandas
+- Cột có header khớp keyword của rule: áp regex của rule lên cả cột bằng vectorized string operation,
+  header đóng vai trò keyword (method "header+regex" hoặc "header" với rule không có regex)
+- Mọi cột (kể cả cột có header khớp rule): lọc vectorized các cell có chứa keyword, chỉ các cell đó mới chạy
+  rule matching như text; match trùng (row, cột, subtype) với match theo header chỉ báo một lần
+- Match được báo theo sheet / row / column (offset start/end tính trong cell)
+"""
+
+import csv
+import datetime
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from ..config.settings import detection_settings
+from .page_selection import PageSelection
+from .preflight import MIME_XLSX, MIME_CSV
+
+SPREADSHEET_MIME_TYPES = (MIME_XLSX, MIME_CSV)
+METHOD_COLUMNAR = "columnar"
+
+# Giới hạn value của rule không có regex (giống VALUE_PATTERN của text)
+MAX_VALUE_LENGTH = 100
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+def column_letter(index: int) -> str:
+    """Index cột 0-based -> tên cột kiểu Excel (0 -> A, 26 -> AA)"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def _cell_text(value: Any) -> str:
+    """Giá trị cell -> text (số nguyên lưu dạng float không có phần .0)"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+def _iter_xlsx_sheets(file_path: str, selection: Optional[PageSelection]) -> Iterator[Tuple[int, str, Iterator[tuple]]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheets = workbook.worksheets
+        page_numbers = range(1, len(sheets) + 1) if selection is None else selection.select(len(sheets))
+        for page_number in page_numbers:
+            sheet = sheets[page_number - 1]
+            # min_row/min_col = 1 để số thứ tự row/cột khớp với vị trí trong Excel
+            yield page_number, sheet.title, sheet.iter_rows(min_row=1, min_col=1, values_only=True)
+    finally:
+        workbook.close()
+
+def _iter_csv_sheets(file_path: str, selection: Optional[PageSelection]) -> Iterator[Tuple[int, str, Iterator[tuple]]]:
+    if selection is not None:
+        selection.select_unpaged()
+    with open(file_path, "r", encoding="utf-8-sig", errors="replace", newline="") as stream:
+        sample = stream.read(64 * 1024)
+        stream.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        yield 1, "csv", csv.reader(stream, dialect)
+
+def iter_spreadsheet_sheets(file_path: str, mime_type: str, selection: PageSelection = None) -> Iterator[Tuple[int, str, Iterator[tuple]]]:
+    """Yield (page_number, sheet_name, rows) cho XLSX (mỗi sheet 1 page) hoặc CSV (1 page)"""
+    if mime_type == MIME_XLSX:
+        yield from _iter_xlsx_sheets(file_path, selection)
+    else:
+        yield from _iter_csv_sheets(file_path, selection)
+
+def iter_spreadsheet_lines(file_path: str, mime_type: str, selection: PageSelection = None) -> Iterator[Tuple[int, str, Iterator[str]]]:
+    """Text của từng sheet: mỗi row 1 dòng, các cell cách nhau bằng tab (bỏ row rỗng)"""
+    for page_number, sheet_name, rows in iter_spreadsheet_sheets(file_path, mime_type, selection):
+        lines = ("\t".join(_cell_text(value) for value in row).rstrip("\t") for row in rows)
+        yield page_number, sheet_name, (line for line in lines if line.strip())
+
+class SpreadsheetScanner:
+    """
+    Scan spreadsheet theo cột với rule của DetectionService
+    cell_matcher: hàm rule matching trên text (DetectionService.iter_rule_matches)
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], compiled_regex: Dict[str, Any], cell_matcher: Callable[..., Iterator[Dict[str, Any]]]):
+        self.rules = rules
+        self.cell_matcher = cell_matcher
+        # Regex của rule bọc trong 1 group để str.extract lấy toàn bộ phần match ở cột 0
+        self._extract_patterns = {
+            subtype: re.compile(f"({pattern.pattern})") for subtype, pattern in compiled_regex.items()
+        }
+        # Keyword khớp header theo nguyên từ (tránh "dt" khớp trong header bất kỳ)
+        self._header_keywords = [
+            (rule, keyword, re.compile(rf"(?<!\w){re.escape(keyword.lower())}(?!\w)"))
+            for rule in rules for keyword in rule["keywords"]
+        ]
+        # Lọc nhanh cell có chứa keyword bất kỳ (cùng ngữ nghĩa find() của text matching)
+        # Áp lên cột đã lower() thay vì dùng re.IGNORECASE: alternation hàng nghìn ký tự chậm hơn ~25 lần khi ignore case
+        self._keyword_filter = re.compile(
+            "|".join(re.escape(keyword.lower()) for rule in rules for keyword in rule["keywords"])
+        )
+
+    def header_rules(self, header: str, rules: List[Dict[str, Any]] = None) -> List[Tuple[Dict[str, Any], str]]:
+        """Các rule có keyword xuất hiện trong header (mỗi rule lấy keyword đầu tiên khớp)"""
+        header_lower = header.lower()
+        allowed = None if rules is None else {rule["subtype"] for rule in rules}
+        matched, seen = [], set()
+        for rule, keyword, pattern in self._header_keywords:
+            if allowed is not None and rule["subtype"] not in allowed:
+                continue
+            if rule["subtype"] not in seen and pattern.search(header_lower):
+                matched.append((rule, keyword))
+                seen.add(rule["subtype"])
+        return matched
+
+    def iter_chunks(self, file_path: str, mime_type: str, selection: PageSelection = None, report: Dict[str, Any] = None, rules: List[Dict[str, Any]] = None, confirmed_only: bool = False, profile: Any = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Yield (page_number, matches) sau mỗi chunk row, match sắp xếp theo row -> cột
+        Khi hết một sheet, thông tin sheet (số row, cột có header khớp rule, số ký tự) được ghi vào report
+        rules: tập rule cần scan (mặc định toàn bộ)
+        confirmed_only: bỏ qua match chỉ có keyword mà không có value (gate mode)
+        profile: RuleProfile của rule matching trên cell (cột có header khớp rule dùng regex cả cột, không được profile)
+        """
+        chunk_rows = max(detection_settings.spreadsheet_chunk_rows, 1)
+        for page_number, sheet_name, rows in iter_spreadsheet_sheets(file_path, mime_type, selection):
+            sheet = {
+                "name": sheet_name, "rules": rules, "headers": None, "header_row": None,
+                "header_rules": {}, "content_length": 0, "profile": profile
+            }
+            chunk, row_count = [], 0
+            for row_number, row in enumerate(rows, 1):
+                cells = [_cell_text(value) for value in row]
+                row_count = row_number
+                if sheet["headers"] is None:
+                    if not any(cell.strip() for cell in cells):
+                        continue
+                    self._set_header(sheet, row_number, cells)
+                chunk.append((row_number, cells))
+                if len(chunk) >= chunk_rows:
+                    yield page_number, self._scan_chunk(sheet, chunk, confirmed_only)
+                    chunk = []
+            if chunk:
+                yield page_number, self._scan_chunk(sheet, chunk, confirmed_only)
+
+            if report is not None:
+                report["pages"].append({
+                    "page": page_number,
+                    "method": METHOD_COLUMNAR,
+                    "sheet": sheet_name,
+                    "rows": row_count,
+                    "header_row": sheet["header_row"],
+                    "header_columns": {
+                        column_letter(index): [rule["subtype"] for rule, _ in rules]
+                        for index, rules in sheet["header_rules"].items()
+                    },
+                    "content_length": sheet["content_length"]
+                })
+
+    def _set_header(self, sheet: Dict[str, Any], row_number: int, cells: List[str]):
+        sheet["headers"] = cells
+        sheet["header_row"] = row_number
+        for index, header in enumerate(cells):
+            rules = self.header_rules(header, sheet["rules"]) if header.strip() else []
+            if rules:
+                sheet["header_rules"][index] = rules
+
+    def _scan_chunk(self, sheet: Dict[str, Any], chunk: List[Tuple[int, List[str]]], confirmed_only: bool) -> List[Dict[str, Any]]:
+        import pandas as pd
+
+        row_numbers = [row_number for row_number, _ in chunk]
+        frame = pd.DataFrame([cells for _, cells in chunk], index=row_numbers, dtype=object).fillna("")
+        headers = sheet["headers"]
+        matches = []
+
+        for index in frame.columns:
+            column = frame[index]
+            lengths = column.str.len()
+            sheet["content_length"] += int(lengths.sum())
+            location = {
+                "sheet": sheet["name"],
+                "column": column_letter(index),
+                "column_header": headers[index] if index < len(headers) else ""
+            }
+
+            # (row, subtype) đã báo ở cột này: cell pass không báo lại match mà header pass đã có
+            seen = set()
+            header_rules = sheet["header_rules"].get(index)
+            if header_rules:
+                # Bỏ qua chính row header, header là context cho các row bên dưới
+                values = column[column.index != sheet["header_row"]]
+                for rule, keyword in header_rules:
+                    for match in self._scan_header_column(values, rule, keyword, location, index):
+                        seen.add((match["row"], match["subtype"]))
+                        matches.append(match)
+
+            # Chỉ các cell có chứa keyword mới chạy rule matching; row header chỉ lấy match có value
+            # Chạy cả với cột có header khớp rule, để cell chứa dữ liệu của rule khác không bị bỏ sót
+            candidates = column[column.str.lower().str.contains(self._keyword_filter, na=False)]
+            for row_number, cell in candidates.items():
+                is_header = row_number == sheet["header_row"]
+                for match in self.cell_matcher(cell, sheet["rules"], confirmed_only=confirmed_only or is_header, profile=sheet["profile"]):
+                    if (row_number, match["subtype"]) in seen:
+                        continue
+                    matches.append({**match, **location, "row": row_number, "_column_index": index})
+
+        matches.sort(key=lambda match: (match["row"], match["_column_index"]))
+        for match in matches:
+            del match["_column_index"]
+        return matches
+
+    def _scan_header_column(self, values, rule: Dict[str, Any], keyword: str, location: Dict[str, Any], index: int) -> List[Dict[str, Any]]:
+        """Áp regex của rule lên cả cột (header khớp keyword của rule)"""
+        pattern = self._extract_patterns.get(rule["subtype"])
+        if pattern is not None:
+            found = values.str.extract(pattern, expand=True)[0].dropna()
+            method = "header+regex"
+        else:
+            found = values[values.str.strip().str.len() > 0].str.strip().str.slice(0, MAX_VALUE_LENGTH)
+            method = "header"
+
+        results = []
+        for row_number, raw_value, cell in zip(found.index, found.values, values.loc[found.index].values):
+            start = cell.find(raw_value)
+            results.append({
+                "category": rule["category"],
+                "subtype": rule["subtype"],
+                "value": WHITESPACE_PATTERN.sub(" ", raw_value).strip(),
+                "start": start,
+                "end": start + len(raw_value),
+                "method": method,
+                "keyword_found": keyword,
+                **location,
+                "row": row_number,
+                "_column_index": index
+            })
+        return results
@@ -0,0 +1,81 @@
+"""
+Warm-up khi khởi động và trạng thái readiness (GET /ready)
+
+Warm-up chỉ làm các việc rẻ: compile rule / regex và import trước module của các extractor backend,
+để request đầu tiên không phải trả chi phí này. Warm-up chạy ở background thread nên app nhận request
+ngay (/health), /ready trả 503 cho đến khi warm-up xong.
+"""
+
+import threading
+import time
+from importlib import import_module
+from importlib.util import find_spec
+from typing import Any, Callable, Dict, Optional
+from .detection_service import detection_service
+from .extractor_registry import extractor_registry
+
+# Module dùng lazy ngoài các extractor backend (scan XLSX/CSV theo cột)
+EXTRA_WARMUP_MODULES = ("pandas",)
+
+WARMUP_TEXT = "Họ tên: Nguyễn Văn A, số điện thoại: 0912 345 678, stk: 0123456789, email: a@example.com"
+
+class WarmupState:
+    """Trạng thái warm-up của process"""
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self._ready = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def run(self, step: str, function: Callable[[], Any]):
+        start = time.perf_counter()
+        function()
+        self.steps[step] = round((time.perf_counter() - start) * 1000, 2)
+
+    def describe(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None and self.completed_at is not None:
+            elapsed = round((self.completed_at - self.started_at) * 1000, 2)
+        return {"ready": self.ready, "elapsed_ms": elapsed, "steps": self.steps, "error": self.error}
+
+def _compile_rules():
+    """Chạy rule trên một đoạn text ngắn: regex của rule và regex dùng trong matching được compile/cache"""
+    detection_service.detect_sensitive_by_rules(WARMUP_TEXT)
+    detection_service.spreadsheet_scanner.header_rules("Số điện thoại")
+
+def _import_extractors():
+    """Import trước module optional của các extractor backend đã cài"""
+    modules = {module for backend in extractor_registry.backends() for module in backend.requires}
+    modules.update(EXTRA_WARMUP_MODULES)
+    for module in sorted(modules):
+        if find_spec(module) is not None:
+            import_module(module)
+
+def warm_up(state: WarmupState = None) -> WarmupState:
+    """Chạy các bước warm-up, đánh dấu ready khi xong (lỗi được ghi lại, process không ready)"""
+    state = state or warmup_state
+    if state.ready:
+        # Đã warm-up (vd. ở process cha của gunicorn trước khi fork worker)
+        return state
+    state.started_at = time.perf_counter()
+    try:
+        state.run("compile_rules", _compile_rules)
+        state.run("import_extractors", _import_extractors)
+    except Exception as e:
+        state.error = str(e)
+        return state
+    state.completed_at = time.perf_counter()
+    state._ready.set()
+    return state
+
+# Trạng thái warm-up dùng chung trong process
+warmup_state = WarmupState()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Chi phí audit log trên request path so với phần việc được đẩy sang background thread
+
+Tạo text lớn (giống bench_pdf_memory) có nhiều match, rồi với từng DETECT_AUDIT_LOG_LEVEL đo:
+- enqueue: thời gian audit_logger.log_detection() trên thread gọi (request path)
+- format: thời gian build record JSON (to_record + serialize), chạy ở listener thread
+Output của listener được ghi vào /dev/null.
+
+Chạy: python benchmarks/bench_audit_log.py [--pages 200] [--repeat 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add app to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.config.settings import detection_settings
+from app.services.audit_log import audit_logger, AuditEvent, AUDIT_LEVELS
+from app.services.detection_service import detection_service
+from app.services.response_encoder import dumps_json
+from bench_pdf_memory import page_lines
+
+def median_ms(function, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audit logging cost")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    text = "\n".join(line for page in range(1, args.pages + 1) for line in page_lines(page))
+    start = time.perf_counter()
+    matches = detection_service.detect_sensitive_by_rules(text)
+    detect_ms = (time.perf_counter() - start) * 1000
+    print(f"Text: {len(text)} chars, {len(matches)} matches, detection {detect_ms:.1f} ms")
+
+    sys.stdout.flush()
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    results = []
+    try:
+        audit_logger.start()
+        for level in AUDIT_LEVELS:
+            detection_settings.audit_log_level = level
+            enqueue_ms = median_ms(
+                lambda: audit_logger.log_detection("bench.pdf", "application/pdf", 0, len(text), matches, content_text=text),
+                args.repeat
+            )
+            if level == AUDIT_LEVELS[0]:
+                format_ms = 0.0
+            else:
+                event = AuditEvent(level, True, {"filename": "bench.pdf"}, matches, text)
+                format_ms = median_ms(lambda: dumps_json(event.to_record()), args.repeat)
+            results.append((level, enqueue_ms, format_ms))
+        audit_logger.stop()
+        dropped = audit_logger.dropped
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print(f"{'Level':<8} {'Enqueue ms':>11} {'Format ms (background)':>23}")
+    for level, enqueue_ms, format_ms in results:
+        print(f"{level:<8} {enqueue_ms:>11.3f} {format_ms:>23.1f}")
+    print(f"Dropped records: {dropped}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Benchmark các query method của DatabaseService trên dataset của benchmarks/db_dataset.py
+
+Mỗi case ghi lại:
+- median / min ms (như bench_suite.measure)
+- số query (event before_cursor_execute), số statement khác nhau và số lần chạy mỗi statement
+- plan của từng statement: EXPLAIN QUERY PLAN (SQLite) hoặc EXPLAIN (PostgreSQL, --explain-analyze để có thời gian thật),
+  kèm danh sách table bị full scan
+
+User / document dùng trong case chọn theo dataset: user nhiều document nhất (hot), user ở giữa (median), user ít nhất (cold),
+document nhiều risk nhất và các document ngẫu nhiên theo seed.
+Với --baseline, case chậm hơn quá --tolerance hoặc chạy nhiều query hơn baseline bị báo là regression (thoát với mã 1);
+plan đổi (table bị full scan khác đi) được in ra nhưng không làm fail.
+
+Chạy: python benchmarks/db_dataset.py --reset && python benchmarks/bench_db.py [--url ...|--postgres] [--only statistics/]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+from app.models.sensitive_data import Document, DocumentRisk
+from app.services.database_service import database_service
+from benchmarks.bench_suite import _git_commit, measure
+from benchmarks.db_dataset import DEFAULT_URL, create_bench_engine, install_engine, resolve_url, table_counts
+
+DEFAULT_BASELINE = ROOT / "benchmarks" / "db_baseline.json"
+
+class QueryRecorder:
+    """Ghi lại các statement engine chạy trong khối with (statement, params của lần đầu, số lần)"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.counts: Counter = Counter()
+        self.params: Dict[str, Any] = {}
+
+    def _before_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        self.counts[statement] += 1
+        self.params.setdefault(statement, parameters)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+def _full_scans(dialect: str, plan: List[str]) -> List[str]:
+    """Table bị đọc toàn bộ theo plan (SQLite: SCAN <table> không qua index, PostgreSQL: Seq Scan on <table>)"""
+    tables = []
+    for line in plan:
+        line = line.strip().lstrip("->").strip()
+        if dialect == "sqlite" and line.startswith("SCAN ") and "INDEX" not in line:
+            tables.append(line.split()[1])
+        elif dialect == "postgresql" and line.startswith("Seq Scan on "):
+            tables.append(line.split()[3])
+    return sorted(set(tables))
+
+def explain(engine: Engine, statement: str, parameters: Any, analyze: bool = False) -> List[str]:
+    """Plan của một statement với params đã ghi lại"""
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    else:
+        return []
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(prefix + statement, parameters).fetchall()
+    if dialect == "sqlite":
+        # (id, parent, notused, detail): thụt lề theo cấp cha
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return lines
+    return [row[0] for row in rows]
+
+def _is_error(value: Any) -> bool:
+    if isinstance(value, dict):
+        return "error" in value
+    if isinstance(value, list):
+        return any(isinstance(item, dict) and "error" in item for item in value)
+    return False
+
+def pick_subjects(engine: Engine, seed: int, samples: int) -> Dict[str, Any]:
+    """User / document dùng trong các case, chọn theo phân bố thật của dataset"""
+    with engine.connect() as connection:
+        owners = connection.execute(
+            select(Document.owner_user_id, func.count().label("documents"))
+            .group_by(Document.owner_user_id).order_by(func.count().desc(), Document.owner_user_id)
+        ).all()
+        heaviest = connection.execute(
+            select(DocumentRisk.document_id, func.count().label("risks"))
+            .group_by(DocumentRisk.document_id).order_by(func.count().desc(), DocumentRisk.document_id).limit(1)
+        ).first()
+        max_document_id = connection.execute(select(func.max(Document.id))).scalar()
+    if not owners:
+        raise SystemExit("The documents table is empty; fill it with benchmarks/db_dataset.py first")
+    sampler = random.Random(seed)
+    return {
+        "hot_user": {"id": owners[0][0], "documents": owners[0][1]},
+        "median_user": {"id": owners[len(owners) // 2][0], "documents": owners[len(owners) // 2][1]},
+        "cold_user": {"id": owners[-1][0], "documents": owners[-1][1]},
+        "heaviest_document": {"id": heaviest[0], "risks": heaviest[1]} if heaviest else {"id": 1, "risks": 0},
+        "random_documents": [sampler.randint(1, max_document_id) for _ in range(samples)]
+    }
+
+class DatabaseBenchmark:
+    """Chạy các case trên engine đã install, ghi thời gian, số query và plan"""
+
+    def __init__(self, engine: Engine, repeat: int, max_seconds: float, only: Optional[str] = None, explain_analyze: bool = False):
+        self.engine = engine
+        self.repeat = repeat
+        self.max_seconds = max_seconds
+        self.only = only
+        self.explain_analyze = explain_analyze
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def run_case(self, name: str, function: Callable[[], Any]):
+        if self.only and not name.startswith(self.only):
+            return
+        # Lần đầu ghi query (và làm nóng cache của database), sau đó mới đo thời gian
+        with QueryRecorder(self.engine) as recorder:
+            value = function()
+        if _is_error(value):
+            self.results[name] = {"error": str(value)[:500]}
+            print(f"{name:<28} ERROR {str(value)[:200]}")
+            return
+        measured = measure(function, self.repeat, self.max_seconds)
+        measured.pop("value")
+
+        statements = []
+        for statement, count in recorder.counts.most_common():
+            plan = explain(self.engine, statement, recorder.params[statement], self.explain_analyze)
+            statements.append({
+                "sql": " ".join(statement.split()),
+                "count": count,
+                "plan": plan,
+                "full_scans": _full_scans(self.engine.dialect.name, plan)
+            })
+        self.results[name] = {
+            **measured,
+            "queries": recorder.total,
+            "distinct_statements": len(statements),
+            "full_scans": sorted({table for item in statements for table in item["full_scans"]}),
+            # High-water mark RSS của process sau case (tăng khi case tải nhiều row vào ORM)
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "statements": statements
+        }
+        result = self.results[name]
+        print(f"{name:<28} {result['median_ms']:>12.2f} {result['runs']:>5} {result['queries']:>8} {result['max_rss_mb']:>9.0f}  {', '.join(result['full_scans'])}")
+
+    def run(self, subjects: Dict[str, Any], limit: int):
+        print(f"{'Case':<28} {'Median ms':>12} {'Runs':>5} {'Queries':>8} {'RSS MB':>9}  Full scans")
+        hot, median, cold = subjects["hot_user"]["id"], subjects["median_user"]["id"], subjects["cold_user"]["id"]
+        self.run_case("summary/all", lambda: database_service.get_documents_summary(limit=limit))
+        self.run_case("summary/hot_user", lambda: database_service.get_documents_summary(limit=limit, owner_user_id=hot))
+        self.run_case("summary/cold_user", lambda: database_service.get_documents_summary(limit=limit, owner_user_id=cold))
+        self.run_case("analysis/heaviest", lambda: database_service.get_document_analysis(subjects["heaviest_document"]["id"]))
+        documents = itertools.cycle(subjects["random_documents"])
+        self.run_case("analysis/random", lambda: database_service.get_document_analysis(next(documents)))
+        self.run_case("statistics/cold_user", lambda: database_service.get_statistics(cold))
+        self.run_case("statistics/median_user", lambda: database_service.get_statistics(median))
+        self.run_case("statistics/hot_user", lambda: database_service.get_statistics(hot))
+        self.run_case("statistics/all", lambda: database_service.get_statistics())
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """In bảng so sánh với baseline, trả về case chậm hơn quá tolerance hoặc chạy nhiều query hơn"""
+    regressions = []
+    print()
+    print(f"{'Case':<28} {'Baseline ms':>12} {'Current ms':>12} {'Ratio':>7} {'Queries':>11}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None or "error" in previous or "error" in result:
+            print(f"{name:<28} {'-':>12} {result.get('median_ms', 0):>12.2f} {'new' if previous is None else 'error':>7}")
+            continue
+        ratio = result["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1.0
+        notes = []
+        if ratio > 1 + tolerance:
+            notes.append("SLOWER")
+        if result["queries"] > previous["queries"]:
+            notes.append("MORE QUERIES")
+        if notes:
+            regressions.append(name)
+        if result["full_scans"] != previous["full_scans"]:
+            notes.append(f"full scans {previous['full_scans']} -> {result['full_scans']}")
+        queries = f"{previous['queries']} -> {result['queries']}"
+        print(f"{name:<28} {previous['median_ms']:>12.2f} {result['median_ms']:>12.2f} {ratio:>7.2f} {queries:>11}  {', '.join(notes)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time DatabaseService queries and record their query counts and plans")
+    parser.add_argument("--url", help=f"SQLAlchemy URL (default {DEFAULT_URL})")
+    parser.add_argument("--postgres", action="store_true", help="Use the PostgreSQL database from the DB_* settings")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the random documents")
+    parser.add_argument("--samples", type=int, default=20, help="Random documents for analysis/random")
+    parser.add_argument("--limit", type=int, default=50, help="limit passed to get_documents_summary")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Stop repeating a case after this much time")
+    parser.add_argument("--only", help="Only run cases whose name starts with this prefix (e.g. summary/)")
+    parser.add_argument("--explain-analyze", action="store_true", help="PostgreSQL: EXPLAIN (ANALYZE, BUFFERS) instead of EXPLAIN")
+    parser.add_argument("--output", help="Write results, including every statement and plan, as JSON")
+    parser.add_argument("--baseline", help=f"Compare with a stored result file (default {DEFAULT_BASELINE.relative_to(ROOT)} if it exists)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    engine = create_bench_engine(resolve_url(args.url, args.postgres))
+    install_engine(engine)
+    dataset = table_counts(engine)
+    subjects = pick_subjects(engine, args.seed, args.samples)
+    print(f"Dataset: {dataset}")
+    print(f"Subjects: hot user {subjects['hot_user']}, median user {subjects['median_user']}, cold user {subjects['cold_user']}, "
+          f"heaviest document {subjects['heaviest_document']}\n")
+
+    benchmark = DatabaseBenchmark(engine, args.repeat, args.max_seconds, args.only, args.explain_analyze)
+    benchmark.run(subjects, args.limit)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "dialect": engine.dialect.name,
+            "server_version": ".".join(str(part) for part in engine.dialect.server_version_info or ()),
+            "dataset": dataset,
+            "subjects": subjects,
+            "limit": args.limit,
+            "repeat": args.repeat
+        },
+        "results": benchmark.results
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+    baseline_path = Path(args.baseline) if args.baseline else DEFAULT_BASELINE
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        print(f"\nBaseline saved to {baseline_path}")
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        meta = baseline["meta"]
+        print(f"\nBaseline: {baseline_path} (commit {meta.get('commit')}, {meta.get('dialect')}, {meta.get('platform')})")
+        if meta.get("dataset") != dataset or meta.get("dialect") != engine.dialect.name:
+            print(f"Warning: the baseline was recorded on a different dataset ({meta.get('dialect')} {meta.get('dataset')})")
+        regressions = compare(benchmark.results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower or issuing more queries than the baseline")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
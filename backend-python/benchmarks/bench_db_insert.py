@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tốc độ ghi của DatabaseService.save_document_analysis: bulk INSERT (mặc định) so với db.add() từng DocumentRisk
+
+- orm: DB_BULK_INSERT=false và không cache user (query kiểm tra user mỗi lần), db.add() từng DocumentRisk như trước
+- bulk: một bulk INSERT cho mọi risk row, user đã biết được cache
+Mỗi case ghi median ms, rows/s (1 document + N risk) và số statement gửi tới database.
+Mặc định chạy trên SQLite file tạm; với --url / --postgres các document đã ghi được xóa sau khi đo.
+
+Chạy: python benchmarks/bench_db_insert.py [--risks 10 100 2000] [--url ...|--postgres]
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete
+
+from app.config.database import Base, db_settings
+from app.models.sensitive_data import Document, DocumentRisk
+from app.services.database_service import database_service
+from benchmarks.bench_db import QueryRecorder
+from benchmarks.bench_suite import measure
+from benchmarks.db_dataset import TABLES, DatasetGenerator, create_bench_engine, install_engine
+
+BENCH_USER_ID = 1
+MODES = ("orm", "bulk")
+
+def detection_result(count: int, seed: int) -> Dict[str, Any]:
+    generator = DatasetGenerator(users=1, documents=0, seed=seed)
+    return {"regex_detection": generator.regex_results(count), "ai_classification": {"details": []}, "summary": {}}
+
+class InsertBenchmark:
+    """Đo save_document_analysis theo mode và số risk, giữ lại id các document đã ghi để dọn"""
+
+    def __init__(self, engine, repeat: int, max_seconds: float, seed: int):
+        self.engine = engine
+        self.repeat = repeat
+        self.max_seconds = max_seconds
+        self.seed = seed
+        self.document_ids: List[int] = []
+
+    def save(self, mode: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        db_settings.bulk_insert = mode == "bulk"
+        if mode == "orm":
+            database_service._known_user_ids.clear()
+        saved = database_service.save_document_analysis(
+            filename="bench.pdf",
+            mime_type="application/pdf",
+            content_text="Nội dung benchmark",
+            detection_result=result,
+            file_size=1024,
+            owner_user_id=BENCH_USER_ID,
+            uploaded_by="bench"
+        )
+        if not saved["success"]:
+            raise SystemExit(saved["error"])
+        self.document_ids.append(saved["document_id"])
+        return saved
+
+    def run(self, risk_counts: List[int]):
+        print(f"{'Risks':>6} {'Mode':<6} {'Median ms':>12} {'Runs':>5} {'Rows/s':>10} {'Statements':>11} {'Speedup':>8}")
+        for count in risk_counts:
+            result = detection_result(count, self.seed)
+            medians = {}
+            for mode in MODES:
+                # Lần đầu để tạo user / làm nóng, đồng thời đếm statement của một lần ghi
+                self.save(mode, result)
+                with QueryRecorder(self.engine) as recorder:
+                    self.save(mode, result)
+                measured = measure(lambda: self.save(mode, result), self.repeat, self.max_seconds)
+                medians[mode] = measured["median_ms"]
+                rows_per_second = (count + 1) / (measured["median_ms"] / 1000)
+                speedup = f"{medians['orm'] / medians[mode]:.1f}x" if mode != "orm" else ""
+                print(f"{count:>6} {mode:<6} {measured['median_ms']:>12.2f} {measured['runs']:>5} {rows_per_second:>10.0f} {recorder.total:>11} {speedup:>8}")
+
+    def cleanup(self):
+        with self.engine.begin() as connection:
+            for start in range(0, len(self.document_ids), 1000):
+                ids = self.document_ids[start:start + 1000]
+                connection.execute(delete(DocumentRisk).where(DocumentRisk.document_id.in_(ids)))
+                connection.execute(delete(Document).where(Document.id.in_(ids)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Rows per second of save_document_analysis, bulk insert against per-object ORM adds")
+    parser.add_argument("--url", help="SQLAlchemy URL (default: a temporary SQLite file)")
+    parser.add_argument("--postgres", action="store_true", help="Use the PostgreSQL database from the DB_* settings")
+    parser.add_argument("--risks", nargs="+", type=int, default=[10, 100, 2000], help="Risk rows per document")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = db_settings.database_url if args.postgres else args.url or f"sqlite:///{directory}/insert.sqlite"
+        engine = create_bench_engine(url)
+        Base.metadata.create_all(bind=engine, tables=list(TABLES))
+        install_engine(engine)
+        benchmark = InsertBenchmark(engine, args.repeat, args.max_seconds, args.seed)
+        try:
+            benchmark.run(args.risks)
+        finally:
+            benchmark.cleanup()
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
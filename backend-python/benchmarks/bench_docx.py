@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark DOCX extractor: stream XML (app.services.docx_extractor) so với python-docx
+
+Tạo file DOCX lớn (header + paragraph + table), sau đó chạy mỗi extractor
+trong một subprocess riêng để đo thời gian và peak RSS độc lập.
+
+Chạy: python benchmarks/bench_docx.py [--paragraphs 20000] [--table-rows 5000] [--repeat 3]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Any, Iterable, Tuple
+from xml.sax.saxutils import escape
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+
+def rss_kb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+if {extractor!r} == "stream":
+    from app.services.docx_extractor import extract_docx_text as extract
+else:
+    from docx import Document
+    def extract(path):
+        return "\\n".join(paragraph.text for paragraph in Document(path).paragraphs)
+
+baseline = max(rss_kb(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+start = time.perf_counter()
+text = extract({path!r})
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "peak_rss_kb": peak, "delta_rss_kb": peak - baseline, "chars": len(text)}}))
+"""
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/header1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>
+</Types>"""
+
+PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" Target="header1.xml"/>
+</Relationships>"""
+
+W_DECL = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+def _paragraph(text: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+def write_docx(path: Path, blocks: Iterable[Tuple[str, Any]], header_text: str = "Tài liệu nội bộ - Số hotline: 0912 345 678"):
+    """
+    Ghi DOCX có header, mỗi block là ("paragraph", text) hoặc ("table", rows)
+    Ghi trực tiếp XML vào zip theo từng block (python-docx add_paragraph/add_row quá chậm với file lớn)
+    """
+    header = f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:hdr {W_DECL}>' \
+             + _paragraph(header_text) + "</w:hdr>"
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", PACKAGE_RELS)
+        archive.writestr("word/_rels/document.xml.rels", DOCUMENT_RELS)
+        archive.writestr("word/header1.xml", header)
+        with archive.open("word/document.xml", "w", force_zip64=True) as stream:
+            stream.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {W_DECL}><w:body>'.encode("utf-8"))
+            for kind, content in blocks:
+                if kind == "table":
+                    rows = "".join(
+                        "<w:tr>" + "".join(f"<w:tc>{_paragraph(cell)}</w:tc>" for cell in row) + "</w:tr>"
+                        for row in content
+                    )
+                    stream.write(f"<w:tbl>{rows}</w:tbl>".encode("utf-8"))
+                else:
+                    stream.write(_paragraph(content).encode("utf-8"))
+            stream.write(b'<w:sectPr><w:headerReference w:type="default" r:id="rId1"/></w:sectPr></w:body></w:document>')
+
+def build_docx(path: Path, paragraphs: int, table_rows: int):
+    """Tạo DOCX lớn có header, paragraph và table"""
+    blocks = [
+        ("paragraph", f"Đoạn {i}: Khách hàng Nguyễn Văn A, số điện thoại 0912 345 {i % 1000:03d}, "
+                      f"địa chỉ số {i} đường Láng, Hà Nội. Số tài khoản: 0123456789{i % 10}.")
+        for i in range(paragraphs)
+    ]
+    blocks.append(("table", [["Số tài khoản", f"{1000000000 + i}", "Ngân hàng MB"] for i in range(table_rows)]))
+    write_docx(path, blocks)
+
+def run_child(extractor: str, path: Path) -> dict:
+    script = CHILD_SCRIPT.format(root=str(ROOT), extractor=extractor, path=str(path))
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DOCX extractors")
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--table-rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--file", help="Dùng file DOCX có sẵn thay vì tạo file mới")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.file:
+            path = Path(args.file)
+        else:
+            path = Path(tmp_dir) / "large.docx"
+            build_docx(path, args.paragraphs, args.table_rows)
+        print(f"File: {path} ({path.stat().st_size / 1024 / 1024:.1f} MB)")
+
+        print(f"{'Extractor':<12} {'Seconds':>9} {'Peak RSS (MB)':>14} {'RSS delta (MB)':>15} {'Chars':>10}")
+        for extractor in ("python-docx", "stream"):
+            runs = [run_child(extractor, path) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run["seconds"])
+            print(
+                f"{extractor:<12} {best['seconds']:>9.3f} {best['peak_rss_kb'] / 1024:>14.1f}"
+                f" {best['delta_rss_kb'] / 1024:>15.1f} {best['chars']:>10}"
+            )
+
+if __name__ == "__main__":
+    main()
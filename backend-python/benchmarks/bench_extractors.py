@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+So sánh các extractor backend trong registry trên cùng một tập file:
+thời gian extract, số page, số ký tự và số match detection
+
+In ra backend nên cấu hình cho từng format (DETECT_EXTRACTOR_PDF / _DOCX / _XLSX):
+backend nhanh nhất trong số các backend tìm được nhiều match nhất trên tập file
+
+Chạy: python benchmarks/bench_extractors.py [file ...] [--repeat 5]
+Mặc định dùng các file trong files/
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add app to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.detection_service import detection_service
+from app.services.extractor_registry import extractor_registry, FORMAT_NAMES
+from app.services.preflight import sniff_mime_type
+
+FILES_DIR = Path(__file__).resolve().parent.parent / "files"
+
+def run_backend(backend, file_path: Path, repeat: int):
+    """Trả về (median ms, số page, text) của một backend"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages = list(backend.iter_pages(str(file_path)))
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations), len(pages), "".join(text for _, text in pages)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extractor backends")
+    parser.add_argument("files", nargs="*", help="Documents (default: files/*)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    files = [Path(path) for path in args.files] or sorted(path for path in FILES_DIR.iterdir() if path.is_file())
+
+    # totals[format][backend] = [tổng ms, tổng match]
+    totals = defaultdict(lambda: defaultdict(lambda: [0.0, 0]))
+    print(f"{'File':<30} {'Extractor':<14} {'Pages':>5} {'ms':>9} {'Chars':>8} {'Matches':>7}")
+    for file_path in files:
+        mime_type = sniff_mime_type(str(file_path))
+        if mime_type is None:
+            continue
+        for info in extractor_registry.describe()["extractors"]:
+            if mime_type not in info["mime_types"] or not info["available"]:
+                continue
+            backend = extractor_registry.get(info["name"])
+            median_ms, pages, text = run_backend(backend, file_path, args.repeat)
+            matches = len(detection_service.detect_sensitive_by_rules(text))
+            totals[FORMAT_NAMES[mime_type]][backend.name][0] += median_ms
+            totals[FORMAT_NAMES[mime_type]][backend.name][1] += matches
+            print(f"{file_path.name:<30} {backend.name:<14} {pages:>5} {median_ms:>9.1f} {len(text):>8} {matches:>7}")
+
+    print()
+    print("Suggested deployment settings:")
+    for format_name, backends in totals.items():
+        best_matches = max(matches for _, matches in backends.values())
+        candidates = {name: total for name, total in backends.items() if total[1] == best_matches}
+        fastest = min(candidates, key=lambda name: candidates[name][0])
+        print(f"DETECT_EXTRACTOR_{format_name.upper()}={fastest}  # {candidates[fastest][0]:.1f} ms, {best_matches} matches")
+
+if __name__ == "__main__":
+    main()
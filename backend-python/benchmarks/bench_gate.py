@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark gate mode so với full scan trên các file mẫu trong files/
+
+Full scan = extract toàn bộ document + detect_sensitive_by_rules (không tính logging)
+Gate = gate_document với targets mặc định (IDENTIFIABLE) hoặc --targets
+
+Chạy: python benchmarks/bench_gate.py [--repeat 20] [--targets INTERNAL,PHONE]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add app to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.detection_service import detection_service
+
+FILES_DIR = Path(__file__).resolve().parent.parent / "files"
+MIME_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+def measure(func, repeat: int) -> float:
+    """Chạy func `repeat` lần, trả về median (ms)"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gate mode vs full scan")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--targets", default="", help="Comma-separated categories/subtypes")
+    args = parser.parse_args()
+    targets = [target for target in args.targets.split(",") if target.strip()]
+
+    print(f"{'File':<30} {'Full scan (ms)':>15} {'Gate (ms)':>10} {'Speedup':>8}  Verdict")
+    for file_path in sorted(FILES_DIR.iterdir()):
+        mime_type = MIME_TYPES.get(file_path.suffix.lower())
+        if not mime_type:
+            continue
+
+        def full_scan():
+            text = detection_service.process_file(str(file_path), mime_type)
+            return detection_service.detect_sensitive_by_rules(text)
+
+        def gate():
+            return detection_service.gate_document(str(file_path), file_path.name, mime_type, targets)
+
+        full_ms = measure(full_scan, args.repeat)
+        gate_ms = measure(gate, args.repeat)
+        verdict = gate()
+        print(
+            f"{file_path.name:<30} {full_ms:>15.2f} {gate_ms:>10.2f} {full_ms / gate_ms:>7.1f}x"
+            f"  blocked={verdict['blocked']} pages_scanned={verdict['pages_scanned']}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Chi phí ghi metrics trên request path (app/services/metrics.py)
+
+- Thời gian mỗi thao tác: Histogram.observe, stage timer, Counter.inc, timed_iter (mỗi item), record_results
+- So sánh với một request POST /detect/text (text ngắn, gọi qua TestClient) và rule trên tài liệu nhiều page
+  (giống bench_pdf_memory): một request ghi khoảng REQUEST_OPERATIONS thao tác metrics (middleware 4,
+  byte/document 2, stage timer 2-4, match theo subtype)
+
+Chạy: python benchmarks/bench_metrics.py [--iterations 200000] [--pages 50]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add app to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.detection_service import detection_service
+from app.services.metrics import DetectionMetrics, STAGE_DETECTION
+from bench_pdf_memory import page_lines
+
+REQUEST_OPERATIONS = 12
+
+def per_call_ns(function, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+def median_ms(function, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metrics overhead")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--pages", type=int, default=50)
+    args = parser.parse_args()
+
+    metrics = DetectionMetrics()
+    subtypes = Counter({"Số điện thoại": 3, "Email": 1})
+
+    def stage_timer():
+        with metrics.stage(STAGE_DETECTION, "application/pdf"):
+            pass
+
+    items = list(range(1000))
+    def timed_iter():
+        for _ in metrics.timed_iter(items, STAGE_DETECTION, "application/pdf"):
+            pass
+
+    operations = [
+        ("Histogram.observe", lambda: metrics.observe_stage(STAGE_DETECTION, "application/pdf", 0.0123)),
+        ("stage timer", stage_timer),
+        ("Counter.inc", lambda: metrics.documents.inc("application/pdf")),
+        ("record_results (2 subtypes)", lambda: metrics.record_results("application/pdf", 3, subtypes)),
+    ]
+    print(f"{'Operation':<30} {'ns/call':>9}")
+    costs = []
+    for name, function in operations:
+        costs.append(per_call_ns(function, args.iterations))
+        print(f"{name:<30} {costs[-1]:>9.0f}")
+    plain_ns = per_call_ns(lambda: [None for _ in items], args.iterations // 1000) / len(items)
+    timed_ns = per_call_ns(timed_iter, args.iterations // 1000) / len(items)
+    print(f"{'timed_iter (per item)':<30} {timed_ns - plain_ns:>9.0f}")
+
+    request_ns = REQUEST_OPERATIONS * max(costs)
+    text = "Họ tên: Nguyễn Văn A, số điện thoại: 0912 345 678, email: a@example.com"
+    document = "\n".join(line for page in range(1, args.pages + 1) for line in page_lines(page))
+    print()
+    print(f"Metrics cost per request (upper bound): {request_ns / 1000:.1f} us ({REQUEST_OPERATIONS} x slowest operation)")
+    print(f"{'Workload':<30} {'Median ms':>10} {'Metrics share':>14}")
+    client = TestClient(app)
+    headers = {"content-type": "text/plain; charset=utf-8"}
+    for name, function in (
+        ("POST /detect/text (short)", lambda: client.post("/detect/text", content=text.encode("utf-8"), headers=headers)),
+        ("analyze_text (short text)", lambda: detection_service.analyze_text(text)),
+        (f"rules on {args.pages}-page document", lambda: detection_service.detect_sensitive_by_rules(document)),
+    ):
+        elapsed_ms = median_ms(function, 50)
+        print(f"{name:<30} {elapsed_ms:>10.3f} {request_ns / 1e6 / elapsed_ms:>13.3%}")
+
+if __name__ == "__main__":
+    main()
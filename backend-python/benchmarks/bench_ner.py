@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Kiểm tra và benchmark NER theo window (app.services.ner) với một model BERT rất nhỏ tạo tại chỗ
+(trọng số ngẫu nhiên với seed cố định, vocab lấy từ chính text benchmark) hoặc một model local (--model)
+
+Kiểm tra:
+- text ngắn (1 window): kết quả giống hệt gọi pipeline trực tiếp
+- text dài: entity phủ đến cuối text (gọi pipeline một lần bị truncate ở model_max_length),
+  text[start:end] của mỗi entity khớp với token của entity
+Sau đó đo thời gian theo batch size. Exit code 1 nếu một kiểm tra không đạt.
+
+Chạy: python benchmarks/bench_ner.py [--chars 50000] [--batch-sizes 1 8 32] [--threads 2] [--model path]
+Cần transformers và torch
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add app to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.config.settings import detection_settings
+from app.services.ner import NerRunner, load_ner_pipeline
+
+LABELS = ["O", "B-PER", "I-PER", "B-LOC", "I-LOC"]
+# Model nhỏ: window ngắn để text benchmark được chia thành nhiều window
+TINY_MAX_LENGTH = 128
+
+def document_text(chars: int) -> str:
+    lines, line = [], 0
+    while sum(len(text) + 1 for text in lines) < chars:
+        lines.append(
+            f"Dòng {line}: Khách hàng Nguyễn Văn An, địa chỉ Hà Nội, làm việc tại Công ty ABC, "
+            f"liên hệ Trần Thị Bình ở Đà Nẵng."
+        )
+        line += 1
+    return "\n".join(lines)[:chars]
+
+def build_tiny_model(directory: Path, text: str) -> str:
+    """Tạo BERT token classification 2 layer, hidden 32, vocab là các token của text"""
+    import torch
+    from transformers import BertConfig, BertForTokenClassification, BertTokenizerFast
+    from transformers.models.bert.tokenization_bert import BasicTokenizer
+
+    words = sorted(set(BasicTokenizer(do_lower_case=False, strip_accents=False).tokenize(text)))
+    (directory / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words), encoding="utf-8")
+    tokenizer = BertTokenizerFast(
+        vocab_file=str(directory / "vocab.txt"), do_lower_case=False, strip_accents=False,
+        model_max_length=TINY_MAX_LENGTH
+    )
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=tokenizer.vocab_size, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=TINY_MAX_LENGTH,
+        id2label=dict(enumerate(LABELS)), label2id={label: index for index, label in enumerate(LABELS)}
+    )
+    BertForTokenClassification(config).eval().save_pretrained(directory)
+    tokenizer.save_pretrained(directory)
+    return str(directory)
+
+def check_offsets(text: str, entities) -> int:
+    """Số entity có text[start:end] không khớp với token của entity"""
+    return sum(1 for entity in entities if text[entity["start"]:entity["end"]] != entity["word"].removeprefix("##"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark windowed NER")
+    parser.add_argument("--chars", type=int, default=50000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--threads", type=int, default=0, help="DETECT_NER_THREADS (0 = mặc định của torch)")
+    parser.add_argument("--model", help="Thư mục model local thay cho model nhỏ tạo tại chỗ")
+    args = parser.parse_args()
+
+    detection_settings.ner_threads = args.threads
+    text = document_text(args.chars)
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = args.model or build_tiny_model(Path(tmp_dir), text)
+        start = time.perf_counter()
+        runner = NerRunner(model_path, load_ner_pipeline)
+        pipeline = runner.pipeline
+        print(f"Model: {model_path if args.model else 'tiny stand-in'} loaded in {time.perf_counter() - start:.2f}s, "
+              f"{runner.window_tokens()} tokens per window, overlap {detection_settings.ner_window_overlap}")
+
+        # Text ngắn: 1 window, phải giống gọi pipeline trực tiếp
+        short_text = text[:200]
+        direct = [{key: value for key, value in entity.items() if key != "index"} for entity in pipeline(short_text)]
+        for entity in direct:
+            entity["score"] = float(entity["score"])
+        if runner(short_text) != direct:
+            failures.append("single window result differs from direct pipeline call")
+
+        # Text dài: gọi trực tiếp bị truncate, chạy theo window phủ hết text
+        truncated = pipeline(text)
+        covered_direct = max((entity["end"] for entity in truncated), default=0)
+        print(f"Text: {len(text)} chars, {len(runner.windows(text))} windows; "
+              f"single call covers {covered_direct} chars ({len(truncated)} entities)")
+
+        print(f"{'Batch':>5} {'Seconds':>8} {'Entities':>9} {'Covered':>8} {'Bad offsets':>12}")
+        for batch_size in args.batch_sizes:
+            detection_settings.ner_batch_size = batch_size
+            start = time.perf_counter()
+            entities = runner(text)
+            elapsed = time.perf_counter() - start
+            covered = max((entity["end"] for entity in entities), default=0)
+            bad_offsets = check_offsets(text, entities)
+            print(f"{batch_size:>5} {elapsed:>8.2f} {len(entities):>9} {covered:>8} {bad_offsets:>12}")
+            if bad_offsets:
+                failures.append(f"batch {batch_size}: {bad_offsets} entities with wrong offsets")
+            if entities and covered < len(text) - 200:
+                failures.append(f"batch {batch_size}: entities stop at {covered} of {len(text)} chars")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Kiểm tra RAM khi extract PDF dài không tăng theo số page
+
+Tạo PDF tổng hợp với số page tăng dần, mỗi lần extract chạy trong một subprocess riêng
+và đo peak RSS tăng thêm so với lúc trước khi mở file. Thoát với mã 1 nếu peak RSS của
+file lớn nhất vượt file nhỏ nhất quá --tolerance-mb (RAM tăng theo số page).
+
+Chạy: python benchmarks/bench_pdf_memory.py [--pages 20 80 320] [--mode full|fast] [--tolerance-mb 32]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.synthetic_pdf import LINES_PER_PAGE, write_text_pdf
+
+CHILD_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from app.services.detection_service import detection_service
+from app.services.memory import current_rss_bytes
+
+baseline = max(current_rss_bytes(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+start = time.perf_counter()
+pages = chars = 0
+for _, text in detection_service.iter_pdf_pages({path!r}, pdf_mode={mode!r}):
+    pages += 1
+    chars += len(text)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print(json.dumps({{"seconds": elapsed, "pages": pages, "chars": chars, "delta_rss_bytes": max(peak - baseline, 0)}}))
+"""
+
+def page_lines(page_number: int):
+    return [
+        f"Trang {page_number} dòng {line}: Khách hàng Nguyễn Văn A, Số điện thoại: 0912 345 {line:03d}, "
+        f"Số tài khoản: 01234567{line:02d}"
+        for line in range(LINES_PER_PAGE)
+    ]
+
+def run_child(path: Path, mode: str) -> dict:
+    script = CHILD_SCRIPT.format(root=str(ROOT), path=str(path), mode=mode)
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Check PDF extraction memory stays flat with page count")
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 80, 320])
+    parser.add_argument("--mode", choices=["full", "fast"], default="full")
+    parser.add_argument("--tolerance-mb", type=float, default=32)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'Pages':>6} {'Seconds':>9} {'ms/page':>8} {'RSS delta (MB)':>15} {'Chars':>10}")
+        for page_count in sorted(args.pages):
+            path = Path(tmp_dir) / f"synthetic_{page_count}.pdf"
+            write_text_pdf(path, (page_lines(page) for page in range(1, page_count + 1)))
+            result = run_child(path, args.mode)
+            results.append(result)
+            print(
+                f"{result['pages']:>6} {result['seconds']:>9.2f} {result['seconds'] * 1000 / result['pages']:>8.1f}"
+                f" {result['delta_rss_bytes'] / 1024 / 1024:>15.1f} {result['chars']:>10}"
+            )
+
+    growth_mb = (results[-1]["delta_rss_bytes"] - results[0]["delta_rss_bytes"]) / 1024 / 1024
+    if growth_mb > args.tolerance_mb:
+        print(f"FAIL: peak RSS grows {growth_mb:.1f} MB from {results[0]['pages']} to {results[-1]['pages']} pages (tolerance {args.tolerance_mb} MB)")
+        sys.exit(1)
+    print(f"OK: peak RSS growth {growth_mb:.1f} MB from {results[0]['pages']} to {results[-1]['pages']} pages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+So sánh PDF extraction mode "full" (pdfplumber) và "fast" (pdfminer + fallback):
+thời gian extract, số page fallback và độ khớp của kết quả detection
+
+Chạy: python benchmarks/bench_pdf_modes.py [file.pdf ...] [--repeat 5]
+Mặc định dùng các file PDF trong files/
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add app to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.detection_service import detection_service
+from app.services.pdf_extractor import PDF_MODES
+
+FILES_DIR = Path(__file__).resolve().parent.parent / "files"
+
+def run_mode(file_path: Path, mode: str, repeat: int):
+    """Trả về (median ms, report, matches) của một mode"""
+    durations = []
+    for _ in range(repeat):
+        report = {"pages": []}
+        start = time.perf_counter()
+        text = "".join(text for _, text in detection_service.iter_pdf_pages(str(file_path), pdf_mode=mode, report=report))
+        durations.append((time.perf_counter() - start) * 1000)
+    matches = detection_service.detect_sensitive_by_rules(text)
+    return statistics.median(durations), report, matches
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction modes")
+    parser.add_argument("files", nargs="*", help="PDF files (default: files/*.pdf)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    files = [Path(path) for path in args.files] or sorted(FILES_DIR.glob("*.pdf"))
+
+    print(f"{'File':<30} {'Mode':<5} {'Pages':>5} {'ms':>9} {'ms/page':>8} {'Fallback':>8} {'Matches':>7}")
+    for file_path in files:
+        results = {mode: run_mode(file_path, mode, args.repeat) for mode in PDF_MODES}
+        for mode, (median_ms, report, matches) in results.items():
+            pages = len(report["pages"])
+            fallback = sum(1 for page in report["pages"] if "fallback_reason" in page)
+            print(
+                f"{file_path.name:<30} {mode:<5} {pages:>5} {median_ms:>9.1f}"
+                f" {median_ms / max(pages, 1):>8.1f} {fallback:>8} {len(matches):>7}"
+            )
+
+        full_values = {(match["subtype"], match["value"]) for match in results["full"][2]}
+        fast_values = {(match["subtype"], match["value"]) for match in results["fast"][2]}
+        print(f"{'':<30} agreement: missing in fast={len(full_values - fast_values)}, extra in fast={len(fast_values - full_values)}")
+
+if __name__ == "__main__":
+    main()
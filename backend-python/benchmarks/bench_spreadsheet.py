@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark scan XLSX/CSV: scan theo cột (app.services.spreadsheet_scanner) so với cách cũ
+của DocumentProcessor (pd.read_excel(...).to_string() rồi detect trên text)
+
+Tạo file export lớn (họ tên, số điện thoại, số tài khoản, ghi chú) và chạy mỗi cách
+trong một subprocess riêng để đo thời gian và peak RSS độc lập.
+
+Chạy: python benchmarks/bench_spreadsheet.py [--rows 100000] [--format xlsx|csv] [--skip-baseline]
+"""
+
+import argparse
+import csv
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEADER = ["STT", "Họ tên", "Số điện thoại", "Số tài khoản", "Ghi chú"]
+
+CHILD_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from app.services.detection_service import detection_service
+from app.services.preflight import MIME_XLSX, MIME_CSV
+
+mime_type = MIME_XLSX if {path!r}.endswith(".xlsx") else MIME_CSV
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {method!r} == "columnar":
+    matches = [
+        match for _, chunk in detection_service.iter_spreadsheet_chunks({path!r}, mime_type) for match in chunk
+    ]
+else:
+    import pandas as pd
+    frame = pd.read_excel({path!r}) if mime_type == MIME_XLSX else pd.read_csv({path!r}, sep=None, engine="python")
+    matches = detection_service.detect_sensitive_by_rules(frame.to_string())
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+subtypes = {{}}
+for match in matches:
+    subtypes[match["subtype"]] = subtypes.get(match["subtype"], 0) + 1
+print(json.dumps({{"seconds": elapsed, "peak_rss_kb": peak, "delta_rss_kb": peak - baseline, "matches": len(matches), "subtypes": subtypes}}))
+"""
+
+def rows(count: int):
+    for i in range(count):
+        note = f"Liên hệ hotline 0987 654 {i % 1000:03d}" if i % 10 == 0 else ""
+        yield [i + 1, f"Nguyễn Văn {i}", f"09{i % 100000000:08d}", f"{1000000000 + i}", note]
+
+def build_file(path: Path, count: int):
+    """Tạo file export lớn (openpyxl write-only để không giữ cả sheet trong RAM)"""
+    if path.suffix == ".xlsx":
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("KhachHang")
+        sheet.append(HEADER)
+        for row in rows(count):
+            sheet.append(row)
+        workbook.save(path)
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(HEADER)
+            writer.writerows(rows(count))
+
+def run_child(method: str, path: Path) -> dict:
+    script = CHILD_SCRIPT.format(root=str(ROOT), method=method, path=str(path))
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark spreadsheet scanning")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--skip-baseline", action="store_true", help="Chỉ chạy scan theo cột")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / f"export.{args.format}"
+        build_file(path, args.rows)
+        print(f"File: {path.name}, {args.rows} rows ({path.stat().st_size / 1024 / 1024:.1f} MB)")
+
+        methods = ["columnar"] if args.skip_baseline else ["to_string", "columnar"]
+        print(f"{'Method':<10} {'Seconds':>9} {'Peak RSS (MB)':>14} {'RSS delta (MB)':>15} {'Matches':>8}  Subtypes")
+        for method in methods:
+            result = run_child(method, path)
+            print(
+                f"{method:<10} {result['seconds']:>9.2f} {result['peak_rss_kb'] / 1024:>14.1f}"
+                f" {result['delta_rss_kb'] / 1024:>15.1f} {result['matches']:>8}  {result['subtypes']}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Bộ benchmark detection trên corpus tiếng Việt tổng hợp (benchmarks/corpus.py), so sánh với baseline
+
+Case (tên dạng nhóm/.../size):
+- extract/<backend>/<format>/<size>: mỗi extractor backend đã cài cho PDF, DOCX (đọc hết các page)
+- rules/<size>: detect_sensitive_by_rules trên text
+- classify/<size>: DataClassifier.classify_sensitive_data trên text
+- analyze/<format>/<size>: end-to-end như /detect (pre-flight + analyze_document), TXT qua analyze_text
+  PDF của corpus không có dấu: analyze/pdf có thêm reference_matches (analyze_text trên pdf_reference_text)
+
+Mỗi case chạy tối đa --repeat lần (dừng sớm khi tổng thời gian vượt --max-seconds), lấy median.
+Kết quả ghi ra JSON (--output); với --baseline, case chậm hơn baseline quá --tolerance bị báo là regression
+và script thoát với mã 1. Baseline chỉ có ý nghĩa trên cùng máy / cùng cấu hình (xem meta trong file).
+
+Chạy: python benchmarks/bench_suite.py [--sizes 1kb 100kb 1mb] [--formats pdf docx txt] [--seed 42]
+      [--output results.json] [--baseline benchmarks/baseline.json] [--save-baseline] [--only rules/]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from app.config.settings import detection_settings
+from app.services.data_classifier import classifier
+from app.services.detection_service import detection_service
+from app.services.extractor_registry import extractor_registry
+from app.services.preflight import run_preflight, MIME_PDF, MIME_DOCX
+from app.services.warmup import warm_up
+from benchmarks.corpus import FORMATS, format_size, generate_text, parse_size, pdf_reference_text, write_corpus
+
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+FORMAT_MIME_TYPES = {"pdf": MIME_PDF, "docx": MIME_DOCX}
+
+def measure(function: Callable[[], Any], repeat: int, max_seconds: float) -> Dict[str, Any]:
+    """Chạy function tối đa repeat lần (ít nhất 1), trả về median/min ms và kết quả của lần chạy cuối"""
+    durations = []
+    total = 0.0
+    value = None
+    while len(durations) < repeat and (not durations or total < max_seconds):
+        start = time.perf_counter()
+        value = function()
+        elapsed = time.perf_counter() - start
+        durations.append(elapsed * 1000)
+        total += elapsed
+    return {
+        "median_ms": round(statistics.median(durations), 3),
+        "min_ms": round(min(durations), 3),
+        "runs": len(durations),
+        "value": value
+    }
+
+def _extract_all(backend, path: Path) -> int:
+    return sum(len(text) for _, text in backend.iter_pages(str(path)))
+
+def _analyze_document(path: Path) -> int:
+    preflight = run_preflight(str(path), None)
+    result = detection_service.analyze_document(
+        file_path=str(path),
+        filename=path.name,
+        mime_type=preflight["mime_type"],
+        file_size=path.stat().st_size,
+        preflight=preflight
+    )
+    return result["total_matches"]
+
+class BenchmarkSuite:
+    """Tạo corpus, chạy các case và ghi kết quả"""
+
+    def __init__(self, corpus_dir: Path, seed: int, repeat: int, max_seconds: float, only: Optional[str] = None):
+        self.corpus_dir = corpus_dir
+        self.seed = seed
+        self.repeat = repeat
+        self.max_seconds = max_seconds
+        self.only = only
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.corpus: Dict[str, Dict[str, Any]] = {}
+
+    def document(self, format_name: str, size: int) -> Path:
+        """File corpus theo (seed, size, format), tạo lại chỉ khi chưa có trong corpus_dir"""
+        path = self.corpus_dir / f"corpus-{self.seed}-{format_size(size)}.{format_name}"
+        manifest_path = path.with_name(path.name + ".json")
+        if path.exists() and manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text())
+        else:
+            manifest = write_corpus(path, format_name, size, self.seed)
+            manifest_path.write_text(json.dumps(manifest, ensure_ascii=False))
+        self.corpus[path.name] = manifest
+        return path
+
+    def run_case(self, name: str, function: Callable[[], Any], text_bytes: int, file_bytes: int = None, value_name: str = None, reference: Optional[int] = None):
+        if self.only and not name.startswith(self.only):
+            return
+        measured = measure(function, self.repeat, self.max_seconds)
+        value = measured.pop("value")
+        result = {**measured, "text_bytes": text_bytes}
+        if file_bytes is not None:
+            result["file_bytes"] = file_bytes
+        result["mb_per_s"] = round(text_bytes / 1024 / 1024 / (measured["median_ms"] / 1000), 3) if measured["median_ms"] else None
+        if value_name:
+            result[value_name] = value
+        if reference is not None:
+            result[f"reference_{value_name}"] = reference
+        self.results[name] = result
+        note = f" (reference {reference})" if reference is not None else ""
+        print(f"{name:<42} {result['median_ms']:>12.2f} {result['runs']:>5} {result['mb_per_s'] or 0:>10.2f}  {value_name or ''} {value if value_name else ''}{note}")
+
+    def run(self, sizes: List[int], formats: List[str]):
+        print(f"{'Case':<42} {'Median ms':>12} {'Runs':>5} {'MB/s':>10}")
+        for size in sizes:
+            label = format_size(size)
+            text = generate_text(size, self.seed)
+            text_bytes = len(text.encode("utf-8"))
+            self.run_case(f"rules/{label}", lambda: len(detection_service.detect_sensitive_by_rules(text)), text_bytes, value_name="matches")
+            self.run_case(f"classify/{label}", lambda: len(classifier.classify_sensitive_data(text)["detected_types"]), text_bytes, value_name="detected_types")
+            if "txt" in formats:
+                self.run_case(f"analyze/txt/{label}", lambda: detection_service.analyze_text(text)["total_matches"], text_bytes, value_name="matches")
+            del text
+
+            for format_name in formats:
+                mime_type = FORMAT_MIME_TYPES.get(format_name)
+                if mime_type is None:
+                    continue
+                path = self.document(format_name, size)
+                manifest = self.corpus[path.name]
+                for backend in extractor_registry.backends():
+                    if mime_type in backend.mime_types and backend.is_available():
+                        self.run_case(
+                            f"extract/{backend.name}/{format_name}/{label}",
+                            lambda: _extract_all(backend, path),
+                            manifest["text_bytes"], manifest["file_bytes"], value_name="chars"
+                        )
+                # PDF không dấu: số match chỉ so được với chính text trong PDF
+                reference = None
+                if manifest.get("accent_free", format_name == "pdf"):
+                    reference = detection_service.analyze_text(pdf_reference_text(size, self.seed))["total_matches"]
+                self.run_case(
+                    f"analyze/{format_name}/{label}", lambda: _analyze_document(path),
+                    manifest["text_bytes"], manifest["file_bytes"], value_name="matches", reference=reference
+                )
+
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """In bảng so sánh median với baseline, trả về danh sách case chậm hơn quá tolerance"""
+    regressions = []
+    print()
+    print(f"{'Case':<42} {'Baseline ms':>12} {'Current ms':>12} {'Ratio':>7}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<42} {'-':>12} {result['median_ms']:>12.2f} {'new':>7}")
+            continue
+        ratio = result["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1.0
+        notes = []
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            notes.append("REGRESSION")
+        for field in ("matches", "chars", "detected_types"):
+            if field in result and field in previous and result[field] != previous[field]:
+                notes.append(f"{field} {previous[field]} -> {result[field]}")
+        print(f"{name:<42} {previous['median_ms']:>12.2f} {result['median_ms']:>12.2f} {ratio:>7.2f}  {', '.join(notes)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection benchmark suite on a seeded synthetic Vietnamese corpus")
+    parser.add_argument("--sizes", nargs="+", default=["1kb", "100kb", "1mb"], help="Text size per document, 1kb .. 100mb")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Stop repeating a case after this much time")
+    parser.add_argument("--only", help="Only run cases whose name starts with this prefix (e.g. rules/, extract/pdfplumber)")
+    parser.add_argument("--corpus-dir", help="Keep generated documents here and reuse them on later runs")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help=f"Compare with a stored result file (default {DEFAULT_BASELINE.relative_to(ROOT)} if it exists)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # Audit log / rule profile không tính vào kết quả
+    detection_settings.audit_log_level = "off"
+    detection_settings.rule_profile_sample_rate = 0.0
+    warm_up()
+
+    sizes = [parse_size(size) for size in args.sizes]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = Path(args.corpus_dir) if args.corpus_dir else Path(tmp_dir)
+        corpus_dir.mkdir(parents=True, exist_ok=True)
+        suite = BenchmarkSuite(corpus_dir, args.seed, args.repeat, args.max_seconds, args.only)
+        suite.run(sizes, args.formats)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "sizes": [format_size(size) for size in sizes],
+            "formats": args.formats,
+            "pdf_accent_free": True,
+            "repeat": args.repeat
+        },
+        "corpus": suite.corpus,
+        "results": suite.results
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+    baseline_path = Path(args.baseline) if args.baseline else DEFAULT_BASELINE
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        print(f"\nBaseline saved to {baseline_path}")
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        print(f"\nBaseline: {baseline_path} (commit {baseline['meta'].get('commit')}, {baseline['meta'].get('platform')})")
+        regressions = compare(suite.results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Throughput của POST /detect/text theo số worker gunicorn (gunicorn.conf.py)
+
+Với mỗi số worker: chạy gunicorn (WEB_CONCURRENCY=N) trên một port trống, chờ GET /ready,
+gửi request song song từ --clients thread trong --seconds giây, báo req/s và tỉ lệ so với 1 worker.
+Detection là CPU-bound nên throughput chỉ tăng khi còn core trống (xem cột CPUs).
+--save-baseline ghi kết quả kèm số core của máy vào workers_baseline.json (so sánh giữa các máy / commit).
+
+Chạy: python benchmarks/bench_workers.py [--workers 1,2,4] [--clients 8] [--seconds 10] [--pages 2] [--save-baseline]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench_pdf_memory import page_lines
+from bench_suite import _git_commit
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = ROOT / "benchmarks" / "workers_baseline.json"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_ready(port: int, timeout: float = 60) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/ready")
+            if connection.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+def run_load(port: int, body: bytes, clients: int, seconds: float):
+    """Mỗi thread giữ một keep-alive connection, trả về (số request, latency ms, số lỗi)"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                connection.request("POST", "/detect/text", body, {"Content-Type": "text/plain; charset=utf-8"})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except OSError:
+                connection.close()
+                ok = False
+            if ok:
+                local.append((time.perf_counter() - start) * 1000)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), latencies, errors[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput per gunicorn worker count")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--output", help=f"Result file for --save-baseline (default {DEFAULT_BASELINE.relative_to(ROOT)})")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results and the host core count to the baseline file")
+    args = parser.parse_args()
+
+    body = "\n".join(line for page in range(1, args.pages + 1) for line in page_lines(page)).encode("utf-8")
+    print(f"Payload: {len(body)} bytes, {args.clients} clients, {args.seconds:.0f} s per run, CPUs: {os.cpu_count()}")
+    print(f"{'Workers':>7} {'Requests':>9} {'Req/s':>8} {'Scaling':>8} {'p50 ms':>8} {'p95 ms':>8} {'Errors':>7}")
+
+    baseline = None
+    results = {}
+    for workers in [int(value) for value in args.workers.split(",")]:
+        port = free_port()
+        env = dict(
+            os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port),
+            GUNICORN_MAX_REQUESTS="0", DETECT_AUDIT_LOG_LEVEL="off"
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "app.main:app"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            if not wait_ready(port):
+                print(f"{workers:>7} gunicorn not ready")
+                continue
+            # /ready chỉ báo một worker đã sẵn sàng, chờ thêm để master fork đủ worker
+            time.sleep(1 + 0.2 * workers)
+            count, latencies, errors = run_load(port, body, args.clients, args.seconds)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+        rate = count / args.seconds
+        baseline = baseline or rate
+        quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else [0.0] * 19
+        print(
+            f"{workers:>7} {count:>9} {rate:>8.1f} {rate / baseline:>7.2f}x "
+            f"{quantiles[9]:>8.1f} {quantiles[18]:>8.1f} {errors:>7}"
+        )
+        results[str(workers)] = {
+            "requests": count,
+            "req_per_s": round(rate, 1),
+            "scaling": round(rate / baseline, 2),
+            "p50_ms": round(quantiles[9], 1),
+            "p95_ms": round(quantiles[18], 1),
+            "errors": errors
+        }
+
+    if args.save_baseline:
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "endpoint": "POST /detect/text",
+                "payload_bytes": len(body),
+                "pages": args.pages,
+                "clients": args.clients,
+                "seconds": args.seconds
+            },
+            "results": results
+        }
+        baseline_path = Path(args.output) if args.output else DEFAULT_BASELINE
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        print(f"\nBaseline saved to {baseline_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Corpus tiếng Việt tổng hợp cho benchmark (có seed, tái tạo được)
+
+- Văn xuôi hành chính / nghiệp vụ ghép từ mẫu câu, bảng danh sách (họ tên, CCCD, điện thoại, số tài khoản)
+- Giá trị nhạy cảm chèn theo mật độ cấu hình (xác suất mỗi câu): số điện thoại, CCCD, MST, STK, secret;
+  số giá trị đã chèn được ghi trong manifest để đối chiếu với số match
+- Kích thước là số byte UTF-8 của text (phần pipeline phải extract và scan), file PDF/DOCX nén nên nhỏ hơn
+- Ghi dạng TXT, PDF (synthetic_pdf) và DOCX (bench_docx.write_docx) theo từng block,
+  nên có thể tạo file 100 MB mà không tốn RAM
+- PDF dùng font Helvetica chuẩn nên không có dấu (manifest có accent_free=true): số match của PDF được so với
+  pdf_reference_text (text không dấu, xuống dòng đúng như trong PDF), không so với TXT/DOCX
+
+Dùng: python benchmarks/corpus.py out.pdf --size 1mb --seed 42
+"""
+
+import argparse
+import json
+import random
+import re
+import string
+import sys
+import textwrap
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_docx import write_docx
+from benchmarks.synthetic_pdf import LINES_PER_PAGE, pdf_visible_text, write_text_pdf
+
+FORMATS = ("txt", "pdf", "docx")
+
+# Xác suất một câu có thêm giá trị nhạy cảm
+DEFAULT_DENSITIES = {"phone": 0.05, "cccd": 0.03, "mst": 0.02, "stk": 0.03, "secret": 0.01}
+# Xác suất sau mỗi đoạn văn có một bảng danh sách
+DEFAULT_TABLE_RATE = 0.05
+
+PDF_LINE_WIDTH = 90
+
+SIZE_UNITS = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3}
+
+SUBJECTS = [
+    "Công ty", "Phòng kế toán", "Ban giám đốc", "Khách hàng", "Nhân viên phụ trách", "Trung tâm dịch vụ",
+    "Chi nhánh Hà Nội", "Văn phòng đại diện", "Phòng nhân sự", "Bộ phận chăm sóc khách hàng", "Đơn vị thi công",
+    "Hội đồng quản trị", "Ban kiểm soát", "Tổ công tác", "Người lao động"
+]
+VERBS = [
+    "đã gửi", "xác nhận", "đề nghị bổ sung", "thông báo về", "tiếp nhận", "phê duyệt", "cập nhật",
+    "rà soát", "hoàn thiện", "chuyển tiếp", "lưu trữ", "tổng hợp", "bàn giao", "ký duyệt"
+]
+OBJECTS = [
+    "hồ sơ đăng ký", "báo cáo quý", "hợp đồng lao động", "kế hoạch triển khai", "biên bản nghiệm thu",
+    "đơn đề nghị", "quyết định điều chuyển", "phương án kinh doanh", "danh sách học viên", "tờ trình",
+    "bảng kê chi phí", "hóa đơn điện tử", "kết quả khảo sát", "chương trình đào tạo", "đề xuất mua sắm"
+]
+TAILS = [
+    "trước ngày 15 tháng 3", "theo quy định hiện hành", "tại trụ sở chính", "trong tuần này",
+    "để kịp tiến độ dự án", "sau khi họp giao ban", "theo đề nghị của các đơn vị", "cho năm tài chính mới",
+    "tại tầng 5 tòa nhà văn phòng", "qua hệ thống quản lý văn bản", "để làm cơ sở đối chiếu"
+]
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Vũ", "Đặng", "Bùi", "Đỗ", "Ngô", "Dương", "Lý"]
+MIDDLE_NAMES = ["Văn", "Thị", "Minh", "Thu", "Đức", "Ngọc", "Hữu", "Quang", "Thanh", "Gia"]
+GIVEN_NAMES = ["An", "Bình", "Cường", "Dung", "Hà", "Hùng", "Lan", "Mai", "Nam", "Phương", "Quân", "Trang", "Yến"]
+BANKS = ["Vietcombank", "VietinBank", "BIDV", "Techcombank", "MB", "ACB", "Agribank", "TPBank"]
+PHONE_PREFIXES = ["90", "91", "93", "94", "96", "97", "98", "32", "33", "35", "39", "70", "77", "81", "86", "88"]
+
+TABLE_HEADER = ["STT", "Họ và tên", "Số CCCD", "Số điện thoại", "Số tài khoản"]
+
+Block = Tuple[str, Any]
+
+def parse_size(value: str) -> int:
+    """Kích thước dạng 1kb, 100KB, 1.5mb hoặc 4096 -> số byte"""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([kmg]?b)?\s*", value.lower())
+    if match is None:
+        raise ValueError(f"Invalid size: {value}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2) or "b"])
+
+def format_size(size: int) -> str:
+    for unit in ("gb", "mb", "kb"):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return f"{size}b"
+
+def block_lines(block: Block) -> List[str]:
+    """Dòng text của block (bảng: mỗi row một dòng, cell cách nhau bằng tab như DOCX extractor)"""
+    kind, content = block
+    if kind == "table":
+        return ["\t".join(row) for row in content]
+    return [content]
+
+class CorpusGenerator:
+    """Sinh block văn bản theo seed; planted đếm số giá trị nhạy cảm đã chèn theo loại, text_bytes số byte đã sinh"""
+
+    def __init__(self, seed: int = 42, densities: Optional[Dict[str, float]] = None, table_rate: float = DEFAULT_TABLE_RATE):
+        self.random = random.Random(seed)
+        self.densities = {**DEFAULT_DENSITIES, **(densities or {})}
+        self.table_rate = table_rate
+        self.planted: Counter = Counter()
+        self.text_bytes = 0
+
+    def _digits(self, count: int) -> str:
+        return "".join(self.random.choice(string.digits) for _ in range(count))
+
+    def name(self) -> str:
+        return f"{self.random.choice(FAMILY_NAMES)} {self.random.choice(MIDDLE_NAMES)} {self.random.choice(GIVEN_NAMES)}"
+
+    def phone(self) -> str:
+        digits = "0" + self.random.choice(PHONE_PREFIXES) + self._digits(7)
+        return f"{digits[:4]} {digits[4:7]} {digits[7:]}" if self.random.random() < 0.5 else digits
+
+    def cccd(self) -> str:
+        # Mã tỉnh (3 số) + giới tính/thế kỷ + năm sinh (2 số) + 6 số ngẫu nhiên
+        return f"0{self.random.randint(1, 96):02d}{self.random.choice('0123')}{self._digits(2)}{self._digits(6)}"
+
+    def mst(self) -> str:
+        base = str(self.random.randint(1, 9)) + self._digits(9)
+        return f"{base}-{self.random.randint(1, 999):03d}" if self.random.random() < 0.3 else base
+
+    def stk(self) -> str:
+        return str(self.random.randint(1, 9)) + self._digits(self.random.randint(9, 13))
+
+    def secret(self) -> str:
+        alphabet = string.ascii_letters + string.digits
+        token = "".join(self.random.choice(alphabet) for _ in range(self.random.choice((24, 32, 40))))
+        return self.random.choice(("sk_live_", "ghp_", "AKIA", "")) + token
+
+    def _clause(self, kind: str) -> str:
+        if kind == "phone":
+            return f"{self.random.choice(('số điện thoại', 'liên hệ', 'hotline'))}: {self.phone()}"
+        if kind == "cccd":
+            return f"{self.name()}, số CCCD: {self.cccd()}"
+        if kind == "mst":
+            return f"mã số thuế: {self.mst()}"
+        if kind == "stk":
+            return f"số tài khoản: {self.stk()} tại ngân hàng {self.random.choice(BANKS)}"
+        label = self.random.choice(("API key", "access token", "client secret", "mật khẩu"))
+        return f"{label}: {self.secret()}"
+
+    def sentence(self) -> str:
+        text = f"{self.random.choice(SUBJECTS)} {self.random.choice(VERBS)} {self.random.choice(OBJECTS)} {self.random.choice(TAILS)}"
+        for kind, density in self.densities.items():
+            if self.random.random() < density:
+                text += f", {self._clause(kind)}"
+                self.planted[kind] += 1
+        return text + "."
+
+    def paragraph(self) -> str:
+        return " ".join(self.sentence() for _ in range(self.random.randint(3, 6)))
+
+    def table(self) -> List[List[str]]:
+        rows = [list(TABLE_HEADER)]
+        for index in range(1, self.random.randint(5, 20) + 1):
+            rows.append([str(index), self.name(), self.cccd(), self.phone(), self.stk()])
+        self.planted["table_rows"] += len(rows) - 1
+        return rows
+
+    def blocks(self, target_bytes: int) -> Iterator[Block]:
+        """Block cho tới khi text (mỗi dòng + newline) đạt target_bytes"""
+        while self.text_bytes < target_bytes:
+            if self.text_bytes > 0 and self.random.random() < self.table_rate:
+                block = ("table", self.table())
+            else:
+                block = ("paragraph", self.paragraph())
+            self.text_bytes += sum(len(line.encode("utf-8")) + 1 for line in block_lines(block))
+            yield block
+
+def _pdf_pages(blocks: Iterator[Block]) -> Iterator[List[str]]:
+    page: List[str] = []
+    for block in blocks:
+        for line in block_lines(block):
+            for wrapped in textwrap.wrap(line.replace("\t", "  "), PDF_LINE_WIDTH) or [""]:
+                page.append(wrapped)
+                if len(page) == LINES_PER_PAGE:
+                    yield page
+                    page = []
+    if page:
+        yield page
+
+def write_corpus(path: Path, format_name: str, size: int, seed: int = 42, densities: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Ghi một document của corpus, trả về manifest (format, byte text / file, số giá trị đã chèn)"""
+    generator = CorpusGenerator(seed, densities)
+    blocks = generator.blocks(size)
+    if format_name == "txt":
+        with open(path, "w", encoding="utf-8") as stream:
+            for block in blocks:
+                stream.write("\n".join(block_lines(block)) + "\n")
+    elif format_name == "pdf":
+        write_text_pdf(path, _pdf_pages(blocks))
+    elif format_name == "docx":
+        write_docx(path, blocks)
+    else:
+        raise ValueError(f"Unknown format: {format_name} (available: {', '.join(FORMATS)})")
+    return {
+        "format": format_name,
+        "size": format_size(size),
+        "text_bytes": generator.text_bytes,
+        "file_bytes": path.stat().st_size,
+        "seed": seed,
+        "accent_free": format_name == "pdf",
+        "planted": dict(generator.planted)
+    }
+
+def generate_text(size: int, seed: int = 42, densities: Optional[Dict[str, float]] = None) -> str:
+    """Text của corpus trong bộ nhớ (cho benchmark rule / classifier)"""
+    generator = CorpusGenerator(seed, densities)
+    return "".join("\n".join(block_lines(block)) + "\n" for block in generator.blocks(size))
+
+def pdf_reference_text(size: int, seed: int = 42, densities: Optional[Dict[str, float]] = None) -> str:
+    """Text mà PDF của corpus chứa (không dấu, mỗi dòng PDF một dòng), để đối chiếu số match của PDF"""
+    generator = CorpusGenerator(seed, densities)
+    return "".join(
+        pdf_visible_text(line) + "\n"
+        for page in _pdf_pages(generator.blocks(size))
+        for line in page
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic Vietnamese document")
+    parser.add_argument("output")
+    parser.add_argument("--size", default="100kb")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=FORMATS, help="Default: from the output extension")
+    args = parser.parse_args()
+
+    path = Path(args.output)
+    format_name = args.format or path.suffix.lstrip(".").lower()
+    print(json.dumps(write_corpus(path, format_name, parse_size(args.size), args.seed), ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Dataset tổng hợp cho users, documents, documents_risk (có seed, tái tạo được) để benchmark query của DatabaseService
+
+Phân bố lệch như dữ liệu thật:
+- Số document theo user theo Zipf (vài user sở hữu phần lớn document, đa số user chỉ có vài document)
+- uploaded_at dày dần về gần DATASET_END (lượng upload tăng theo thời gian)
+- Số risk mỗi document theo đuôi dài (khoảng 1/3 không có risk, một số ít có hàng trăm), loại risk lệch về Phone / Email
+- status chủ yếu COMPLETED, một phần nhỏ PENDING / PROCESSING / ERROR / ARCHIVED
+- risk_score, sensitive_info tính bằng DocumentProcessor như save_document_analysis
+
+Chạy trên SQLite file (stand-in, mặc định) hoặc PostgreSQL (--postgres dùng cấu hình DB_*, hoặc --url).
+Insert theo batch bằng Core executemany với id gán sẵn, nên hàng triệu row không cần giữ trong RAM.
+
+Chạy: python benchmarks/db_dataset.py [--documents 1000000] [--users 20000] [--seed 42] [--url sqlite:////tmp/x.sqlite] [--reset]
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.engine import Engine
+
+from app.config import database
+from app.config.database import Base, db_settings
+from app.models.sensitive_data import User, Document, DocumentRisk, DocumentStatus, DocumentProcessor
+from benchmarks.corpus import CorpusGenerator
+
+DEFAULT_URL = "sqlite:////tmp/docai-db-bench.sqlite"
+DATASET_END = datetime(2025, 1, 1)
+
+# Tỷ lệ document theo status
+STATUS_WEIGHTS = {
+    DocumentStatus.COMPLETED.value: 0.92,
+    DocumentStatus.PENDING.value: 0.02,
+    DocumentStatus.PROCESSING.value: 0.03,
+    DocumentStatus.ERROR.value: 0.02,
+    DocumentStatus.ARCHIVED.value: 0.01
+}
+# (mime type, đuôi file, tỷ lệ, kích thước file trung vị KB)
+MIME_TYPES = [
+    ("application/pdf", "pdf", 0.55, 400),
+    ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx", 0.33, 80),
+    ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx", 0.07, 150),
+    ("text/csv", "csv", 0.05, 40)
+]
+# Loại risk theo tỷ lệ (type của regex detection, AI classification dùng risk_type CONFIDENTIAL_DATA)
+RISK_KEY_WEIGHTS = {
+    "Phone": 30, "Email": 20, "CMND/CCCD": 15, "Bank Account": 12, "MST": 10, "Social Insurance": 4,
+    "Credit Card": 3, "API Key": 2, "Secret Key": 1.5, "Password": 1.5, "Access Token": 1
+}
+AI_RISK_KEYS = ["Dữ liệu cá nhân nhạy cảm", "Dữ liệu nội bộ nhạy cảm"]
+AI_RISK_RATE = 0.05
+FILENAME_STEMS = [
+    "hop-dong-lao-dong", "bao-cao-quy", "bien-ban-nghiem-thu", "danh-sach-nhan-vien", "to-trinh", "hoa-don",
+    "bang-luong", "ke-hoach-trien-khai", "quyet-dinh", "don-de-nghi", "ho-so-khach-hang", "sao-ke"
+]
+
+TABLES = (User.__table__, Document.__table__, DocumentRisk.__table__)
+
+def create_bench_engine(url: str) -> Engine:
+    """Engine cho dataset (không echo SQL); SQLite tắt fsync vì đây chỉ là dữ liệu benchmark"""
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.close()
+
+        return engine
+    return create_engine(url, pool_size=db_settings.pool_size, max_overflow=db_settings.max_overflow)
+
+def install_engine(engine: Engine):
+    """Cho DatabaseService (DatabaseSession / get_db) dùng engine này thay cho PostgreSQL theo cấu hình DB_*"""
+    database._engine = engine
+    database.SessionLocal.configure(bind=engine)
+
+def table_counts(engine: Engine) -> Dict[str, int]:
+    with engine.connect() as connection:
+        return {table.name: connection.execute(select(func.count()).select_from(table)).scalar() for table in TABLES}
+
+class DatasetGenerator:
+    """Sinh row cho 3 table theo seed; owner theo Zipf với hệ số zipf_exponent"""
+
+    def __init__(self, users: int, documents: int, seed: int = 42, zipf_exponent: float = 1.1,
+                 span_days: int = 730, max_risks: int = 500, content_paragraphs: int = 1):
+        self.users = users
+        self.documents = documents
+        self.random = random.Random(seed)
+        self.corpus = CorpusGenerator(seed)
+        self.span_days = span_days
+        self.max_risks = max_risks
+        self.content_paragraphs = content_paragraphs
+
+        # Hạng Zipf gán cho user id theo thứ tự ngẫu nhiên, user nhiều document nhất không phải luôn là id 1
+        owner_ids = list(range(1, users + 1))
+        self.random.shuffle(owner_ids)
+        self.owner_ids = owner_ids
+        self.owner_cum_weights = list(itertools.accumulate(1 / rank ** zipf_exponent for rank in range(1, users + 1)))
+        self.statuses = list(STATUS_WEIGHTS)
+        self.status_cum_weights = list(itertools.accumulate(STATUS_WEIGHTS.values()))
+        self.risk_keys = list(RISK_KEY_WEIGHTS)
+        self.risk_cum_weights = list(itertools.accumulate(RISK_KEY_WEIGHTS.values()))
+        self.mime_cum_weights = list(itertools.accumulate(weight for _, _, weight, _ in MIME_TYPES))
+
+    def _pick(self, values: List[Any], cum_weights: List[float]) -> Any:
+        return values[bisect.bisect_left(cum_weights, self.random.random() * cum_weights[-1])]
+
+    def user_rows(self) -> Iterator[Dict[str, Any]]:
+        for user_id in range(1, self.users + 1):
+            yield {
+                "id": user_id,
+                "username": f"user{user_id}",
+                "email": f"user{user_id}@example.com",
+                "full_name": self.corpus.name(),
+                "is_active": self.random.random() < 0.95,
+                "created_at": DATASET_END - timedelta(days=self.random.uniform(self.span_days, self.span_days * 2))
+            }
+
+    def risk_value(self, risk_key: str) -> str:
+        if risk_key == "Phone":
+            return self.corpus.phone()
+        if risk_key == "Email":
+            return f"{self.corpus.name().split()[-1].lower()}{self.random.randint(1, 9999)}@example.com"
+        if risk_key in ("CMND/CCCD", "Social Insurance"):
+            return self.corpus.cccd()
+        if risk_key == "MST":
+            return self.corpus.mst()
+        if risk_key in ("Bank Account", "Credit Card"):
+            return self.corpus.stk()
+        return self.corpus.secret()
+
+    def risk_count(self) -> int:
+        """Khoảng 1/3 document không có risk, còn lại theo Pareto (trung vị 2-3, đuôi tới max_risks)"""
+        if self.random.random() < 0.35:
+            return 0
+        return min(int(self.random.paretovariate(1.1)), self.max_risks)
+
+    def regex_results(self, count: int) -> List[Dict[str, Any]]:
+        """Danh sách regex_detection (type, value) như detection_result của pipeline"""
+        results = []
+        for _ in range(count):
+            risk_key = self._pick(self.risk_keys, self.risk_cum_weights)
+            results.append({"type": risk_key, "value": self.risk_value(risk_key)})
+        return results
+
+    def document(self, document_id: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Row documents và các row documents_risk của một document"""
+        mime_type, extension, _, median_kb = MIME_TYPES[bisect.bisect_left(self.mime_cum_weights, self.random.random() * self.mime_cum_weights[-1])]
+        regex_results = self.regex_results(self.risk_count())
+        ai_details = []
+        if self.random.random() < AI_RISK_RATE:
+            ai_details.append({"type": self.random.choice(AI_RISK_KEYS), "matches": [self.corpus.name()]})
+
+        # Upload dày dần về gần DATASET_END: tuổi theo sqrt của phân bố đều
+        uploaded_at = DATASET_END - timedelta(seconds=self.span_days * 86400 * (1 - self.random.random() ** 0.5))
+        risk_score = DocumentProcessor.calculate_risk_score(regex_results)
+        status = self._pick(self.statuses, self.status_cum_weights)
+        document = {
+            "id": document_id,
+            "filename": f"{self.random.choice(FILENAME_STEMS)}-{document_id}.{extension}",
+            "mime_type": mime_type,
+            "file_size": int(self.random.lognormvariate(0, 1) * median_kb * 1024) + 1,
+            "content": " ".join(self.corpus.paragraph() for _ in range(self.content_paragraphs)),
+            "sensitive_info": DocumentProcessor.create_sensitive_info_json({
+                "regex_detection": regex_results,
+                "ai_classification": {"details": ai_details}
+            }),
+            "risk_score": risk_score,
+            "status": status,
+            "uploaded_at": uploaded_at,
+            "last_modified_at": uploaded_at + timedelta(seconds=self.random.uniform(1, 120)),
+            "owner_user_id": self._pick(self.owner_ids, self.owner_cum_weights)
+        }
+        risks = [
+            {
+                "document_id": document_id,
+                "risk_type": DocumentProcessor.map_detection_to_risk_type(item["type"]),
+                "risk_key": item["type"],
+                "content": item["value"]
+            }
+            for item in regex_results
+        ]
+        risks.extend(
+            {"document_id": document_id, "risk_type": "CONFIDENTIAL_DATA", "risk_key": detail["type"], "content": ", ".join(detail["matches"])}
+            for detail in ai_details
+        )
+        return document, risks
+
+def _batches(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def load_dataset(engine: Engine, generator: DatasetGenerator, batch_size: int = 5000, progress: bool = True) -> Dict[str, Any]:
+    """Ghi dataset vào các table (phải rỗng), trả về số row và thời gian theo table"""
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        for batch in _batches(generator.user_rows(), batch_size):
+            connection.execute(User.__table__.insert(), batch)
+    users_seconds = time.perf_counter() - start
+
+    risk_id = 0
+    risk_count = 0
+    max_document_risks = 0
+    document_ids = iter(range(1, generator.documents + 1))
+    while True:
+        documents = []
+        risks = []
+        for document_id in itertools.islice(document_ids, batch_size):
+            document, document_risks = generator.document(document_id)
+            for risk in document_risks:
+                risk_id += 1
+                risk["id"] = risk_id
+            documents.append(document)
+            risks.extend(document_risks)
+            max_document_risks = max(max_document_risks, len(document_risks))
+        if not documents:
+            break
+        with engine.begin() as connection:
+            connection.execute(Document.__table__.insert(), documents)
+            if risks:
+                connection.execute(DocumentRisk.__table__.insert(), risks)
+        risk_count += len(risks)
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(f"\r{documents[-1]['id']:>10} documents, {risk_count:>10} risks, {elapsed:7.1f} s", end="", flush=True)
+    if progress:
+        print()
+
+    with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            # Id gán sẵn nên sequence của BIGSERIAL phải đặt lại cho insert sau đó của app
+            for table in TABLES:
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+                ))
+        # Thống kê cho query planner
+        connection.execute(text("ANALYZE"))
+
+    seconds = time.perf_counter() - start
+    total_rows = generator.users + generator.documents + risk_count
+    return {
+        "users": generator.users,
+        "documents": generator.documents,
+        "documents_risk": risk_count,
+        "max_document_risks": max_document_risks,
+        "seconds": round(seconds, 1),
+        "users_seconds": round(users_seconds, 1),
+        "rows_per_second": round(total_rows / seconds)
+    }
+
+def prepare_schema(engine: Engine, reset: bool):
+    """Tạo table; table đã có dữ liệu chỉ bị xóa khi reset=True"""
+    Base.metadata.create_all(bind=engine, tables=list(TABLES))
+    counts = table_counts(engine)
+    if any(counts.values()):
+        if not reset:
+            raise SystemExit(f"Tables are not empty ({counts}); pass --reset to drop and recreate them")
+        Base.metadata.drop_all(bind=engine, tables=list(TABLES))
+        Base.metadata.create_all(bind=engine, tables=list(TABLES))
+
+def resolve_url(url: Optional[str], postgres: bool) -> str:
+    return db_settings.database_url if postgres else url or DEFAULT_URL
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill users, documents and documents_risk with a seeded, skewed synthetic dataset")
+    parser.add_argument("--url", help=f"SQLAlchemy URL (default {DEFAULT_URL})")
+    parser.add_argument("--postgres", action="store_true", help="Use the PostgreSQL database from the DB_* settings")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--documents", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of documents per user")
+    parser.add_argument("--content-paragraphs", type=int, default=1, help="Paragraphs of extracted text per document")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the tables if they already have rows")
+    args = parser.parse_args()
+
+    url = resolve_url(args.url, args.postgres)
+    engine = create_bench_engine(url)
+    prepare_schema(engine, args.reset)
+    generator = DatasetGenerator(args.users, args.documents, args.seed, args.zipf, content_paragraphs=args.content_paragraphs)
+    summary = load_dataset(engine, generator, args.batch_size)
+    summary.update({"url": engine.url.render_as_string(hide_password=True), "seed": args.seed, "zipf": args.zipf})
+    print(json.dumps(summary, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Báo cáo thời gian import của app (python -X importtime) và kiểm tra import-time budget
+
+- Chi phí cumulative của các module nặng nhất và self time gộp theo package
+- Exit code 1 nếu import app vượt budget (lần nhanh nhất trong --repeat lần, mỗi lần một process mới)
+  hoặc nếu một thư viện nặng bị import ngay khi import app (thư viện này phải được load lazy khi dùng)
+
+Chạy: python benchmarks/import_time.py [--module app.main] [--budget-ms 1000] [--repeat 3] [--top 15]
+Budget mặc định lấy từ IMPORT_BUDGET_MS nếu có
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Thư viện chỉ được load khi dùng extractor / backend tương ứng
+LAZY_MODULES = (
+    "pdfplumber", "pdfminer", "PyPDF2", "docx", "openpyxl", "pandas", "numpy",
+    "transformers", "torch", "sqlalchemy", "psycopg2"
+)
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def parse_importtime(stderr: str):
+    """Output -X importtime -> list (self_us, cumulative_us, depth, name)"""
+    entries = []
+    for line in stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return entries
+
+def measure(module: str):
+    """Chạy import trong process mới, trả về list (self_us, cumulative_us, depth, name)"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(output.stderr)
+
+def app_total_us(entries, module: str) -> int:
+    """Tổng thời gian import của package app (các entry top-level thuộc package)"""
+    package = module.split(".")[0]
+    return sum(
+        cumulative for _, cumulative, depth, name in entries
+        if depth == 0 and (name == package or name.startswith(package + "."))
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report and budget check")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("IMPORT_BUDGET_MS", 1000)))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(args.repeat, 1))]
+    entries = min(runs, key=lambda run: app_total_us(run, args.module))
+    total_ms = app_total_us(entries, args.module) / 1000
+
+    print(f"Slowest modules (cumulative) importing {args.module}:")
+    print(f"{'Cumulative ms':>14} {'Self ms':>8}  Module")
+    for self_us, cumulative_us, depth, name in sorted(entries, key=lambda entry: -entry[1])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {'  ' * depth}{name}")
+
+    packages = defaultdict(int)
+    for self_us, _, _, name in entries:
+        packages[name.split(".")[0]] += self_us
+    print()
+    print("Self time by package:")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{self_us / 1000:>14.1f}  {package}")
+
+    imported = {name for _, _, _, name in entries}
+    eager = sorted(
+        module for module in LAZY_MODULES
+        if any(name == module or name.startswith(module + ".") for name in imported)
+    )
+
+    print()
+    print(f"Import {args.module}: {total_ms:.1f} ms (best of {len(runs)}), budget {args.budget_ms:.0f} ms")
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time exceeds budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if eager:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(eager)}")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Load test cho FastAPI app với document mix từ corpus tổng hợp (benchmarks/corpus.py)
+
+- Target: in-process (ASGI qua httpx.ASGITransport, app chạy chung event loop như một worker uvicorn)
+  hoặc uvicorn local (--target uvicorn, --workers N); cả hai dùng benchmarks.local_app
+  (SQLite in-memory thay PostgreSQL, audit log ghi vào os.devnull)
+- Tải: closed loop với --concurrency client gửi liên tục, hoặc open loop với --rate request/giây
+  (arrival Poisson theo seed, tối đa --concurrency request đang chờ; latency tính từ thời điểm arrival
+  nên gồm cả thời gian xếp hàng)
+- Mix: --mix pdf:100kb=2,docx:1mb=1,text:10kb=3 (kind:size=weight); pdf/docx gửi tới --endpoint,
+  text gửi tới /detect/text
+- Báo cáo: throughput, p50/p95/p99 latency của request thành công, tỉ lệ reject (4xx) / error (5xx, timeout,
+  lỗi kết nối) tổng và theo kind, RSS của process (uvicorn: cả process con) theo thời gian; --output ghi JSON
+
+Cần httpx (pip install httpx).
+
+Chạy: python benchmarks/load_test.py [--target inprocess|uvicorn] [--workers 1] [--concurrency 8] [--rate 0]
+      [--duration 30] [--mix pdf:100kb=1,docx:100kb=1,text:10kb=2] [--endpoint /detect] [--output load.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("benchmarks/load_test.py needs httpx: pip install httpx")
+
+from benchmarks.corpus import format_size, generate_text, parse_size, write_corpus
+
+KINDS = {
+    "pdf": ("application/pdf", None),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", None),
+    "text": ("text/plain; charset=utf-8", "/detect/text")
+}
+
+class Payload:
+    """Một loại request trong mix"""
+
+    def __init__(self, name: str, kind: str, size: int, weight: float, data: bytes):
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.weight = weight
+        self.data = data
+
+    async def send(self, client: "httpx.AsyncClient", endpoint: str) -> int:
+        content_type, path = KINDS[self.kind]
+        if path is not None:
+            response = await client.post(path, content=self.data, headers={"Content-Type": content_type})
+        else:
+            response = await client.post(endpoint, files={"file": (f"{self.name}.{self.kind}", self.data, content_type)})
+        await response.aread()
+        return response.status_code
+
+def parse_mix(spec: str) -> List[Tuple[str, int, float]]:
+    """Mix dạng pdf:100kb=2,text:10kb -> [(kind, size, weight)], weight mặc định 1"""
+    entries = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        entry, _, weight = item.partition("=")
+        kind, _, size = entry.partition(":")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind in mix: {kind} (available: {', '.join(KINDS)})")
+        entries.append((kind, parse_size(size or "100kb"), float(weight or 1)))
+    if not entries:
+        raise ValueError("Empty mix")
+    return entries
+
+def build_payloads(mix: List[Tuple[str, int, float]], seed: int, directory: Path) -> List[Payload]:
+    payloads = []
+    for index, (kind, size, weight) in enumerate(mix):
+        name = f"{kind}-{format_size(size)}"
+        if kind == "text":
+            data = generate_text(size, seed + index).encode("utf-8")
+        else:
+            path = directory / f"{name}.{kind}"
+            write_corpus(path, kind, size, seed + index)
+            data = path.read_bytes()
+        payloads.append(Payload(name, kind, size, weight, data))
+    return payloads
+
+def _process_tree(root_pid: int) -> List[int]:
+    """root_pid và các process con (đọc /proc)"""
+    children = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # Trường thứ 4 là ppid, tên process (trường 2) có thể chứa dấu cách nên tách sau ")"
+                parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children[parent].append(int(entry))
+    pids, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, ()))
+    return pids
+
+def tree_rss_mb(root_pid: int) -> float:
+    total_kb = 0
+    for pid in _process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1)
+
+class RssSampler(threading.Thread):
+    """Ghi RSS theo chu kỳ ở thread riêng (event loop có thể bị request CPU-bound chặn khi chạy in-process)"""
+
+    def __init__(self, root_pid: int, interval: float, started: float):
+        super().__init__(daemon=True)
+        self.root_pid = root_pid
+        self.interval = interval
+        self.started = started
+        self.samples: List[Tuple[float, float]] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while True:
+            self.samples.append((round(time.perf_counter() - self.started, 2), tree_rss_mb(self.root_pid)))
+            if self._stop_event.wait(self.interval):
+                break
+
+    def stop(self) -> List[Tuple[float, float]]:
+        self._stop_event.set()
+        self.join()
+        self.samples.append((round(time.perf_counter() - self.started, 2), tree_rss_mb(self.root_pid)))
+        return self.samples
+
+class LoadRun:
+    """Gửi request theo mix và ghi (payload, status, latency, thời điểm xong); status None = exception"""
+
+    def __init__(self, client: "httpx.AsyncClient", payloads: List[Payload], endpoint: str, seed: int):
+        self.client = client
+        self.payloads = payloads
+        self.weights = [payload.weight for payload in payloads]
+        self.endpoint = endpoint
+        self.random = random.Random(seed)
+        self.records: List[Tuple[str, Optional[int], float, float]] = []
+        self.exceptions: Counter = Counter()
+        self.started = 0.0
+
+    def _pick(self) -> Payload:
+        return self.random.choices(self.payloads, self.weights)[0]
+
+    async def _request(self, payload: Payload, scheduled: float):
+        try:
+            status = await payload.send(self.client, self.endpoint)
+        except httpx.HTTPError as error:
+            self.exceptions[type(error).__name__] += 1
+            status = None
+        finished = time.perf_counter()
+        self.records.append((payload.name, status, finished - scheduled, finished - self.started))
+
+    async def closed_loop(self, concurrency: int, duration: float):
+        deadline = time.perf_counter() + duration
+
+        async def client_loop():
+            while time.perf_counter() < deadline:
+                await self._request(self._pick(), time.perf_counter())
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+    async def open_loop(self, rate: float, concurrency: int, duration: float):
+        slots = asyncio.Semaphore(concurrency)
+        tasks = []
+        next_arrival = time.perf_counter()
+        deadline = next_arrival + duration
+
+        async def arrival(payload: Payload, scheduled: float):
+            async with slots:
+                await self._request(payload, scheduled)
+
+        while next_arrival < deadline:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(arrival(self._pick(), next_arrival)))
+            next_arrival += self.random.expovariate(rate)
+        await asyncio.gather(*tasks)
+
+def percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile (ms)"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values), max(1, math.ceil(percent / 100 * len(sorted_values)))) - 1
+    return round(sorted_values[index] * 1000, 1)
+
+def summarize(records: List[Tuple[str, Optional[int], float, float]], elapsed: float) -> Dict[str, Any]:
+    total = len(records)
+    latencies = sorted(latency for _, status, latency, _ in records if status is not None and status < 400)
+    rejects = sum(1 for _, status, _, _ in records if status is not None and 400 <= status < 500)
+    errors = sum(1 for _, status, _, _ in records if status is None or status >= 500)
+    return {
+        "requests": total,
+        "ok": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "reject_rate": round(rejects / total, 4) if total else 0.0,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+        "status": dict(Counter(str(status) for _, status, _, _ in records))
+    }
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def wait_ready(client: "httpx.AsyncClient", timeout: float = 120) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    return False
+
+async def run(args, payloads: List[Payload]) -> Dict[str, Any]:
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    server = None
+    if args.target == "inprocess":
+        from benchmarks.local_app import app
+        from app.services.warmup import warm_up
+        # ASGITransport không chạy lifespan event: warm-up trực tiếp
+        await asyncio.to_thread(warm_up)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout)
+        rss_pid = os.getpid()
+    else:
+        port = free_port()
+        env = dict(os.environ, DETECT_AUDIT_LOG_LEVEL=os.environ.get("DETECT_AUDIT_LOG_LEVEL", "summary"))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "benchmarks.local_app:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+        )
+        client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout, limits=limits)
+        rss_pid = server.pid
+
+    try:
+        async with client:
+            if server is not None:
+                if not await wait_ready(client):
+                    raise RuntimeError("uvicorn did not become ready")
+                # /ready chỉ báo một worker đã sẵn sàng
+                await asyncio.sleep(1 + 0.2 * args.workers)
+
+            load = LoadRun(client, payloads, args.endpoint, args.seed)
+            load.started = time.perf_counter()
+            sampler = RssSampler(rss_pid, args.rss_interval, load.started)
+            sampler.start()
+            try:
+                if args.rate > 0:
+                    await load.open_loop(args.rate, args.concurrency, args.duration)
+                else:
+                    await load.closed_loop(args.concurrency, args.duration)
+            finally:
+                elapsed = time.perf_counter() - load.started
+                rss_samples = sampler.stop()
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+    by_payload = defaultdict(list)
+    for record in load.records:
+        by_payload[record[0]].append(record)
+    return {
+        "config": {
+            "target": args.target,
+            "workers": args.workers if args.target == "uvicorn" else 1,
+            "concurrency": args.concurrency,
+            "rate": args.rate or None,
+            "duration_s": args.duration,
+            "endpoint": args.endpoint,
+            "mix": [{"name": payload.name, "weight": payload.weight, "bytes": len(payload.data)} for payload in payloads],
+            "seed": args.seed,
+            "cpu_count": os.cpu_count()
+        },
+        "elapsed_s": round(elapsed, 2),
+        "summary": summarize(load.records, elapsed),
+        "by_payload": {name: summarize(records, elapsed) for name, records in by_payload.items()},
+        "exceptions": dict(load.exceptions),
+        "rss_mb": rss_samples,
+        "throughput_timeline": _timeline(load.records, elapsed)
+    }
+
+def _timeline(records: List[Tuple[str, Optional[int], float, float]], elapsed: float) -> List[int]:
+    """Số request thành công xong trong mỗi giây"""
+    buckets = [0] * (int(elapsed) + 1)
+    for _, status, _, finished in records:
+        if status is not None and status < 400:
+            buckets[min(int(finished), len(buckets) - 1)] += 1
+    return buckets
+
+def print_report(report: Dict[str, Any]):
+    config = report["config"]
+    load = f"rate {config['rate']} req/s (max {config['concurrency']} in flight)" if config["rate"] else f"{config['concurrency']} clients"
+    print(f"Target: {config['target']} ({config['workers']} worker(s), {config['cpu_count']} CPUs), {load}, {report['elapsed_s']} s")
+    header = f"{'Requests':>9} {'OK':>7} {'Req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Reject':>7} {'Error':>7}"
+    print(f"{'Payload':<16} {header}")
+
+    def row(name: str, summary: Dict[str, Any]):
+        def ms(value):
+            return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+        print(
+            f"{name:<16} {summary['requests']:>9} {summary['ok']:>7} {summary['throughput_rps'] or 0:>8.2f} "
+            f"{ms(summary['p50_ms'])} {ms(summary['p95_ms'])} {ms(summary['p99_ms'])} "
+            f"{summary['reject_rate']:>7.1%} {summary['error_rate']:>7.1%}"
+        )
+
+    for name, summary in report["by_payload"].items():
+        row(name, summary)
+    row("total", report["summary"])
+    if report["exceptions"]:
+        print(f"Exceptions: {report['exceptions']}")
+    samples = report["rss_mb"]
+    if samples:
+        values = [rss for _, rss in samples]
+        step = max(1, len(samples) // 10)
+        timeline = ", ".join(f"{at:.0f}s {rss:.0f}" for at, rss in samples[::step])
+        print(f"RSS MB: start {values[0]:.0f}, peak {max(values):.0f}, end {values[-1]:.0f} ({timeline})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the detection API")
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (--target uvicorn)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients (closed loop) or max requests in flight (open loop)")
+    parser.add_argument("--rate", type=float, default=0, help="Arrival rate in requests/s (0 = closed loop)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--mix", default="pdf:100kb=1,docx:100kb=1,text:10kb=2", help="kind:size=weight, kinds: pdf, docx, text")
+    parser.add_argument("--endpoint", default="/detect", help="Endpoint for pdf/docx payloads (e.g. /detect/gate)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--rss-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        payloads = build_payloads(parse_mix(args.mix), args.seed, Path(directory))
+    report = asyncio.run(run(args, payloads))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
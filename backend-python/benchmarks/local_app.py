@@ -0,0 +1,39 @@
+"""
+App với stand-in local cho load test (không cần PostgreSQL hay service ngoài)
+
+- Database: SQLite in-memory (StaticPool) thay cho PostgreSQL, table của app.models được tạo sẵn
+- Audit log: vẫn chạy đủ (queue, background thread, format JSON) nhưng ghi vào os.devnull
+
+Chạy server: uvicorn benchmarks.local_app:app (từ thư mục backend-python), hoặc import `app` để chạy in-process
+"""
+
+import contextlib
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.config import database
+from app.services.audit_log import audit_logger
+
+def install_stand_ins():
+    """Thay engine PostgreSQL bằng SQLite in-memory và chuyển output audit log vào os.devnull (gọi nhiều lần được)"""
+    if database._engine is None:
+        # Import models để các table được đăng ký vào Base.metadata
+        from app.services import database_service  # noqa: F401
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        database._engine = engine
+        database.SessionLocal.configure(bind=engine)
+        database.create_tables()
+    # StreamHandler của audit log giữ sys.stdout tại thời điểm start() (file để mở suốt process),
+    # startup event của app sau đó không làm gì
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        audit_logger.start()
+
+install_stand_ins()
+
+from app.main import app  # noqa: E402
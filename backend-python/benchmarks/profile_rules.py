@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Profile SUBTYPE_DETECT_RULES theo rule / keyword trên file hoặc text tổng hợp (giống bench_pdf_memory)
+
+- Bảng rule theo thời gian: hits, extractions, regex attempts/successes, matches
+- Keyword tốn thời gian nhất và keyword không tạo ra match nào (ứng viên để bỏ khi đổi rule set)
+- Chi phí của explain mode so với detect_sensitive_by_rules thường
+
+Chạy: python benchmarks/profile_rules.py [file ...] [--pages 50] [--top 15] [--repeat 5]
+"""
+
+import argparse
+import mimetypes
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add app to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.detection_service import detection_service
+from app.services.preflight import run_preflight
+from app.services.rule_profile import RuleProfile
+from bench_pdf_memory import page_lines
+
+def median_ms(function, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+def load_texts(files, pages: int):
+    if not files:
+        return [("synthetic", "\n".join(line for page in range(1, pages + 1) for line in page_lines(page)))]
+    texts = []
+    for file in files:
+        preflight = run_preflight(file, mimetypes.guess_type(file)[0])
+        texts.append((Path(file).name, detection_service.process_file(file, preflight["mime_type"])))
+    return texts
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-rule / per-keyword profile of the detection rules")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = load_texts(args.files, args.pages)
+    profile = RuleProfile()
+    for _, text in texts:
+        detection_service.detect_sensitive_by_rules(text, profile)
+    report = profile.to_dict(args.top)
+    print(f"Texts: {len(texts)}, {report['chars']} chars, rule time {report['time_ms']:.1f} ms")
+    print()
+
+    header = f"{'Hits':>7} {'Values':>7} {'Regex':>7} {'Regex ok':>8} {'Matches':>8} {'ms':>8}"
+    print(f"{'Rule':<32} {header}")
+    for rule in report["rules"]:
+        print(
+            f"{rule['subtype'][:32]:<32} {rule['hits']:>7} {rule['extractions']:>7} {rule['regex_attempts']:>7} "
+            f"{rule['regex_successes']:>8} {rule['matches']:>8} {rule['time_ms']:>8.2f}"
+        )
+
+    keywords = sorted(
+        ({"subtype": rule["subtype"], **keyword} for rule in report["rules"] for keyword in rule["keywords"]),
+        key=lambda keyword: -keyword["time_ms"]
+    )
+    for title, rows in (("Slowest keywords", keywords[:args.top]), ("Unproductive keywords (no matches)", report["unproductive_keywords"])):
+        print()
+        print(f"{title}:")
+        print(f"{'Keyword':<24} {'Rule':<28} {header}")
+        for row in rows:
+            print(
+                f"{row['keyword'][:24]:<24} {row['subtype'][:28]:<28} {row['hits']:>7} {row['extractions']:>7} "
+                f"{row['regex_attempts']:>7} {row['regex_successes']:>8} {row['matches']:>8} {row['time_ms']:>8.3f}"
+            )
+
+    plain_ms = median_ms(lambda: [detection_service.detect_sensitive_by_rules(text) for _, text in texts], args.repeat)
+    explain_ms = median_ms(lambda: [detection_service.detect_sensitive_by_rules(text, RuleProfile()) for _, text in texts], args.repeat)
+    print()
+    print(f"detect_sensitive_by_rules: {plain_ms:.1f} ms, with profile {explain_ms:.1f} ms ({explain_ms / plain_ms - 1:+.1%})")
+
+if __name__ == "__main__":
+    main()
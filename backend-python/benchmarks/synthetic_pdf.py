@@ -0,0 +1,84 @@
+"""
+Writer PDF tối giản cho benchmark (không cần thư viện ngoài)
+
+Dùng font chuẩn Helvetica với WinAnsiEncoding, vì vậy ký tự tiếng Việt được chuyển về
+dạng không dấu (đ -> d, ệ -> e); các keyword không dấu trong SUBTYPE_DETECT_RULES vẫn match.
+"""
+
+import unicodedata
+import zlib
+from pathlib import Path
+from typing import Iterable, List
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+FONT_SIZE = 10
+LEADING = 13
+MARGIN = 50
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+def pdf_visible_text(text: str) -> str:
+    """
+    Text được vẽ vào PDF: bỏ dấu tiếng Việt (font Helvetica chuẩn không có glyph cho chữ có dấu),
+    ký tự ngoài Latin-1 thành "?"; đây cũng là text extractor đọc lại được
+    """
+    text = text.replace("đ", "d").replace("Đ", "D")
+    text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    return text.encode("latin-1", errors="replace").decode("latin-1")
+
+def to_pdf_text(text: str) -> bytes:
+    """pdf_visible_text và escape ký tự đặc biệt cho string literal của PDF"""
+    data = pdf_visible_text(text).encode("latin-1")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def _content_stream(lines: List[str]) -> bytes:
+    parts = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL {MARGIN} {PAGE_HEIGHT - MARGIN} Td".encode("ascii")]
+    for line in lines:
+        parts.append(b"(" + to_pdf_text(line) + b") Tj T*")
+    parts.append(b"ET")
+    return zlib.compress(b"\n".join(parts))
+
+def write_text_pdf(path: Path, pages: Iterable[List[str]]):
+    """
+    Ghi PDF với mỗi phần tử của `pages` là danh sách dòng text của một page
+    (tối đa LINES_PER_PAGE dòng mỗi page)
+    Object được ghi tuần tự ra file nên có thể tạo file rất lớn mà không tốn RAM
+    """
+    offsets = {}
+    page_ids = []
+
+    with open(path, "wb") as stream:
+        def write_object(object_id: int, body: bytes):
+            offsets[object_id] = stream.tell()
+            stream.write(f"{object_id} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+        stream.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # 1: catalog, 2: pages, 3: font; page/content bắt đầu từ 4
+        write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+        next_id = 4
+        for lines in pages:
+            content = _content_stream(lines[:LINES_PER_PAGE])
+            content_id, page_id = next_id, next_id + 1
+            next_id += 2
+            write_object(
+                content_id,
+                f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode("ascii") + content + b"\nendstream"
+            )
+            write_object(
+                page_id,
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode("ascii")
+            )
+            page_ids.append(page_id)
+
+        kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+        write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("ascii"))
+        write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = stream.tell()
+        stream.write(f"xref\n0 {next_id}\n".encode("ascii"))
+        stream.write(b"0000000000 65535 f \n")
+        for object_id in range(1, next_id):
+            stream.write(f"{offsets[object_id]:010d} 00000 n \n".encode("ascii"))
+        stream.write(f"trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii"))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Cấp phát bộ nhớ theo stage của analyze_document trên file hoặc PDF tổng hợp (giống ?trace_alloc=true)
+
+- Mỗi stage: peak tăng thêm so với đầu stage, bộ nhớ còn giữ lại cuối stage, top allocation site
+- Thời gian xử lý khi không trace và khi trace (tracemalloc làm chậm cả process trong thời gian trace)
+
+Chạy: python benchmarks/trace_allocations.py [file ...] [--pages 20] [--top 5]
+"""
+
+import argparse
+import mimetypes
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from app.config.settings import detection_settings
+from app.services.alloc_trace import alloc_tracer
+from app.services.detection_service import detection_service
+from app.services.metrics import detection_metrics, STAGE_PREFLIGHT
+from app.services.preflight import run_preflight
+from benchmarks.bench_pdf_memory import page_lines
+from benchmarks.synthetic_pdf import write_text_pdf
+
+def analyze(path: Path, trace: bool):
+    """Pre-flight + analyze_document như /detect, trả về (giây, block allocations)"""
+    start = time.perf_counter()
+    with alloc_tracer.trace(trace) as allocations:
+        with detection_metrics.stage(STAGE_PREFLIGHT, ""):
+            preflight = run_preflight(str(path), mimetypes.guess_type(path.name)[0])
+        detection_service.analyze_document(
+            file_path=str(path),
+            filename=path.name,
+            mime_type=preflight["mime_type"],
+            file_size=path.stat().st_size,
+            preflight=preflight
+        )
+        report = allocations.finish()
+    return time.perf_counter() - start, report
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage allocation peaks and top allocation sites")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    detection_settings.alloc_trace_enabled = True
+    detection_settings.alloc_trace_sample_rate = 0.0
+    detection_settings.alloc_trace_top = args.top
+    # Audit log chạy ở background thread, không tính vào kết quả
+    detection_settings.audit_log_level = "off"
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [Path(file) for file in args.files]
+        if not paths:
+            paths = [Path(directory) / f"synthetic-{args.pages}.pdf"]
+            write_text_pdf(paths[0], (page_lines(page) for page in range(1, args.pages + 1)))
+
+        for path in paths:
+            # Lần đầu để import / warm-up không bị tính
+            analyze(path, False)
+            plain_seconds, _ = analyze(path, False)
+            traced_seconds, report = analyze(path, True)
+            print(f"{path.name}: {plain_seconds * 1000:.0f} ms, traced {traced_seconds * 1000:.0f} ms, peak {report['peak_kb']:.0f} KB")
+            print(f"  {'Stage':<14} {'Peak KB':>10} {'Net KB':>10}  Top sites (KB)")
+            for stage in report["stages"]:
+                sites = ", ".join(f"{site['site']} {site['size_kb']:.0f}" for site in stage["top_sites"][:2])
+                print(f"  {stage['stage']:<14} {stage['peak_kb']:>10.1f} {stage['net_kb']:>10.1f}  {sites}")
+            print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Cấu hình gunicorn cho production: process cha preload app rồi fork N worker uvicorn
+
+- preload_app: app được import và warm-up (compile rule, import extractor) một lần ở process cha,
+  gc.freeze() trước khi fork để các object này được chia sẻ copy-on-write giữa các worker
+- Worker được thay mới sau GUNICORN_MAX_REQUESTS request (có jitter) hoặc khi RSS vượt
+  GUNICORN_MAX_WORKER_MEMORY_MB; worker cũ xử lý nốt request đang chạy (graceful_timeout)
+- Metrics gộp giữa các worker qua DETECT_METRICS_MULTIPROC_DIR (mặc định thư mục tạm riêng của master),
+  counter của worker đã thoát được gộp vào archive ở child_exit
+
+Chạy: gunicorn -c gunicorn.conf.py app.main:app
+"""
+
+import gc
+import os
+import shutil
+import signal
+import tempfile
+import threading
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+# WEB_CONCURRENCY: số worker (mặc định mỗi CPU một worker vì detection là CPU-bound)
+workers = _env_int("WEB_CONCURRENCY", os.cpu_count() or 1)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Thay worker sau một số request (jitter để các worker không restart cùng lúc)
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+# Thay worker khi RSS vượt ngưỡng (MB, 0 = không kiểm tra), kiểm tra mỗi GUNICORN_MEMORY_CHECK_SECONDS
+max_worker_memory_mb = _env_int("GUNICORN_MAX_WORKER_MEMORY_MB", 0)
+memory_check_seconds = _env_int("GUNICORN_MEMORY_CHECK_SECONDS", 10)
+
+# Thời gian tối đa cho một request và thời gian chờ request đang chạy khi dừng / thay worker
+timeout = _env_int("GUNICORN_TIMEOUT", 120)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = 5
+
+# Đặt trước khi preload app để settings của master và worker cùng thấy thư mục này
+metrics_dir = os.environ.get("DETECT_METRICS_MULTIPROC_DIR", "")
+metrics_dir_is_temporary = not metrics_dir
+if metrics_dir_is_temporary:
+    metrics_dir = tempfile.mkdtemp(prefix="docai-metrics-")
+os.environ["DETECT_METRICS_MULTIPROC_DIR"] = metrics_dir
+
+def on_starting(server):
+    """Xoá snapshot metrics của lần chạy trước (thư mục cấu hình sẵn)"""
+    from app.services.metrics_multiprocess import reset_directory
+
+    reset_directory(metrics_dir)
+
+def child_exit(server, worker):
+    """Process cha: gộp counter/histogram của worker vừa thoát vào archive để /metrics không bị reset"""
+    from app.services.metrics_multiprocess import archive_worker
+
+    archive_worker(metrics_dir, worker.pid)
+
+def on_exit(server):
+    """Xoá thư mục metrics tạm do master tạo (thư mục cấu hình sẵn được giữ lại)"""
+    if metrics_dir_is_temporary:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+def when_ready(server):
+    """Process cha (app đã preload): warm-up trước khi fork worker"""
+    from app.services.warmup import warm_up
+
+    state = warm_up()
+    server.log.info("Warm-up in master: %s", state.describe())
+    # Đưa object hiện có ra khỏi tầm GC để worker không ghi vào page dùng chung khi GC chạy
+    gc.freeze()
+
+def post_worker_init(worker):
+    """Worker: theo dõi RSS, vượt ngưỡng thì tự gửi SIGTERM để dừng graceful (master fork worker mới)"""
+    if max_worker_memory_mb <= 0:
+        return
+    from app.services.memory import current_rss_bytes
+
+    limit = max_worker_memory_mb * 1024 * 1024
+
+    def watch():
+        stop = threading.Event()
+        while not stop.wait(memory_check_seconds):
+            rss = current_rss_bytes()
+            if rss > limit:
+                worker.log.warning(
+                    "Worker %s RSS %.1f MB exceeds %d MB, recycling", worker.pid, rss / 1024 / 1024, max_worker_memory_mb
+                )
+                os.kill(worker.pid, signal.SIGTERM)
+                return
+
+    threading.Thread(target=watch, name="memory-watchdog", daemon=True).start()
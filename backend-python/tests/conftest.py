@@ -0,0 +1,12 @@
+"""
+Cấu hình chung cho pytest: chạy từ thư mục backend-python (python -m pytest)
+Audit log tắt để output của test không lẫn log JSON
+"""
+
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DETECT_AUDIT_LOG_LEVEL", "off")
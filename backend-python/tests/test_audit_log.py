@@ -0,0 +1,45 @@
+"""
+Audit log mức verbose với mask: line_content không chứa value gốc của bất kỳ match nào trên cùng dòng
+"""
+
+from app.services.audit_log import AUDIT_LEVEL_VERBOSE, AuditEvent
+from app.services.detection_service import detection_service
+
+TEXT = (
+    "Ho so khach hang\n"
+    "Ho ten A. sdt: 0912345678, so tai khoan: 190333444555 mat khau: Hunter2Secret\n"
+    "email: an.nguyen@example.com cmnd 012345678\n"
+)
+
+def _records(mask):
+    matches = detection_service.detect_sensitive_by_rules(TEXT)
+    event = AuditEvent(AUDIT_LEVEL_VERBOSE, mask, {"filename": "a.txt"}, matches, TEXT)
+    return matches, event.to_record()["matches"]
+
+def _sensitive_values(matches):
+    """
+    Value gốc của các match, value nhiều dòng được tách theo dòng (line_content chỉ có một dòng)
+    Match chỉ có keyword (không lấy được value) có value là chính keyword, không phải dữ liệu nhạy cảm
+    """
+    return {
+        part.strip()
+        for match in matches if match["value"].lower() != (match["keyword_found"] or "").lower()
+        for part in match["value"].splitlines() if part.strip()
+    }
+
+def test_masked_excerpts_hide_every_value_on_the_line():
+    matches, records = _records(mask=True)
+
+    values = _sensitive_values(matches)
+    assert {"0912345678", "190333444555", "Hunter2Secret"} <= values
+    for record in records:
+        for value in values:
+            assert value not in record["line_content"]
+            assert value not in record["value"]
+
+def test_masking_keeps_line_and_column():
+    _, masked = _records(mask=True)
+    _, plain = _records(mask=False)
+
+    assert [(record["line"], record["column_number"]) for record in masked] == [(record["line"], record["column_number"]) for record in plain]
+    assert any("Hunter2Secret" in record["line_content"] for record in plain)
@@ -0,0 +1,31 @@
+"""
+POST /detect/text: detection và classifier chạy ở threadpool, không chạy trên event loop
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.detection_service import detection_service
+
+def test_batch_runs_off_event_loop(monkeypatch):
+    on_event_loop = []
+    analyze_text = detection_service.analyze_text
+
+    def recording_analyze_text(text, explain=False):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return analyze_text(text, explain)
+
+    monkeypatch.setattr(detection_service, "analyze_text", recording_analyze_text)
+    response = TestClient(app).post("/detect/text?timings=true", json={"texts": ["sdt: 0912345678", "stk 0123456789"]})
+
+    assert response.status_code == 200
+    assert on_event_loop == [False, False]
+    body = response.json()
+    assert [result["total_matches"] > 0 for result in body["results"]] == [True, True]
+    assert {"detect", "classify"} <= set(body["timings"]["stages_ms"])
@@ -0,0 +1,39 @@
+"""
+/detect/gate: keyword ở cuối page có value ở đầu page sau vẫn chặn upload, giống /detect và /detect/stream
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from benchmarks.synthetic_pdf import write_text_pdf
+
+FILLER = ["Noi dung binh thuong cua van ban."] * 5
+
+def _upload(client, path, route):
+    with open(path, "rb") as stream:
+        return client.post(route, files={"file": ("split.pdf", stream, "application/pdf")})
+
+def test_value_on_next_page_blocks_gate(tmp_path):
+    path = tmp_path / "split.pdf"
+    write_text_pdf(path, [FILLER + ["so dien thoai:"], ["0912345678"] + FILLER])
+    client = TestClient(app)
+
+    detected = _upload(client, path, "/detect").json()
+    streamed = [json.loads(line) for line in _upload(client, path, "/detect/stream").text.splitlines()]
+    gate = _upload(client, path, "/detect/gate").json()
+
+    assert any(match["value"] == "0912345678" for match in detected["matches"])
+    assert any(record["type"] == "match" and record["value"] == "0912345678" for record in streamed)
+    assert gate["blocked"] is True
+    assert (gate["hit"]["subtype"], gate["hit"]["page"]) == ("Số điện thoại", 1)
+    assert gate["pages_scanned"] == 2
+
+def test_gate_without_sensitive_data_scans_every_page(tmp_path):
+    path = tmp_path / "clean.pdf"
+    write_text_pdf(path, [FILLER] * 3)
+
+    gate = _upload(TestClient(app), path, "/detect/gate").json()
+
+    assert (gate["blocked"], gate["hit"], gate["pages_scanned"]) == (False, None, 3)
@@ -0,0 +1,34 @@
+"""
+Import app.main nằm trong import-time budget (IMPORT_BUDGET_MS, mặc định 1000 ms) và không load thư viện nặng
+"""
+
+import os
+import subprocess
+import sys
+
+from benchmarks.import_time import ROOT, app_total_us, parse_importtime
+
+BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 1000))
+# Lấy lần nhanh nhất, một lần chạy chậm vì máy bận không làm fail test
+RUNS = 3
+# Chỉ được import khi dùng extractor / NER / database lần đầu
+LAZY_MODULES = ("pdfplumber", "docx", "pandas", "openpyxl", "transformers", "sqlalchemy.engine")
+
+IMPORT_SCRIPT = "import sys\nimport app.main\nprint('\\n'.join(sorted(sys.modules)))"
+
+def _import_app():
+    """Import app.main trong process mới, trả về (tổng ms của package app, tập module trong sys.modules)"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return app_total_us(parse_importtime(output.stderr), "app.main") / 1000, set(output.stdout.split())
+
+def test_import_app_within_budget():
+    totals = [_import_app()[0] for _ in range(RUNS)]
+    assert min(totals) < BUDGET_MS, f"import app.main takes {min(totals):.0f} ms, budget {BUDGET_MS:.0f} ms"
+
+def test_import_app_keeps_heavy_modules_lazy():
+    _, modules = _import_app()
+    eager = [module for module in LAZY_MODULES if module in modules]
+    assert not eager, f"imported eagerly by app.main: {', '.join(eager)}"
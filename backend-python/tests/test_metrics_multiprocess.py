@@ -0,0 +1,82 @@
+"""
+/metrics với nhiều worker: tổng của mọi worker, counter không giảm giữa các lần scrape rơi vào worker khác nhau,
+counter của worker đã thoát được giữ lại trong archive
+"""
+
+import re
+
+import pytest
+
+from app.services.metrics import DetectionMetrics
+from app.services.metrics_multiprocess import archive_worker, reset_directory
+
+def _value(text, sample):
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+@pytest.fixture
+def workers(tmp_path):
+    reset_directory(str(tmp_path))
+    started = []
+
+    def start(pid):
+        metrics = DetectionMetrics()
+        metrics.start_multiprocess(str(tmp_path), sync_seconds=3600, pid=pid)
+        started.append(metrics)
+        return metrics
+
+    yield start
+    for metrics in started:
+        metrics.stop_multiprocess()
+
+def _sync(*workers):
+    """Lần ghi định kỳ của thread metrics-sync (test dùng sync_seconds rất lớn để tự điều khiển)"""
+    for metrics in workers:
+        metrics.multiprocess.write()
+
+def test_scrape_returns_sum_of_workers(workers):
+    first, second = workers(1001), workers(1002)
+    first.record_upload("application/pdf", 100)
+    second.record_upload("application/pdf", 50)
+    second.record_upload("application/pdf", 50)
+    first.observe_stage("detection", "application/pdf", 0.002)
+    second.observe_stage("detection", "application/pdf", 0.2)
+    second.in_flight.inc("/detect")
+    _sync(first, second)
+
+    for text in (first.render(), second.render()):
+        assert _value(text, 'docai_documents_total{mime_type="application/pdf"}') == 3
+        assert _value(text, 'docai_bytes_processed_total{mime_type="application/pdf"}') == 200
+        assert _value(text, 'docai_stage_duration_seconds_count{stage="detection",mime_type="application/pdf"}') == 2
+        assert _value(text, 'docai_stage_duration_seconds_bucket{stage="detection",mime_type="application/pdf",le="0.005"}') == 1
+        assert _value(text, 'docai_requests_in_flight{endpoint="/detect"}') == 1
+
+def test_counters_never_decrease_across_workers(workers):
+    first, second = workers(1001), workers(1002)
+    sample = 'docai_documents_total{mime_type="text/plain"}'
+    seen = []
+    for step in range(12):
+        (first if step % 2 else second).record_upload("text/plain", 1)
+        if step % 4 == 3:
+            _sync(first if step % 8 == 3 else second)
+        # Worker còn lại chỉ có snapshot của lần sync trước: tổng có thể trễ nhưng không giảm
+        seen.append(_value((first if step % 3 else second).render(), sample))
+
+    assert seen == sorted(seen)
+    _sync(first, second)
+    assert _value(first.render(), sample) == 12
+
+def test_exited_worker_counters_are_archived(workers, tmp_path):
+    first, second = workers(1001), workers(1002)
+    first.record_upload("text/plain", 1)
+    second.record_upload("text/plain", 1)
+    second.in_flight.inc("/detect")
+    # stop ghi snapshot cuối cùng trước khi worker thoát
+    second.stop_multiprocess()
+
+    archive_worker(str(tmp_path), 1002)
+
+    text = first.render()
+    assert not (tmp_path / "worker-1002.json").exists()
+    assert _value(text, 'docai_documents_total{mime_type="text/plain"}') == 2
+    assert _value(text, 'docai_requests_in_flight{endpoint="/detect"}') is None
@@ -0,0 +1,95 @@
+"""
+NerRunner với pipeline giả: entity ở ranh giới window được báo một lần với offset trong toàn bộ text,
+entity trùng trong vùng overlap được gộp theo (start, end) và giữ score cao nhất
+"""
+
+import re
+
+import pytest
+
+from app.config.settings import detection_settings
+from app.services.ner import NerRunner
+
+SUBWORD_CHARS = 3
+
+class StubTokenizer:
+    """Tách theo từ, từ dài hơn SUBWORD_CHARS ký tự được chia thành subword liền nhau"""
+    model_max_length = 512
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=True):
+        offsets = [
+            (start, min(start + SUBWORD_CHARS, word.end()))
+            for word in re.finditer(r"\S+", text)
+            for start in range(word.start(), word.end(), SUBWORD_CHARS)
+        ]
+        return {"offset_mapping": offsets}
+
+class StubPipeline:
+    """Pipeline "ner" không aggregate: mỗi token của từ viết hoa là một entity, score khác nhau theo window"""
+
+    def __init__(self):
+        self.tokenizer = StubTokenizer()
+        self.results = []
+
+    def __call__(self, texts, batch_size=1):
+        for text in texts:
+            window_index = len(self.results)
+            entities = []
+            for index, (start, end) in enumerate(self.tokenizer(text)["offset_mapping"]):
+                if not text[text.rfind(" ", 0, start) + 1].isupper():
+                    continue
+                score = 0.5 + 0.1 * ((window_index * 7 + index) % 5)
+                entities.append({"entity": "B-PER", "score": score, "index": index, "word": text[start:end], "start": start, "end": end})
+            self.results.append(entities)
+        return self.results[-len(texts):]
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(detection_settings, "ner_window_tokens", 8)
+    monkeypatch.setattr(detection_settings, "ner_window_overlap", 3)
+    monkeypatch.setattr(detection_settings, "ner_batch_size", 2)
+    stub = StubPipeline()
+    return NerRunner(model_path="stub", pipeline_factory=lambda model_path: stub), stub
+
+def test_entity_at_window_boundary_reported_once(runner):
+    runner, stub = runner
+    text = "ho so cua Nguyenvanan la a b Tranthibinh o x y z Lequangcuong het"
+
+    entities = runner(text)
+
+    keys = [(entity["start"], entity["end"]) for entity in entities]
+    assert len(keys) == len(set(keys))
+    for entity in entities:
+        assert text[entity["start"]:entity["end"]] == entity["word"]
+        assert "index" not in entity
+    names = {match.group() for match in re.finditer(r"[A-Z]\w+", text)}
+    for name in names:
+        start = text.index(name)
+        tokens = [(position, min(position + SUBWORD_CHARS, start + len(name))) for position in range(start, start + len(name), SUBWORD_CHARS)]
+        assert [key for key in keys if start <= key[0] < start + len(name)] == tokens
+    # Window không cắt giữa từ, và có từ nằm trong vùng overlap của 2 window
+    spans = runner.windows(text)
+    for start, end in spans:
+        assert start == 0 or text[start - 1] == " "
+        assert end == len(text) or text[end] == " "
+    assert len(spans) > 2
+    assert any(next_start < end for (_, end), (next_start, _) in zip(spans, spans[1:]))
+
+def test_overlap_duplicates_merged_with_best_score(runner):
+    runner, stub = runner
+    text = " ".join(f"Ten{index:02d}" for index in range(20))
+
+    entities = runner(text)
+
+    # Score cao nhất của mỗi (start, end) tuyệt đối trên mọi window
+    best_scores = {}
+    for (window_start, _), window_entities in zip(runner.windows(text), stub.results):
+        for entity in window_entities:
+            key = (window_start + entity["start"], window_start + entity["end"])
+            best_scores[key] = max(best_scores.get(key, 0), entity["score"])
+    assert len(stub.results) > 2
+    assert sum(map(len, stub.results)) > len(best_scores)
+    assert sorted(best_scores) == [(entity["start"], entity["end"]) for entity in entities]
+    for entity in entities:
+        assert entity["score"] == best_scores[(entity["start"], entity["end"])]
+    assert [entity["start"] for entity in entities] == sorted(entity["start"] for entity in entities)
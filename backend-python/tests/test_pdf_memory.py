@@ -0,0 +1,53 @@
+"""
+RAM khi extract PDF dài không tăng theo số page, và giới hạn DETECT_MAX_DOCUMENT_MEMORY_MB trả về 413
+"""
+
+import warnings
+
+from fastapi.testclient import TestClient
+
+from app.config.settings import detection_settings
+from app.main import app
+from app.services import memory
+from app.services.extractor_registry import PDFMINER_TESTED_VERSION, _pdfminer_version, extractor_registry
+from benchmarks.bench_pdf_memory import page_lines, run_child
+from benchmarks.synthetic_pdf import write_text_pdf
+
+# Chênh lệch peak RSS cho phép giữa file 500 page và 50 page
+TOLERANCE_MB = 32
+
+def _write_pdf(path, page_count):
+    write_text_pdf(path, (page_lines(page) for page in range(1, page_count + 1)))
+    return path
+
+def test_pdfminer_version_is_pinned():
+    # _release_page dựa vào PDFDocument._cached_objs (private) của đúng phiên bản này
+    assert _pdfminer_version() == PDFMINER_TESTED_VERSION
+
+def test_peak_rss_is_flat_with_page_count(tmp_path):
+    small = run_child(_write_pdf(tmp_path / "small.pdf", 50), "full")
+    large = run_child(_write_pdf(tmp_path / "large.pdf", 500), "full")
+
+    assert (small["pages"], large["pages"]) == (50, 500)
+    growth_mb = (large["delta_rss_bytes"] - small["delta_rss_bytes"]) / 1024 / 1024
+    assert growth_mb < TOLERANCE_MB, f"peak RSS grows {growth_mb:.1f} MB from 50 to 500 pages"
+
+def test_release_page_does_not_warn(tmp_path):
+    path = _write_pdf(tmp_path / "pages.pdf", 3)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        pages = list(extractor_registry.get("pdfplumber").iter_pages(str(path)))
+    assert len(pages) == 3
+
+def test_tiny_memory_limit_returns_413(tmp_path, monkeypatch):
+    path = _write_pdf(tmp_path / "long.pdf", 20)
+    monkeypatch.setattr(detection_settings, "max_document_memory_mb", 1)
+    # RSS tăng 2 MB mỗi lần đo, để kết quả không phụ thuộc vào allocator
+    readings = iter(range(0, 1 << 40, 2 * 1024 * 1024))
+    monkeypatch.setattr(memory, "current_rss_bytes", lambda: next(readings))
+
+    with path.open("rb") as stream:
+        response = TestClient(app).post("/detect", files={"file": ("long.pdf", stream, "application/pdf")})
+
+    assert response.status_code == 413
+    assert "memory limit at page 1" in response.json()["detail"]
@@ -0,0 +1,40 @@
+"""
+Endpoint số liệu cộng dồn (/rules/profile, /allocations/profile) chỉ dành cho admin: cần X-Admin-Token khớp DETECT_ADMIN_TOKEN
+"""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config.settings import detection_settings
+from app.main import app
+
+TOKEN = "test-admin-token"
+PROFILE_ROUTES = [
+    ("get", "/rules/profile"), ("delete", "/rules/profile"),
+    ("get", "/allocations/profile"), ("delete", "/allocations/profile")
+]
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(detection_settings, "admin_token", TOKEN)
+    return TestClient(app)
+
+@pytest.mark.parametrize("method,path", PROFILE_ROUTES)
+def test_profile_routes_require_admin_token(client, method, path):
+    assert client.request(method, path).status_code == 403
+    assert client.request(method, path, headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.request(method, path, headers={"X-Admin-Token": TOKEN}).status_code == 200
+
+@pytest.mark.parametrize("method,path", PROFILE_ROUTES)
+def test_profile_routes_closed_without_configured_token(client, monkeypatch, method, path):
+    monkeypatch.setattr(detection_settings, "admin_token", "")
+
+    assert client.request(method, path, headers={"X-Admin-Token": ""}).status_code == 403
+
+@pytest.mark.parametrize("method,path", PROFILE_ROUTES)
+def test_profile_routes_report_answering_worker(client, method, path):
+    response = client.request(method, path, headers={"X-Admin-Token": TOKEN})
+
+    assert response.json()["pid"] == os.getpid()
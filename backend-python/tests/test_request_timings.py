@@ -0,0 +1,52 @@
+"""
+RequestTimings: stage classify và persist được ghi vào Server-Timing / block timings khi chạy trong request
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import database
+from app.config.database import Base
+from app.main import app
+from app.services import metrics
+from app.services.database_service import database_service
+from app.services.metrics import RequestTimings
+from benchmarks.db_dataset import TABLES, create_bench_engine, install_engine
+
+@pytest.fixture
+def sqlite_database(tmp_path, monkeypatch):
+    """DatabaseService ghi vào SQLite tạm, engine cũ được trả lại sau test"""
+    monkeypatch.setattr(database, "_engine", database._engine)
+    previous_bind = database.SessionLocal.kw.get("bind")
+    engine = create_bench_engine(f"sqlite:///{tmp_path}/timings.sqlite")
+    Base.metadata.create_all(bind=engine, tables=list(TABLES))
+    install_engine(engine)
+    yield engine
+    database.SessionLocal.configure(bind=previous_bind)
+    engine.dispose()
+
+def test_detect_text_reports_classify():
+    response = TestClient(app).post("/detect/text?timings=true", json={"text": "sdt: 0912345678"})
+
+    assert "classify;dur=" in response.headers["server-timing"]
+    assert "classify" in response.json()["timings"]["stages_ms"]
+
+def test_persist_recorded_in_request_timings(sqlite_database):
+    timings = RequestTimings()
+    token = metrics._request_timings.set(timings)
+    try:
+        saved = database_service.save_document_analysis(
+            filename="a.pdf",
+            mime_type="application/pdf",
+            content_text="sdt: 0912345678",
+            detection_result={"regex_detection": [], "ai_classification": {"details": []}, "summary": {}},
+            file_size=10,
+            owner_user_id=1,
+            uploaded_by="test"
+        )
+    finally:
+        metrics._request_timings.reset(token)
+
+    assert saved["success"], saved
+    assert "persist;dur=" in timings.server_timing()
+    assert "persist" in timings.describe()["stages_ms"]
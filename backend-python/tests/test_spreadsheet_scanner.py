@@ -0,0 +1,33 @@
+"""
+Scan CSV theo cột: cột có header khớp rule vẫn chạy rule matching trên cell cho các rule khác
+"""
+
+from app.services.detection_service import detection_service
+from app.services.preflight import MIME_CSV
+
+def _scan(tmp_path, content):
+    path = tmp_path / "sheet.csv"
+    path.write_text(content, encoding="utf-8")
+    return [
+        (match["row"], match["column"], match["subtype"], match["method"])
+        for _, matches in detection_service.spreadsheet_scanner.iter_chunks(str(path), MIME_CSV)
+        for match in matches
+    ]
+
+def test_header_column_still_detects_other_rules(tmp_path):
+    matches = _scan(tmp_path, "Họ tên,Số điện thoại\nAn,0912345678\nBình,mật khẩu: Abc@12345\n")
+
+    assert (2, "B", "Số điện thoại", "header+regex") in matches
+    assert any(row == 3 and column == "B" and subtype == "Mật khẩu" for row, column, subtype, _ in matches)
+
+def test_same_cell_under_neutral_header_gives_same_subtypes(tmp_path):
+    with_header = _scan(tmp_path, "Họ tên,Số điện thoại\nBình,mật khẩu: Abc@12345\n")
+    neutral = _scan(tmp_path, "Họ tên,Ghi chú\nBình,mật khẩu: Abc@12345\n")
+
+    assert {subtype for _, _, subtype, _ in neutral} <= {subtype for _, _, subtype, _ in with_header}
+
+def test_header_and_cell_match_reported_once(tmp_path):
+    matches = _scan(tmp_path, "Họ tên,Số điện thoại\nAn,số điện thoại: 0912345678\n")
+
+    phone_matches = [match for match in matches if match[:3] == (2, "B", "Số điện thoại")]
+    assert phone_matches == [(2, "B", "Số điện thoại", "header+regex")]
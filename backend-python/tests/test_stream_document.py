@@ -0,0 +1,91 @@
+"""
+/detect/stream theo page: match cắt ngang ranh giới page phải giống /detect (analyze_document),
+page record gửi sau mọi match của page và kết quả được ghi audit log
+"""
+
+import random
+
+import pytest
+
+from app.services import detection_service as detection_module
+from app.services.detection_service import detection_service
+from app.services.preflight import MIME_PDF
+
+FILLER = "Noi dung binh thuong cua van ban. "
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    """Thay extract PDF bằng danh sách page cho trước"""
+    pages = []
+
+    def iter_pages(file_path, mime_type, selection=None, pdf_mode=None, report=None, extractor=None):
+        for page_number, text in enumerate(pages, 1):
+            if report is not None:
+                report["pages"].append({"page": page_number, "method": "text", "content_length": len(text)})
+            yield page_number, text
+
+    monkeypatch.setattr(detection_service, "iter_pages", iter_pages)
+    return pages
+
+def _stream(pages):
+    return list(detection_service.stream_document("doc.pdf", "doc.pdf", MIME_PDF, 1024))
+
+def _key(match):
+    return (match["subtype"], match["value"], match["start"], match["end"])
+
+def _compare(pages):
+    records = _stream(pages)
+    expected = detection_service.analyze_document("doc.pdf", "doc.pdf", MIME_PDF, 1024)["matches"]
+    streamed = [record for record in records if record["type"] == "match"]
+    assert sorted(map(_key, streamed)) == sorted(map(_key, expected))
+    return records
+
+def test_value_on_next_page_is_detected(fake_pages):
+    fake_pages.extend([FILLER * 20 + "So dien thoai:", " 0912345678 " + FILLER * 20])
+
+    records = _compare(fake_pages)
+
+    phone = [record for record in records if record["type"] == "match" and record["subtype"] == "Số điện thoại"]
+    assert [(record["page"], record["value"]) for record in phone] == [(1, "0912345678")]
+
+def test_page_records_follow_their_matches(fake_pages):
+    fake_pages.extend([FILLER * 3 + "cmnd", "", ": 012345678 ", "sdt", " 0912345678", FILLER * 30 + "bhxh 0123456789"])
+
+    records = _compare(fake_pages)
+
+    starts = [0]
+    for text in fake_pages:
+        starts.append(starts[-1] + len(text))
+    page_records = [record for record in records if record["type"] == "page"]
+    assert [record["page"] for record in page_records] == list(range(1, len(fake_pages) + 1))
+    for index, record in enumerate(records):
+        if record["type"] != "match":
+            continue
+        page = record["page"]
+        assert starts[page - 1] <= record["start"] < starts[page]
+        assert not any(later["type"] == "page" and later["page"] == page for later in records[:index])
+    for record in page_records:
+        assert record["total_matches"] == sum(1 for match in records if match["type"] == "match" and match["page"] == record["page"])
+    assert records[-1]["total_matches"] == sum(record["total_matches"] for record in page_records)
+
+def test_random_page_splits_match_analyze_document(fake_pages):
+    generator = random.Random(7)
+    parts = [FILLER, "so dien thoai: 0912345678 ", "cmnd 012345678. ", "bhxh: 0123456789 ", "passport B1234567 ", "\n"]
+    text = "".join(generator.choice(parts) for _ in range(400))
+    for _ in range(5):
+        cuts = sorted(generator.sample(range(1, len(text)), 30))
+        fake_pages[:] = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+        _compare(fake_pages)
+
+def test_stream_writes_audit_log(fake_pages, monkeypatch):
+    logged = []
+    monkeypatch.setattr(detection_module.audit_logger, "log_detection", lambda *args, **fields: logged.append((args, fields)))
+    fake_pages.extend(["sdt: 0912345678 ", FILLER])
+
+    records = _stream(fake_pages)
+
+    assert len(logged) == 1
+    (filename, mime_type, file_size, content_length, matches), fields = logged[0]
+    assert (filename, mime_type, content_length) == ("doc.pdf", MIME_PDF, records[-1]["content_length"])
+    assert len(matches) == records[-1]["total_matches"] > 0
+    assert "extractor" in fields